@@ -0,0 +1,66 @@
+"""
+Measures how long enemy ships take to update in a field of asteroids as the number of enemies
+grows. Enemies share one flow field, so the time spent finding paths should stay about the same.
+Run from the repository root.
+
+    python benchmarks/navigation.py
+"""
+
+import os
+import sys
+import random
+from timeit import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+import pygame as pg
+
+pg.init()
+pg.display.set_mode((1, 1))
+
+from src.input_device import InputInterpreter, KeyboardMouse
+from src.game_objects import ObjectGroup
+from src.game_objects.asteroids import Asteroid
+from src.game_objects.enemies import EnemyShip
+from src.game_objects.spaceship import PlayerShip
+
+
+ENEMY_COUNTS = [5, 20, 80]
+ASTEROID_COUNT = 60
+TICKS = 40
+REPEATS = 1
+
+InputInterpreter(KeyboardMouse(), None)
+
+
+def time_ms(func, number=REPEATS) -> float:
+    return timeit(func, number=number)/number*1000
+
+
+def make_group(enemy_count: int) -> ObjectGroup:
+    random.seed(0)
+    group = ObjectGroup()
+    group.add(PlayerShip((0, 0)))
+    for _ in range(ASTEROID_COUNT):
+        group.add(Asteroid((random.uniform(-400, 400), random.uniform(-400, 400)), (0, 0), "blue_medium"))
+    for _ in range(enemy_count):
+        group.add(EnemyShip((random.uniform(-350, 350), random.uniform(-350, 350))))
+    return group
+
+
+def update(group: ObjectGroup) -> None:
+    for _ in range(TICKS):
+        group.update((0, 0))
+
+
+
+
+if __name__ == "__main__":
+    for enemy_count in ENEMY_COUNTS:
+        group = make_group(enemy_count)
+        total = time_ms(lambda: update(group))
+        builds, _, _, build_time = group.flow_field.get_stats()
+        print(f"{enemy_count} enemies, {ASTEROID_COUNT} asteroids, {TICKS} ticks")
+        print(f"  total: {total:8.1f}ms, flow field: {builds} builds, last build {build_time:.2f}ms")
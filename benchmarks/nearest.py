@@ -0,0 +1,73 @@
+"""
+Measures how long it takes enemies to find the nearest asteroid by checking every object in the
+group compared to asking the group's spatial index. Run from the repository root.
+
+    python benchmarks/nearest.py
+"""
+
+import os
+import sys
+import random
+from timeit import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+import pygame as pg
+
+pg.init()
+pg.display.set_mode((1, 1))
+
+from src.game_objects import ObjectGroup
+from src.game_objects.asteroids import Asteroid
+
+
+ENEMY_COUNTS = [10, 50, 200]
+ASTEROID_COUNT = 300
+SHOOT_RANGE = 60
+REPEATS = 5
+
+
+def time_ms(func, number=REPEATS) -> float:
+    return timeit(func, number=number)/number*1000
+
+
+def make_group() -> ObjectGroup:
+    random.seed(0)
+    group = ObjectGroup()
+    for _ in range(ASTEROID_COUNT):
+        group.add(Asteroid((random.uniform(-1000, 1000), random.uniform(-1000, 1000)), (0, 0), "blue_small"))
+    return group
+
+
+def make_positions(enemy_count: int) -> list[pg.Vector2]:
+    random.seed(1)
+    return [pg.Vector2(random.uniform(-1000, 1000), random.uniform(-1000, 1000)) for _ in range(enemy_count)]
+
+
+def find_linear(group: ObjectGroup, positions: list[pg.Vector2]) -> None:
+    for position in positions:
+        min(
+            (obj for obj in group if isinstance(obj, Asteroid) and obj.health
+             and obj.position.distance_squared_to(position) <= SHOOT_RANGE**2),
+            key=lambda obj: obj.position.distance_squared_to(position),
+            default=None
+        )
+
+
+def find_indexed(group: ObjectGroup, positions: list[pg.Vector2]) -> None:
+    group.spatial_index.invalidate()
+    for position in positions:
+        group.nearest(position, Asteroid, SHOOT_RANGE, Asteroid.has_health)
+
+
+
+
+if __name__ == "__main__":
+    group = make_group()
+    for enemy_count in ENEMY_COUNTS:
+        positions = make_positions(enemy_count)
+        print(f"{enemy_count} enemies, {ASTEROID_COUNT} asteroids, one tick")
+        print(f"  linear:  {time_ms(lambda: find_linear(group, positions)):8.2f}ms")
+        print(f"  indexed: {time_ms(lambda: find_indexed(group, positions)):8.2f}ms")
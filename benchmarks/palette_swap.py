@@ -0,0 +1,71 @@
+"""
+Compares the cost of palette swapping textures using per color masks on 32-bit surfaces
+against indexing a texture once and swapping its palette table. Also times building the
+title text effects. Run from the repository root.
+
+    python benchmarks/palette_swap.py
+"""
+
+import os
+import sys
+from timeit import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+import pygame as pg
+
+pg.init()
+pg.display.set_mode((1, 1))
+
+from src.file_processing import assets
+from src.ui import effects, font
+
+font.init()
+
+
+BACKGROUNDS = ["backgrounds/space_background", "backgrounds/space_background_big"]
+PALETTES = ["background/blue", "background/green", "background/purple", "background/yellow"]
+REPEATS = 10
+
+
+def time_ms(func, number=REPEATS) -> float:
+    return timeit(func, number=number)/number*1000
+
+
+def benchmark_texture(path: str) -> None:
+    rgb_texture = pg.image.load(f"assets/textures/{path}.png").convert()
+    rgb_texture.set_colorkey(assets.COLORKEY)
+
+    def mask_swap():
+        for palette in PALETTES:
+            assets.palette_swap(rgb_texture, palette)
+
+    indexed_texture = assets.to_indexed_surface(rgb_texture)
+    indexed_texture.set_colorkey(assets.COLORKEY)
+
+    def table_swap():
+        for palette in PALETTES:
+            assets.palette_swap(indexed_texture, palette)
+
+    index_time = time_ms(lambda: assets.to_indexed_surface(rgb_texture), 3)
+    mask_time = time_ms(mask_swap)
+    table_time = time_ms(table_swap)
+
+    print(f"{path} {rgb_texture.size}")
+    print(f"  32-bit mask swap ({len(PALETTES)} palettes):   {mask_time:8.2f}ms, {rgb_texture.width*rgb_texture.height*4*len(PALETTES)/1024:.0f}KiB of pixels")
+    print(f"  index once:                       {index_time:8.2f}ms")
+    print(f"  palette table swap ({len(PALETTES)} palettes): {table_time:8.2f}ms, {rgb_texture.width*rgb_texture.height/1024:.0f}KiB of pixels shared")
+
+
+def benchmark_title_effects() -> None:
+    title_time = time_ms(lambda: effects.AnimatedText("SPACE ROCKS", "main_entrance_a"), 5)
+    print(f"title effect texture map: {title_time:.2f}ms")
+
+
+
+
+if __name__ == "__main__":
+    for path in BACKGROUNDS:
+        benchmark_texture(path)
+    benchmark_title_effects()
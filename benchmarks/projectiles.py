@@ -0,0 +1,69 @@
+"""
+Measures how long it takes to update hundreds of enemy bullets in a field of asteroids and
+compares each bullet checking the whole group against the projectile manager. Run from the
+repository root.
+
+    python benchmarks/projectiles.py
+"""
+
+import os
+import sys
+import random
+from timeit import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+import pygame as pg
+
+pg.init()
+pg.display.set_mode((1, 1))
+
+from src.game_objects import ObjectGroup
+from src.game_objects.asteroids import Asteroid
+from src.game_objects.projectiles import EnemyBullet
+
+
+BULLET_COUNTS = [100, 300, 1000]
+ASTEROID_COUNT = 200
+TICKS = 20
+REPEATS = 1
+
+
+def time_ms(func, number=REPEATS) -> float:
+    return timeit(func, number=number)/number*1000
+
+
+def make_group(bullet_count: int) -> ObjectGroup:
+    random.seed(0)
+    group = ObjectGroup()
+    for _ in range(ASTEROID_COUNT):
+        group.add(Asteroid((random.uniform(-1500, 1500), random.uniform(-1500, 1500)), (0, 0), "blue_small"))
+
+    for _ in range(bullet_count):
+        direction = pg.Vector2(0, -1).rotate(random.uniform(0, 360))
+        group.add(EnemyBullet(pg.Vector2(random.uniform(-1500, 1500), random.uniform(-1500, 1500)), direction, (0, 0)))
+
+    return group
+
+
+def update_one_by_one(group: ObjectGroup) -> None:
+    for _ in range(TICKS):
+        for obj in group.sprites():
+            if obj.primary_group is not None:
+                obj.update()
+
+
+def update_managed(group: ObjectGroup) -> None:
+    for _ in range(TICKS):
+        group.update((0, 0))
+
+
+
+
+if __name__ == "__main__":
+    for bullet_count in BULLET_COUNTS:
+        print(f"{bullet_count} bullets, {ASTEROID_COUNT} asteroids, {TICKS} ticks")
+        print(f"  one by one: {time_ms(lambda: update_one_by_one(make_group(bullet_count))):8.1f}ms")
+        print(f"  managed:    {time_ms(lambda: update_managed(make_group(bullet_count))):8.1f}ms")
@@ -0,0 +1,67 @@
+"""
+Measures how long it takes to resume a level from save data with thousands of asteroids and
+compares creating the entities one at a time against creating them in batches. Run from the
+repository root.
+
+    python benchmarks/restore_progress.py
+"""
+
+import os
+import sys
+import random
+from timeit import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+import pygame as pg
+
+pg.init()
+pg.display.set_mode((1, 1))
+
+from src.custom_types import SaveData
+from src.game_objects import GameObject
+from src.states.play_level import PlayLevel
+from src.ui import font
+
+font.init()
+
+
+ENTITY_COUNTS = [1000, 5000, 10000]
+ASTEROID_IDS = ["blue_small", "blue_medium", "green_large", "yellow_medium"]
+REPEATS = 3
+
+
+def time_ms(func, number=REPEATS) -> float:
+    return timeit(func, number=number)/number*1000
+
+
+def make_save_data(entity_count: int) -> SaveData:
+    random.seed(0)
+    entity_data = [{"id": 1, "save_key": "player_spaceship", "position": (0.0, 0.0), "velocity": (0.0, 0.0),
+                    "rotation": 0.0, "powerups": []}]
+
+    for i in range(2, entity_count+1):
+        entity_data.append({"id": i,
+                            "save_key": "asteroid",
+                            "position": (random.uniform(-500, 500), random.uniform(-500, 500)),
+                            "velocity": (random.uniform(-6, 6), random.uniform(-6, 6)),
+                            "asteroid_id": random.choice(ASTEROID_IDS),
+                            "rotation": random.randint(-179, 180),
+                            "angular_vel": random.randint(-8, 8),
+                            "health": random.randint(1, 2)})
+
+    return SaveData("level_1", 1234, 1.5, 3, (10.0, 20.0), entity_data)
+
+
+
+
+if __name__ == "__main__":
+    for entity_count in ENTITY_COUNTS:
+        save_data = make_save_data(entity_count)
+
+        print(f"{entity_count} entities")
+        print(f"  one at a time: {time_ms(lambda: [GameObject.init_from_data(data) for data in save_data.entity_data]):8.1f}ms")
+        print(f"  batched:       {time_ms(lambda: GameObject.init_all_from_data(save_data.entity_data)):8.1f}ms")
+        print(f"  resume level:  {time_ms(lambda: PlayLevel.init_from_save(save_data)):8.1f}ms")
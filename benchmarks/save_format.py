@@ -0,0 +1,60 @@
+"""
+Compares saving and loading progress with the binary save format against pickle for
+different numbers of entities. Run from the repository root.
+
+    python benchmarks/save_format.py
+"""
+
+import os
+import sys
+import pickle
+import random
+from timeit import timeit
+
+sys.path.insert(0, os.getcwd())
+
+from src.custom_types import SaveData
+from src.file_processing import save_format
+
+
+ENTITY_COUNTS = [1000, 10000]
+REPEATS = 10
+
+
+def time_ms(func, number=REPEATS) -> float:
+    return timeit(func, number=number)/number*1000
+
+
+def make_save_data(entity_count: int) -> SaveData:
+    "Makes save data with a player ship and mostly asteroids like a long running game would have."
+    random.seed(0)
+    entity_data = [{"id": 1, "save_key": "player_spaceship", "position": (0.0, 0.0), "velocity": (0.0, 0.0),
+                    "rotation": 0.0, "powerups": []}]
+
+    for i in range(2, entity_count+1):
+        entity_data.append({"id": i,
+                            "save_key": "asteroid",
+                            "position": (random.uniform(-500, 500), random.uniform(-500, 500)),
+                            "velocity": (random.uniform(-6, 6), random.uniform(-6, 6)),
+                            "asteroid_id": random.choice(["blue_small", "blue_medium", "blue_large"]),
+                            "rotation": random.uniform(0, 360),
+                            "angular_vel": random.uniform(-10, 10),
+                            "health": random.randint(1, 6)})
+
+    return SaveData("level_1", 1234, 1.5, 3, (10.0, 20.0), entity_data)
+
+
+
+
+if __name__ == "__main__":
+    for entity_count in ENTITY_COUNTS:
+        save_data = make_save_data(entity_count)
+        pickled = pickle.dumps(save_data)
+        encoded = save_format.encode_progress(save_data)
+        assert save_format.decode_progress(encoded) == save_data
+
+        print(f"{entity_count} entities")
+        print(f"  pickle:        save {time_ms(lambda: pickle.dumps(save_data)):7.2f}ms, "
+              f"load {time_ms(lambda: pickle.loads(pickled)):7.2f}ms, {len(pickled)/1024:7.1f}KiB")
+        print(f"  binary format: save {time_ms(lambda: save_format.encode_progress(save_data)):7.2f}ms, "
+              f"load {time_ms(lambda: save_format.decode_progress(encoded)):7.2f}ms, {len(encoded)/1024:7.1f}KiB")
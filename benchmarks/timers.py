@@ -0,0 +1,52 @@
+"""
+Measures how long it takes to count down thousands of timers by updating each one every tick
+compared to putting them on a timer wheel. Run from the repository root.
+
+    python benchmarks/timers.py
+"""
+
+import os
+import sys
+import random
+from timeit import timeit
+
+sys.path.insert(0, os.getcwd())
+
+from src.custom_types import Timer, TimerWheel
+
+
+TIMER_COUNTS = [100, 1000, 10000]
+TICKS = 200
+REPEATS = 3
+
+
+def time_ms(func, number=REPEATS) -> float:
+    return timeit(func, number=number)/number*1000
+
+
+def make_timers(timer_count: int, wheel: TimerWheel | None = None) -> list[Timer]:
+    random.seed(0)
+    return [Timer(random.randint(10, 400), random.random() < 0.5, wheel=wheel).start() for _ in range(timer_count)]
+
+
+def update_polled(timer_count: int) -> None:
+    timers = make_timers(timer_count)
+    for _ in range(TICKS):
+        for timer in timers:
+            timer.update()
+
+
+def update_wheel(timer_count: int) -> None:
+    wheel = TimerWheel()
+    make_timers(timer_count, wheel)
+    for _ in range(TICKS):
+        wheel.update()
+
+
+
+
+if __name__ == "__main__":
+    for timer_count in TIMER_COUNTS:
+        print(f"{timer_count} timers, {TICKS} ticks")
+        print(f"  polled: {time_ms(lambda: update_polled(timer_count)):8.1f}ms")
+        print(f"  wheel:  {time_ms(lambda: update_wheel(timer_count)):8.1f}ms")
@@ -0,0 +1,165 @@
+"""
+Packs the sprites from multiple texture maps into a few large texture atlases. Run this
+script whenever a texture or texture map included in the atlas is changed.
+
+    python build_atlas.py
+"""
+
+import os
+import pygame as pg
+from typing import NamedTuple
+
+from src.file_processing import load_json, save_json
+
+
+TEXTURES_DIR = "assets/textures"
+TEXTURE_MAPS_DIR = "assets/texture_maps"
+
+ATLAS_DIR = "atlases"
+ATLAS_DATA_PATH = "assets/texture_atlas"
+
+ATLAS_SIZE = (512, 512)
+PADDING = 1
+COLORKEY = (255, 0, 255)
+
+
+# Texture maps to pack into the atlas and weather their sprites should have colorkey borders
+# trimmed. UI textures are not trimmed as their size determines their layout.
+ATLAS_TEXTURE_MAPS = {
+    "asteroid_large": True,
+    "asteroid_medium": True,
+    "asteroid_small": True,
+    "smoke": True,
+    "particles": True,
+    "enemies": True,
+    "spaceship": True,
+    "powerups": True,
+    "icons": False,
+    "ui_elements": False
+}
+
+
+
+
+class Sprite(NamedTuple):
+    texture: str
+    area: tuple[int, int, int, int]
+    trim: bool
+
+
+class PackedSprite(NamedTuple):
+    atlas: int
+    area: tuple[int, int, int, int]
+    offset: tuple[float, float]
+
+
+
+
+def load_source_texture(path: str) -> pg.Surface:
+    "Loads a texture without alpha so that it matches how textures are loaded in game."
+    texture = pg.image.load(f"{TEXTURES_DIR}/{path}.png")
+    return pg.image.frombytes(pg.image.tobytes(texture, "RGB"), texture.size, "RGB")
+
+
+
+def trim_area(texture: pg.Surface, area: pg.Rect) -> pg.Rect:
+    "Returns the smallest area within `area` that contains all pixels that are not the colorkey."
+    mask = pg.mask.from_threshold(texture.subsurface(area), COLORKEY, (1, 1, 1, 255))
+    mask.invert()
+    bounding_rects = mask.get_bounding_rects()
+
+    # Sprites that are completely transparent are left as they are
+    if not bounding_rects:
+        return area
+
+    return bounding_rects[0].unionall(bounding_rects[1:]).move(area.topleft)
+
+
+
+def pack_sprites(sizes: dict[Sprite, tuple[int, int]]) -> dict[Sprite, tuple[int, pg.Rect]]:
+    "Places sprites in rows (shelves) going from tallest to shortest. Returns the atlas index and area of each sprite."
+    placements = {}
+    atlas = 0
+    x = y = row_height = 0
+
+    for sprite, (width, height) in sorted(sizes.items(), key=lambda x: (x[1][1], x[1][0]), reverse=True):
+        if width+PADDING > ATLAS_SIZE[0] or height+PADDING > ATLAS_SIZE[1]:
+            raise ValueError(f"Sprite {sprite.area} in '{sprite.texture}' is too large for the atlas")
+
+        if x+width+PADDING > ATLAS_SIZE[0]:
+            x = 0
+            y += row_height
+            row_height = 0
+
+        if y+height+PADDING > ATLAS_SIZE[1]:
+            atlas += 1
+            x = y = row_height = 0
+
+        placements[sprite] = (atlas, pg.Rect(x+PADDING, y+PADDING, width, height))
+        x += width+PADDING
+        row_height = max(row_height, height+PADDING)
+
+    return placements
+
+
+
+def build_atlas() -> None:
+    texture_maps = {name: load_json(f"{TEXTURE_MAPS_DIR}/{name}.texture_map") for name in ATLAS_TEXTURE_MAPS}
+    source_textures = {data["texture"]: load_source_texture(data["texture"]) for data in texture_maps.values()}
+
+    # Sprites that use the same area of the same texture are only packed once
+    trimmed_areas: dict[Sprite, pg.Rect] = {}
+    for name, data in texture_maps.items():
+        for area in data["mappings"].values():
+            sprite = Sprite(data["texture"], tuple(area), ATLAS_TEXTURE_MAPS[name])
+            if sprite not in trimmed_areas:
+                if sprite.trim:
+                    trimmed_areas[sprite] = trim_area(source_textures[sprite.texture], pg.Rect(area))
+                else:
+                    trimmed_areas[sprite] = pg.Rect(area)
+
+    placements = pack_sprites({sprite: area.size for sprite, area in trimmed_areas.items()})
+
+    atlas_count = max(atlas for atlas, _ in placements.values())+1
+    atlas_surfaces = []
+    for i in range(atlas_count):
+        used_height = max(rect.bottom for atlas, rect in placements.values() if atlas == i)+PADDING
+        surface = pg.Surface((ATLAS_SIZE[0], used_height))
+        surface.fill(COLORKEY)
+        atlas_surfaces.append(surface)
+
+    packed_sprites: dict[Sprite, PackedSprite] = {}
+    for sprite, (atlas, rect) in placements.items():
+        trimmed_area = trimmed_areas[sprite]
+        atlas_surfaces[atlas].blit(source_textures[sprite.texture], rect, trimmed_area)
+        # Rect.center rounds down so the exact center offset is calculated from the corners
+        offset = (pg.Vector2(trimmed_area.topleft)*2 + trimmed_area.size - pg.Vector2(sprite.area[:2])*2 - sprite.area[2:])*0.5
+        packed_sprites[sprite] = PackedSprite(atlas, tuple(rect), tuple(offset))
+
+    os.makedirs(f"{TEXTURES_DIR}/{ATLAS_DIR}", exist_ok=True)
+    atlas_paths = []
+    for i, surface in enumerate(atlas_surfaces):
+        atlas_paths.append(f"{ATLAS_DIR}/atlas_{i}")
+        pg.image.save(surface, f"{TEXTURES_DIR}/{atlas_paths[-1]}.png")
+
+    atlas_data = {"atlases": atlas_paths, "texture_maps": {}}
+    for name, data in texture_maps.items():
+        mappings = {}
+        for sprite_name, area in data["mappings"].items():
+            packed = packed_sprites[Sprite(data["texture"], tuple(area), ATLAS_TEXTURE_MAPS[name])]
+            mappings[sprite_name] = {"atlas": packed.atlas, "area": list(packed.area), "offset": list(packed.offset)}
+
+        atlas_data["texture_maps"][name] = {"source": data["texture"], "mappings": mappings}
+
+    save_json(atlas_data, ATLAS_DATA_PATH)
+
+    source_area = sum(texture.width*texture.height for texture in source_textures.values())
+    atlas_area = sum(surface.width*surface.height for surface in atlas_surfaces)
+    print(f"Packed {len(packed_sprites)} sprites from {len(texture_maps)} texture maps into {atlas_count} atlas(es)")
+    print(f"Texture area: {source_area}px -> {atlas_area}px")
+
+
+
+
+if __name__ == "__main__":
+    build_atlas()
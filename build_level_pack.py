@@ -0,0 +1,110 @@
+"""
+Validates all levels and compiles them into a single level pack with precomputed spawn tables.
+Run this script whenever a level is changed.
+
+    python build_level_pack.py
+"""
+
+import os
+
+from src.custom_types import LevelData, WeightedSampler
+from src.file_processing import load_json, save_json, data, assets
+from src.misc import find_subclass_by_name
+
+
+LEVELS_DIR = data.LEVELS_DIR
+LEVEL_PACK_PATH = data.LEVEL_PACK_PATH
+ASTEROID_DATA_PATH = "data/asteroids"
+
+
+
+
+def load_levels() -> dict[str, LevelData]:
+    "Loads every level directly inside the levels folder. Levels in subfolders (like test levels) are not included."
+    levels = {}
+    for file_name in sorted(os.listdir(LEVELS_DIR)):
+        name, extension = os.path.splitext(file_name)
+        if extension == ".json":
+            levels[name] = data.parse_level_data(name, load_json(f"{LEVELS_DIR}/{name}"))
+
+    return levels
+
+
+
+def validate_levels(levels: dict[str, LevelData]) -> list[str]:
+    "Returns a list of problems with the levels that would cause errors while playing them."
+    from src.game_objects.powerups import PowerUp
+    from src.game_objects.enemies import Enemy
+
+    asteroid_ids = load_json(ASTEROID_DATA_PATH).keys()
+    problems = []
+
+    for name, level in levels.items():
+        if level.next_level is not None and level.next_level not in levels:
+            problems.append(f"'{name}' has next level '{level.next_level}' that does not exist")
+
+        for asteroid_id in level.asteroid_spawn_weights.choices:
+            if asteroid_id not in asteroid_ids:
+                problems.append(f"'{name}' spawns asteroid '{asteroid_id}' that is not in {ASTEROID_DATA_PATH}.json")
+
+        for enemy_name in level.enemy_spawn_weights.choices:
+            if find_subclass_by_name(Enemy, enemy_name) is None:
+                problems.append(f"'{name}' spawns enemy '{enemy_name}' that does not exist")
+
+        for powerup_name in level.powerup_spawn_weights.choices:
+            if powerup_name not in PowerUp.powerup_list:
+                problems.append(f"'{name}' spawns powerup '{powerup_name}' that does not exist")
+
+        if level.music is not None:
+            if level.music not in assets.MUSIC_DEFINITIONS:
+                problems.append(f"'{name}' plays music '{level.music}' that is not in assets/music_definitions.json")
+            else:
+                for file_name in assets.MUSIC_DEFINITIONS[level.music].values():
+                    if not os.path.isfile(f"{assets.SOUNDS_DIR}/{file_name}.ogg"):
+                        problems.append(f"'{name}' plays music '{level.music}' but '{file_name}.ogg' is missing")
+
+    return problems
+
+
+
+def compile_level_pack(levels: dict[str, LevelData]) -> dict[str, list]:
+    """
+    Creates the level pack data. Levels are stored in a list in the same order as their names and
+    next levels are stored as indexes into that list. Spawn weights are stored as their alias tables.
+    """
+    level_names = list(levels)
+    level_pack = {"levels": level_names, "level_data": []}
+
+    for level in levels.values():
+        packed_data = level._asdict()
+        del packed_data["level_name"]
+
+        for field, value in packed_data.items():
+            if isinstance(value, WeightedSampler):
+                packed_data[field] = [list(column) for column in value]
+            elif isinstance(value, tuple):
+                packed_data[field] = list(value)
+
+        if level.next_level is not None:
+            packed_data["next_level"] = level_names.index(level.next_level)
+
+        level_pack["level_data"].append(packed_data)
+
+    return level_pack
+
+
+
+def build_level_pack() -> None:
+    levels = load_levels()
+    problems = validate_levels(levels)
+    if problems:
+        raise ValueError("Invalid levels:\n\t" + "\n\t".join(problems))
+
+    save_json(compile_level_pack(levels), LEVEL_PACK_PATH)
+    print(f"Compiled {len(levels)} levels into {LEVEL_PACK_PATH}.json")
+
+
+
+
+if __name__ == "__main__":
+    build_level_pack()
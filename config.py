@@ -12,4 +12,7 @@ DEFAULT_CANVAS_SIZE = (369, 288)
 CANVAS_AREA = DEFAULT_CANVAS_SIZE[0]*DEFAULT_CANVAS_SIZE[1]
 
 FRAMERATE = 60
-TICKRATE = 20
\ No newline at end of file
+# The simulation can run at 20, 30, 60 or 120 TPS. Gameplay values are written for BASE_TICKRATE
+# and are scaled to the tick rate by src/time_units.py.
+TICKRATE = 20
+BASE_TICKRATE = 20
\ No newline at end of file
@@ -0,0 +1,150 @@
+"Contains the thread that plays sound effects so that the game logic thread doesn't wait for the mixer."
+
+import threading
+from collections import deque
+from time import perf_counter
+from typing import Literal
+
+from src.audio.soundfx import SoundFXManager, SoundQueue
+
+
+type AudioCommand = tuple[Literal["play_queue", "stop_loops"], SoundQueue, float]
+
+
+
+
+class AudioDispatcher:
+    """
+    Sends sound commands from the game logic thread to an audio thread through a bounded
+    queue. The audio thread is the only thread that uses `SoundFXManager` so it owns all
+    mixer channels, including looping sounds which are started, updated and stopped by
+    comparing each tick's sound queue with the previous one. Commands are run straight away
+    if the audio thread has not been started.
+    """
+
+    QUEUE_SIZE = 64
+    LATENCY_SAMPLES = 20
+
+    # Appending and popping from either end of a deque is thread-safe
+    __commands: deque[AudioCommand] = deque()
+    __latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+    __wake_event = threading.Event()
+    __thread: threading.Thread | None = None
+    __run = False
+    __stats = {"dropped": 0, "max_depth": 0}
+
+    @classmethod
+    def start(cls) -> None:
+        "Starts the audio thread."
+        if cls.__thread is None:
+            cls.__run = True
+            cls.__thread = threading.Thread(name="audio_dispatch", target=cls.__dispatch_loop, daemon=True)
+            cls.__thread.start()
+
+
+    @classmethod
+    def stop(cls) -> None:
+        "Stops the audio thread after it has run all commands in the queue."
+        if cls.__thread is not None:
+            cls.__run = False
+            cls.__wake_event.set()
+            cls.__thread.join()
+            cls.__thread = None
+        
+        cls.__run_commands()
+
+
+    @classmethod
+    def is_running(cls) -> bool:
+        return cls.__thread is not None
+
+
+    @classmethod
+    def play_sound_queue(cls, queue: SoundQueue) -> None:
+        "Sends all sounds queued in a tick to the audio thread."
+        cls.__send_command(("play_queue", queue, perf_counter()))
+
+
+    @classmethod
+    def stop_looping_sounds(cls) -> None:
+        "Stops every looping sound on the audio thread. Used when the game closes."
+        cls.__send_command(("stop_loops", [], perf_counter()))
+
+
+    @classmethod
+    def __send_command(cls, command: AudioCommand) -> None:
+        if cls.__thread is None:
+            cls.__run_command(command)
+            return
+
+        if len(cls.__commands) >= cls.QUEUE_SIZE:
+            cls.__stats["dropped"] += 1
+            return
+
+        cls.__commands.append(command)
+        cls.__stats["max_depth"] = max(cls.__stats["max_depth"], len(cls.__commands))
+        cls.__wake_event.set()
+
+
+    @classmethod
+    def __dispatch_loop(cls) -> None:
+        while cls.__run:
+            cls.__wake_event.wait(0.1)
+            # Commands sent after the event is cleared will set it again so they are not missed
+            cls.__wake_event.clear()
+            cls.__run_commands()
+
+
+    @classmethod
+    def __run_commands(cls) -> None:
+        while cls.__commands:
+            cls.__run_command(cls.__commands.popleft())
+
+
+    @classmethod
+    def __run_command(cls, command: AudioCommand) -> None:
+        command_type, queue, send_time = command
+        match command_type:
+            case "play_queue":
+                SoundFXManager.play_sound_queue(queue)
+            case "stop_loops":
+                SoundFXManager.stop_looping_sounds()
+        
+        cls.__latencies.append(perf_counter()-send_time)
+
+
+    @classmethod
+    def get_queue_depth(cls) -> int:
+        return len(cls.__commands)
+
+
+    @classmethod
+    def get_latency(cls) -> tuple[float, float]:
+        "Returns the average and max time in seconds between sending and running recent commands."
+        latencies = list(cls.__latencies)
+        if not latencies:
+            return 0.0, 0.0
+        return sum(latencies)/len(latencies), max(latencies)
+
+
+    @classmethod
+    def get_stats(cls) -> dict[str, int]:
+        return cls.__stats.copy()
+
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        cls.__latencies.clear()
+        cls.__stats = dict.fromkeys(cls.__stats, 0)
+
+
+    @classmethod
+    def debug_info(cls) -> str:
+        average, highest = cls.get_latency()
+        return (f"audio queue: {len(cls.__commands)}/{cls.QUEUE_SIZE} (max {cls.__stats["max_depth"]}), dropped: {cls.__stats["dropped"]}, "
+                f"latency: {average*1000:.2f}ms (max {highest*1000:.2f}ms)")
+
+
+
+    def __new__(cls):
+        return NotImplementedError("Cannot instantiate AudioDispatcher")
@@ -1,5 +1,9 @@
 "Contains stuff for music playback."
 import pygame as pg
+import threading
+from queue import Queue
+from time import perf_counter, sleep
+from typing import Callable
 
 from src.custom_types import GameMusic
 from src.file_processing import assets, data
@@ -9,13 +13,46 @@ from src.file_processing import assets, data
 
 
 class MusicManager:
+    """
+    Music is loaded and switched on a separate thread so that the thread that changes the
+    music doesn't wait for files to be read. Tracks that will be needed soon can be prefetched
+    into memory so that switching to them doesn't need to read from disk at all.
+    """
     __current_music: GameMusic | None = None
+    __prefetched: dict[str, dict[str, bytes]] = {}
+    __jobs: Queue[Callable[[], None]] = Queue()
+    __worker: threading.Thread | None = None
+    __switch_latency: float | None = None
 
     @classmethod
-    def play(cls, name: str, start=0.0, loop=True) -> None:
+    def play(cls, name: str, start=0.0, loop=True, fade=0.0) -> None:
+        "Switches to a track. If `fade` is given the current track fades out and the new one fades in over that many seconds."
         cls.update_music_volume()
         cls.__current_music = assets.load_music_data(name)
-        cls.__current_music.play_music(start, loop)
+        music = cls.__current_music
+        request_time = perf_counter()
+        cls.__add_job(lambda: cls.__switch_music(music, start, loop, fade, request_time))
+
+    @classmethod
+    def prefetch(cls, name: str) -> None:
+        "Reads a track into memory ahead of time."
+        if name not in cls.__prefetched:
+            music = assets.load_music_data(name)
+            cls.__add_job(lambda: cls.__prefetch_music(music))
+
+    @classmethod
+    def is_prefetched(cls, name: str) -> bool:
+        return name in cls.__prefetched
+
+    @classmethod
+    def clear_prefetched(cls) -> None:
+        "Frees the memory used by prefetched tracks."
+        cls.__prefetched.clear()
+
+    @classmethod
+    def wait(cls) -> None:
+        "Waits for all queued music loads and switches to finish."
+        cls.__jobs.join()
 
     @classmethod
     def pause(cls) -> None:
@@ -31,7 +68,7 @@ class MusicManager:
             pg.mixer_music.fadeout(fadeout)
         else:
             pg.mixer_music.stop()
-        
+
         cls.__current_music = None
 
 
@@ -40,12 +77,71 @@ class MusicManager:
         if cls.__current_music is not None:
             return cls.__current_music.get_name()
 
-        
+    @classmethod
+    def get_switch_latency(cls) -> float | None:
+        "Returns the time in seconds between requesting the last track switch and the track starting."
+        return cls.__switch_latency
+
+
     @classmethod
     def update_music_volume(cls) -> None:
         pg.mixer_music.set_volume(data.get_setting("music_volume"))
 
 
+    @classmethod
+    def debug_info(cls) -> str:
+        if cls.__switch_latency is None:
+            latency = "-"
+        else:
+            latency = f"{cls.__switch_latency*1000:.1f}ms"
+        return f"music: {cls.get_track_name()}, switch latency: {latency}, prefetched: {len(cls.__prefetched)}"
+
+
+
+    @classmethod
+    def __add_job(cls, job: Callable[[], None]) -> None:
+        if cls.__worker is None:
+            cls.__worker = threading.Thread(name="music_loader", target=cls.__run_jobs, daemon=True)
+            cls.__worker.start()
+        cls.__jobs.put(job)
+
+    @classmethod
+    def __run_jobs(cls) -> None:
+        while True:
+            job = cls.__jobs.get()
+            try:
+                job()
+            except (OSError, pg.error) as e:
+                print(f"Warning:", *e.args)
+            finally:
+                cls.__jobs.task_done()
+
+    @classmethod
+    def __prefetch_music(cls, music: GameMusic) -> None:
+        cls.__prefetched[music.get_name()] = music.load_files()
+
+    @classmethod
+    def __switch_music(cls, music: GameMusic, start: float, loop: bool, fade: float, request_time: float) -> None:
+        # Another track was requested after this one
+        if music is not cls.__current_music or pg.mixer.get_init() is None:
+            return
+
+        files = cls.__prefetched.pop(music.get_name(), None)
+        if files is None:
+            files = music.load_files()
+
+        if fade and pg.mixer_music.get_busy():
+            pg.mixer_music.fadeout(int(fade*1000))
+            sleep(fade)
+
+        # Music could have been stopped or changed while loading
+        if music is not cls.__current_music:
+            return
+
+        music.play_music(start, loop, files, int(fade*1000))
+        cls.__switch_latency = perf_counter()-request_time
+
+
 
     def __new__(cls):
-        return NotImplementedError("Cannot instantiate MusicManager")
\ No newline at end of file
+        return NotImplementedError("Cannot instantiate MusicManager")
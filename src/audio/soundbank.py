@@ -0,0 +1,96 @@
+"Contains the sound bank that keeps decoded sound effects in memory."
+
+import threading
+import pygame as pg
+
+from src.custom_types import GameSound
+from src.file_processing import assets
+
+
+
+
+class SoundBank:
+    """
+    Preloads every sound in sound definitions so that sounds are not decoded again during
+    gameplay. `pg.Sound` decodes files into the mixer's own sample format when loading so
+    playing a banked sound needs no conversion. Sounds that are longer than `LONG_SOUND_LENGTH`
+    or don't fit in `MEMORY_BUDGET` are left out of the bank and loaded on demand instead.
+    """
+
+    MEMORY_BUDGET = 32*1024*1024
+    LONG_SOUND_LENGTH = 10.0
+
+    __sounds: dict[str, GameSound] = {}
+    __memory_usage: dict[str, int] = {}
+    __on_demand: set[str] = set()
+    __preload_thread: threading.Thread | None = None
+
+    @classmethod
+    def preload(cls) -> None:
+        "Decodes all sounds in sound definitions that fit in the memory budget."
+        if pg.mixer.get_init() is None:
+            return
+
+        for name in assets.SOUND_DEFINITIONS:
+            if name in cls.__sounds or name in cls.__on_demand:
+                continue
+
+            sound = assets.load_sound(name)
+            memory_size = sound.get_memory_size()
+
+            if sound.get_length() > cls.LONG_SOUND_LENGTH or cls.get_total_memory()+memory_size > cls.MEMORY_BUDGET:
+                cls.__on_demand.add(name)
+            else:
+                cls.__memory_usage[name] = memory_size
+                cls.__sounds[name] = sound
+
+
+    @classmethod
+    def preload_async(cls) -> None:
+        "Preloads sounds on a separate thread. Sounds that are played before they are preloaded will be loaded on demand."
+        if cls.__preload_thread is None or not cls.__preload_thread.is_alive():
+            cls.__preload_thread = threading.Thread(name="sound_bank_preload", target=cls.preload, daemon=True)
+            cls.__preload_thread.start()
+
+
+    @classmethod
+    def get_sound(cls, name: str) -> GameSound:
+        "Returns a sound from the bank or loads it if it has not been preloaded."
+        sound = cls.__sounds.get(name)
+        if sound is None:
+            return assets.load_sound(name)
+        return sound
+    
+
+    @classmethod
+    def is_loaded(cls, name: str) -> bool:
+        return name in cls.__sounds
+    
+
+    @classmethod
+    def get_memory_usage(cls) -> dict[str, int]:
+        "Returns the number of bytes used by each preloaded sound."
+        return cls.__memory_usage.copy()
+    
+
+    @classmethod
+    def get_total_memory(cls) -> int:
+        return sum(cls.__memory_usage.values())
+
+
+    @classmethod
+    def clear(cls) -> None:
+        "Removes all sounds from the bank."
+        cls.__sounds.clear()
+        cls.__memory_usage.clear()
+        cls.__on_demand.clear()
+
+
+    @classmethod
+    def debug_info(cls) -> str:
+        return f"sound bank: {len(cls.__sounds)} sounds, {cls.get_total_memory()/1024:.0f}KiB, {len(cls.__on_demand)} on demand"
+
+
+
+    def __new__(cls):
+        return NotImplementedError("Cannot instantiate SoundBank")
@@ -1,8 +1,10 @@
 "Contains stuff for playing and queueing sound effects."
 
 import pygame as pg
+from typing import NamedTuple
 
-from src.file_processing import assets, data
+from src.file_processing import data
+from src.audio.soundbank import SoundBank
 
 
 type SoundQueue = list[tuple[str, float, int]]
@@ -15,24 +17,27 @@ class SoundFXManager:
     @classmethod
     def play_sound(cls, name: str, volume=1.0, loops=0) -> pg.Channel | None:
         if pg.mixer.get_init() is not None:
-            sound = assets.load_sound(name)
+            sound = SoundBank.get_sound(name)
             return sound.play(pg.math.clamp(volume, 0, 1)*data.get_setting("soundfx_volume"), loops)
 
 
 
     @classmethod
     def play_sound_queue(cls, queue: SoundQueue) -> None:
+        sounds: list[tuple[str, float]] = []
         new_loop_sounds: dict[tuple[str, int], float] = {}
         for name, volume, object_id in queue:
             if object_id == 0:
-                cls.play_sound(name, volume)
+                sounds.append((name, volume))
             else:
                 new_loop_sounds[(name, object_id)] = volume
         
+        VoiceManager.play_sounds(sounds)
+        
         for loop_id, channel in list(cls.__looping_sounds.items()):
             # If a currently looping sound should continue in next tick
             if loop_id in new_loop_sounds:
-                channel.set_volume(new_loop_sounds[loop_id])
+                channel.set_volume(pg.math.clamp(new_loop_sounds[loop_id], 0, 1)*data.get_setting("soundfx_volume"))
                 new_loop_sounds.pop(loop_id)
             # If currently playing sound should not continue in next tick
             else:
@@ -57,6 +62,116 @@ class SoundFXManager:
 
 
 
+class Voice(NamedTuple):
+    name: str
+    channel: pg.Channel
+    sound: pg.Sound | None
+    volume: float
+    tick: int
+
+
+
+
+class VoiceManager:
+    """
+    Decides which sound effects get a channel. Identical sounds played in the same tick are merged
+    into one louder sound and the number of voices is limited for each sound and overall. When a
+    limit is reached the quietest voice, or the oldest if they are equally quiet, is stopped to make
+    room for a louder sound.
+    """
+
+    MAX_VOICES = 32
+    MAX_VOICES_PER_SOUND = 4
+    MERGED_VOLUME_CAP = 1.0
+
+    __voices: list[Voice] = []
+    __tick = 0
+    __stats = {"merged": 0, "limited": 0, "stolen": 0}
+
+    @classmethod
+    def play_sounds(cls, sounds: list[tuple[str, float]]) -> None:
+        "Plays all sound effects queued in a tick."
+        cls.__tick += 1
+        cls.__voices = [voice for voice in cls.__voices if voice.channel.get_sound() is voice.sound and voice.channel.get_busy()]
+
+        merged_sounds: dict[str, float] = {}
+        for name, volume in sounds:
+            merged_sounds[name] = min(merged_sounds.get(name, 0.0)+volume, cls.MERGED_VOLUME_CAP)
+        cls.__stats["merged"] += len(sounds)-len(merged_sounds)
+
+        # Louder sounds are played first so that quieter ones are dropped when limits are reached
+        for name, volume in sorted(merged_sounds.items(), key=lambda x: x[1], reverse=True):
+            same_voices = [voice for voice in cls.__voices if voice.name == name]
+            if len(same_voices) >= cls.MAX_VOICES_PER_SOUND:
+                if not cls.__steal_voice(same_voices, volume):
+                    continue
+            elif len(cls.__voices) >= cls.MAX_VOICES:
+                if not cls.__steal_voice(cls.__voices, volume):
+                    continue
+
+            channel = SoundFXManager.play_sound(name, volume)
+            # All mixer channels are being used
+            if channel is None and cls.__steal_voice(cls.__voices, volume):
+                channel = SoundFXManager.play_sound(name, volume)
+
+            if channel is not None:
+                cls.__voices = [voice for voice in cls.__voices if voice.channel.id != channel.id]
+                cls.__voices.append(Voice(name, channel, channel.get_sound(), volume, cls.__tick))
+
+
+    @classmethod
+    def __steal_voice(cls, voices: list[Voice], volume: float) -> bool:
+        "Stops the quietest voice from `voices` if it is not louder than `volume`. Returns True if a voice was stopped."
+        if not voices:
+            cls.__stats["limited"] += 1
+            return False
+
+        voice = min(voices, key=lambda x: (x.volume, x.tick))
+        if voice.volume > volume:
+            cls.__stats["limited"] += 1
+            return False
+
+        voice.channel.stop()
+        cls.__voices.remove(voice)
+        cls.__stats["stolen"] += 1
+        return True
+
+
+    @classmethod
+    def get_voice_count(cls, name: str | None = None) -> int:
+        "Returns the number of voices playing a sound or all voices if `name` is None."
+        if name is None:
+            return len(cls.__voices)
+        return sum(1 for voice in cls.__voices if voice.name == name)
+
+
+    @classmethod
+    def get_stats(cls) -> dict[str, int]:
+        return cls.__stats.copy()
+
+
+    @classmethod
+    def reset(cls) -> None:
+        "Stops all voices and resets stats."
+        for voice in cls.__voices:
+            voice.channel.stop()
+        cls.__voices.clear()
+        cls.__tick = 0
+        cls.__stats = dict.fromkeys(cls.__stats, 0)
+
+
+    @classmethod
+    def debug_info(cls) -> str:
+        return f"voices: {len(cls.__voices)}/{cls.MAX_VOICES}, merged: {cls.__stats["merged"]}, limited: {cls.__stats["limited"]}, stolen: {cls.__stats["stolen"]}"
+
+
+
+    def __new__(cls):
+        return NotImplementedError("Cannot instantiate VoiceManager")
+
+
+
+
 class HasSoundQueue:
     "Has methods for storing sounds in queue and removing theme all at once."
     def __init__(self, *args, **kwargs):
@@ -4,8 +4,9 @@ from pygame.locals import *
 from config import *
 from src.input_device import InputInterpreter, KeyboardMouse
 
-from src.file_processing import assets
+from src.file_processing import assets, data
 from src.audio.soundfx import SoundFXManager
+from src.audio.soundbank import SoundBank
 from src.ui import font
 from src.states import StateStack, init_state
 
@@ -43,6 +44,7 @@ class BasicEngine:
         self.game_canvas = pg.Surface(DEFAULT_CANVAS_SIZE)
 
         font.init()
+        SoundBank.preload()
         init_state.Initializer(self.state_stack)
 
         try:
@@ -65,6 +67,7 @@ class BasicEngine:
         
         finally:
             self.state_stack.quit()
+            data.wait_for_saves()
             print(f"error: {self.error}")
 
 
@@ -76,4 +79,4 @@ class BasicEngine:
                 self.run = False
                 return
         
-        self.input_interpreter.keyboard_mouse.get_userinput(events)
+        self.input_interpreter.get_userinput(events)
@@ -4,15 +4,19 @@ Contains various types that will be used throughout the game.
 
 import pygame as pg
 import random
+import io
+import math
 
-from typing import Self, Any, Literal, Callable, Generator, NamedTuple
-from collections import defaultdict
+from types import CodeType
+from typing import Self, Any, Literal, Callable, Generator, Iterator, NamedTuple, Mapping
+from contextlib import contextmanager
 
+from src import time_units
 
 
 
-type TapKeys = defaultdict[int | str, bool]
-type HoldKeys = defaultdict[int, int]
+type TapKeys = dict[int | str, bool]
+type HoldKeys = dict[int | str, float]
 
 type InputType = Literal["controller", "keyboard_mouse"]
 type BindData = dict[Literal["input_device", "key", "type", "value", "icon"] | str, InputType | str]
@@ -38,11 +42,27 @@ class GameSound:
     def get_variations(self) -> int:
         return len(self.__sounds)    
     
-    def play(self, volume=1.0, loops=0) -> pg.Channel:
+    def get_length(self) -> float:
+        "Returns the length of the longest variation in seconds."
+        return max((sound.get_length() for sound in self.__sounds), default=0.0)
+    
+    def get_memory_size(self) -> int:
+        "Returns the number of bytes used by the decoded samples of all variations."
+        if pg.mixer.get_init() is None:
+            return 0
+
+        frequency, size, channels = pg.mixer.get_init()
+        sample_bytes = abs(size)//8*channels
+        return sum(round(sound.get_length()*frequency)*sample_bytes for sound in self.__sounds)
+    
+    def play(self, volume=1.0, loops=0) -> pg.Channel | None:
         if self.__sounds:
             sound = random.choice(self.__sounds)
-            sound.set_volume(volume)
-            return sound.play(loops)
+            # Volume is set on the channel as setting it on the sound changes it for every channel playing the sound
+            channel = sound.play(loops)
+            if channel is not None:
+                channel.set_volume(volume)
+            return channel
         else:
             raise ValueError(f"No sounds available to play for '{self.name}'")
         
@@ -64,14 +84,29 @@ class GameMusic:
     def get_main_loop(self) -> str:
         return self.__main_loop
 
-    def play_music(self, start=0.0, loop=True) -> None:
+    def load_files(self) -> dict[str, bytes]:
+        "Reads the music files into memory so that they can be played without reading from disk."
+        files = {}
+        for path in (self.__prelude, self.__main_loop):
+            if path is not None:
+                with open(path, "rb") as file:
+                    files[path] = file.read()
+        return files
+
+    def play_music(self, start=0.0, loop=True, files: dict[str, bytes] | None = None, fade_ms=0) -> None:
         if self.__prelude is not None and start == 0.0:
-            pg.mixer_music.load(self.__prelude)
-            pg.mixer_music.queue(self.__main_loop, loops=-1)
-            pg.mixer_music.play()
+            pg.mixer_music.load(*self.__get_source(self.__prelude, files))
+            pg.mixer_music.queue(*self.__get_source(self.__main_loop, files), loops=-1)
+            pg.mixer_music.play(fade_ms=fade_ms)
         else:
-            pg.mixer_music.load(self.__main_loop)
-            pg.mixer_music.play(-1, start)
+            pg.mixer_music.load(*self.__get_source(self.__main_loop, files))
+            pg.mixer_music.play(-1, start, fade_ms)
+
+    @staticmethod
+    def __get_source(path: str, files: dict[str, bytes] | None) -> tuple[str] | tuple[io.BytesIO, str]:
+        if files is not None and path in files:
+            return io.BytesIO(files[path]), path.rsplit(".", 1)[-1]
+        return (path,)
 
 
 
@@ -79,20 +114,38 @@ class GameMusic:
 
 
 class Timer:
-    def __init__(self, duration_ticks: int, loop=False, exec_after: Callable[[], None] | None = None):
+    """
+    Counts down a duration in base ticks. Durations are scaled to the tick rate by `update`.
+
+    If a `TimerWheel` is given the timer is counted down by the wheel instead and `update` does nothing.
+    """
+    # Ticks at some tick rates are not exact fractions of a base tick
+    __tolerance = 1e-9
+
+    def __init__(self, duration_ticks: int, loop=False, exec_after: Callable[[], None] | None = None, wheel: "TimerWheel | None" = None):
         self.__duration = duration_ticks
         self.loop = loop
         self.__exec_after = exec_after
         self.__time_left = 0.0
         self.__run = False
 
+        self.__wheel = wheel
+        # The wheel time the timer will finish at and how many times it has been scheduled on the wheel
+        self.__end_time = 0.0
+        self.__generation = 0
+
     @property
     def duration(self) -> float:
         return self.__duration
+    
+    @property
+    def wheel(self) -> "TimerWheel | None":
+        "The timer wheel counting down the timer or None if the timer is counted down by `update`."
+        return self.__wheel
 
     @property
     def countdown(self) -> float:
-        return pg.math.clamp(self.__time_left, 0, self.__duration)
+        return pg.math.clamp(self.__get_time_left(), 0, self.__duration)
     
     @property
     def time_elapsed(self) -> float:
@@ -100,6 +153,8 @@ class Timer:
     
     @property
     def complete(self) -> bool:
+        if self.__wheel is not None:
+            return not self.__run
         return self.__time_left <= 0.0
     
     @property
@@ -111,6 +166,9 @@ class Timer:
     def start(self) -> Self:
         self.__time_left = self.__duration
         self.__run = True
+        if self.__wheel is not None:
+            self.__end_time = self.__wheel.time + self.__duration
+            self.__schedule()
         return self
     
 
@@ -118,31 +176,185 @@ class Timer:
         self.start()
 
     def advance(self, ticks: float) -> None:
-        self.__time_left -= ticks
+        if self.__wheel is not None and self.__run:
+            self.__end_time -= ticks
+            self.__schedule()
+        else:
+            self.__time_left -= ticks
 
 
     def stop(self) -> None:
         self.__time_left = 0.0
         self.__run = False
+        # Entries already on the wheel are ignored once the generation changes
+        self.__generation += 1
 
     def update(self, speed_multiplier=1.0) -> None:
-        if self.__run:
-            self.__time_left -= speed_multiplier
+        if self.__run and self.__wheel is None:
+            self.__time_left -= speed_multiplier*time_units.tick_scale()
             
-            if self.__time_left <= 0.0:
-                if self.loop:
-                    self.__time_left += self.__duration
-                else:
-                    self.__time_left = 0.0
-                    self.__run = False
-                if self.__exec_after is not None:
-                    self.__exec_after()
+            if self.__time_left <= self.__tolerance:
+                self.__finish()
+    
+
+
+    def _on_wheel_tick(self, generation: int) -> None:
+        "Called by the timer wheel on the tick the timer was scheduled to finish on."
+        if generation == self.__generation and self.__run:
+            self.__finish()
+
+
+    def __finish(self) -> None:
+        if self.loop:
+            self.__time_left += self.__duration
+            if self.__wheel is not None:
+                self.__end_time += self.__duration
+                self.__schedule()
+        else:
+            self.__time_left = 0.0
+            self.__run = False
+        if self.__exec_after is not None:
+            self.__exec_after()
+
+
+    def __schedule(self) -> None:
+        self.__generation += 1
+        ticks = math.ceil(time_units.to_ticks(self.__end_time - self.__wheel.time - self.__tolerance))
+        self.__wheel.schedule(self, self.__generation, max(ticks, 1))
+
+
+    def __get_time_left(self) -> float:
+        if self.__wheel is None or not self.__run:
+            return self.__time_left
+        return self.__end_time - self.__wheel.time
     
 
     
     def __repr__(self) -> str:
         return f"<{type(self).__name__}: {self.countdown}>"
-    
+
+
+
+
+class TimerWheel:
+    """
+    Counts down every timer given to it from a single tick counter so timers don't have to be
+    updated one by one. `update` should be called once every tick.
+
+    The wheel is split into `LEVELS` levels of `SLOTS` slots. A slot in the first level holds the
+    timers finishing on one tick and a slot in each level above covers `SLOTS` times as many ticks as
+    a slot in the level below. Timers are put straight into the slot they finish in so scheduling
+    doesn't depend on how many timers there are. When the first level wraps around, the timers in the
+    next slot of the level above are moved down into the slots they finish in. Timers that finish
+    after the top level wraps around wait in an overflow list.
+
+    Objects created while the wheel is active (see `activate`) can put their timers on it with
+    `TimerWheel.get_active`.
+    """
+
+    SLOTS = 64
+    LEVELS = 4
+
+    __active: "TimerWheel | None" = None
+
+    def __init__(self):
+        self.__tick = 0
+        self.__time = 0.0
+        # Each entry is the tick the timer finishes on, the timer and the generation it was scheduled with
+        self.__levels: list[list[list[tuple[int, Timer, int]]]] = [[[] for _ in range(self.SLOTS)] for _ in range(self.LEVELS)]
+        self.__overflow: list[tuple[int, Timer, int]] = []
+
+        self.__scheduled = 0
+        self.__fired = 0
+
+
+    @property
+    def tick(self) -> int:
+        "The number of ticks the wheel has been updated for."
+        return self.__tick
+
+    @property
+    def time(self) -> float:
+        "The time passed since the wheel was created in base ticks."
+        return self.__time
+
+
+
+    @classmethod
+    def get_active(cls) -> "TimerWheel | None":
+        "Returns the wheel that is currently active or None if no wheel is active."
+        return cls.__active
+
+
+    @contextmanager
+    def activate(self) -> Iterator[Self]:
+        "Makes this the active wheel until the end of the with block."
+        prev_wheel = TimerWheel.__active
+        TimerWheel.__active = self
+        try:
+            yield self
+        finally:
+            TimerWheel.__active = prev_wheel
+
+
+
+    def schedule(self, timer: Timer, generation: int, ticks: int) -> None:
+        "Calls the timer back in `ticks` ticks. The timer ignores the call if `generation` is out of date by then."
+        self.__scheduled += 1
+        self.__insert(timer, generation, self.__tick+ticks)
+
+
+    def update(self) -> None:
+        "Moves the wheel on by a tick and finishes every timer due on it."
+        self.__tick += 1
+        self.__time += time_units.tick_scale()
+
+        # Higher levels are moved down first so their timers can end up in the slot due now
+        for level in reversed(range(1, self.LEVELS+1)):
+            if self.__tick % self.SLOTS**level == 0:
+                self.__cascade(level)
+
+        slot_entries = self.__levels[0][self.__tick % self.SLOTS]
+        self.__levels[0][self.__tick % self.SLOTS] = []
+        self.__fired = len(slot_entries)
+        self.__scheduled -= len(slot_entries)
+        for _, timer, generation in slot_entries:
+            timer._on_wheel_tick(generation)
+
+
+
+    def get_stats(self) -> tuple[int, int]:
+        "Returns the number of timers scheduled on the wheel (including stopped ones) and how many were due last tick."
+        return self.__scheduled, self.__fired
+
+
+    def debug_info(self) -> str:
+        scheduled, fired = self.get_stats()
+        return f"timer wheel: {scheduled} scheduled, {fired} due"
+
+
+
+    def __insert(self, timer: Timer, generation: int, due_tick: int) -> None:
+        ticks_left = due_tick - self.__tick
+        for level in range(self.LEVELS):
+            if ticks_left < self.SLOTS**(level+1):
+                self.__levels[level][due_tick//self.SLOTS**level % self.SLOTS].append((due_tick, timer, generation))
+                return
+
+        self.__overflow.append((due_tick, timer, generation))
+
+
+    def __cascade(self, level: int) -> None:
+        "Moves the timers in the current slot of a level into the levels below."
+        if level == self.LEVELS:
+            entries, self.__overflow = self.__overflow, []
+        else:
+            slot = self.__tick//self.SLOTS**level % self.SLOTS
+            entries, self.__levels[level][slot] = self.__levels[level][slot], []
+
+        for due_tick, timer, generation in entries:
+            self.__insert(timer, generation, due_tick)
+
 
 
 
@@ -179,7 +391,7 @@ class Stopwatch:
 
     def update(self, speed_multiplier=1.0) -> None:
         if self.__running:
-            self.__time += speed_multiplier
+            self.__time += speed_multiplier*time_units.tick_scale()
     
 
 
@@ -193,16 +405,20 @@ class Animation:
     def __init__(self, name: str, anim_data: AnimData):
         self.name = name
         self.__anim_data = anim_data
+        self.__flipbook = "frame_duration" in self.__anim_data
+        if not self.__flipbook:
+            self.__timeline = self.__convert_timeline(self.__anim_data["timeline"])
+
+        self.__setup_anim_time()
 
+
+    def __setup_anim_time(self) -> None:
         self.__anim_time: Timer | Stopwatch
-        if "frame_duration" in self.__anim_data:
+        if self.__flipbook:
             self.prev_frame = None
-            self.__flipbook = True
             self.__anim_time = Stopwatch().start()
         else:
-            self.__flipbook = False
             self.__anim_time = Timer(self.duration, self.loop)
-            self.__timeline = self.__convert_timeline(self.__anim_data["timeline"])
 
 
     @classmethod
@@ -212,6 +428,19 @@ class Animation:
             name: cls(name, anim_data)
             for name, anim_data in anim_dict["animations"].items()
         }
+
+
+    def copy(self) -> Self:
+        "Returns a new animation that shares the data of this animation but is played separately."
+        anim = type(self).__new__(type(self))
+        anim.name = self.name
+        anim.__anim_data = self.__anim_data
+        anim.__flipbook = self.__flipbook
+        if not self.__flipbook:
+            anim.__timeline = self.__timeline
+
+        anim.__setup_anim_time()
+        return anim
             
 
 
@@ -270,7 +499,7 @@ class Animation:
     def get_frame(self, texture_map: TextureMap, lerp_amount=0.0) -> pg.Surface:
         if self.__flipbook:
             return self.__get_frame_flipbook(texture_map, lerp_amount)
-        current_time = self.__anim_time.time_elapsed + self.anim_speed_multiplier*lerp_amount*(not self.complete)
+        current_time = self.__anim_time.time_elapsed + self.anim_speed_multiplier*lerp_amount*time_units.tick_scale()*(not self.complete)
         prev_time = 0.0
 
         for time in self.__timeline.keys():
@@ -287,7 +516,7 @@ class Animation:
     
 
     def __get_frame_flipbook(self, texture_map: TextureMap, lerp_amount=0.0) -> pg.Surface:
-        frame_time = (self.__anim_time.time_elapsed + self.anim_speed_multiplier*lerp_amount*(not self.complete))/self.__frame_duration
+        frame_time = (self.__anim_time.time_elapsed + self.anim_speed_multiplier*lerp_amount*time_units.tick_scale()*(not self.complete))/self.__frame_duration
 
         frames = list(texture_map.values())
 
@@ -318,6 +547,8 @@ class Animation:
 
 
 class AnimController:
+    __compiled_conditions: dict[str, CodeType] = {}
+
     def __init__(self, controller_data: ControllerData, animations: dict[str, Animation]):
         self.__controller_data = controller_data
         self.__animations = animations
@@ -360,10 +591,15 @@ class AnimController:
             return frames[0]
         
         from src.file_processing import assets
-        base_surface = assets.colorkey_surface((max(frames, key=lambda x: x.width).width, max(frames, key=lambda x: x.height).height))
-
-        for frame in frames:
-            base_surface.blit(frame, (base_surface.size-pg.Vector2(frame.size))*0.5)
+        # Frames trimmed in the texture atlas are placed back where they were in the original sprite
+        offsets = [assets.get_trim_offset(frame) for frame in frames]
+        base_surface = assets.colorkey_surface((
+            max(frame.width+abs(offset.x)*2 for frame, offset in zip(frames, offsets)),
+            max(frame.height+abs(offset.y)*2 for frame, offset in zip(frames, offsets))
+        ))
+
+        for frame, offset in zip(frames, offsets):
+            base_surface.blit(frame, (base_surface.size-pg.Vector2(frame.size))*0.5 + offset)
         
         return base_surface
 
@@ -418,7 +654,10 @@ class AnimController:
     
     def __test_condition(self, obj, condition: str) -> bool:
         try:
-            return bool(eval(condition, None, locals()))
+            # Conditions are only compiled once as every object using the controller tests the same ones
+            if condition not in self.__compiled_conditions:
+                self.__compiled_conditions[condition] = compile(condition, "<transition condition>", "eval")
+            return bool(eval(self.__compiled_conditions[condition], None, {"self": self, "obj": obj}))
         except Exception as e:
             raise type(e)(f"transition condition '{condition}' for '{type(obj).__name__}'\n\t\t{e.args[0]}")
     
@@ -427,6 +666,127 @@ class AnimController:
 
 
 
+class KeyStates[K, V](Mapping[K, V]):
+    """
+    A read-only view of the state of every key or button on an input device. Keys that haven't been
+    used give `default` instead of raising KeyError, and reading them doesn't add them to the states.
+    """
+
+    def __init__(self, states: dict[K, V], default: V):
+        self.__states = states
+        self.__default = default
+
+    def __getitem__(self, key: K) -> V:
+        return self.__states.get(key, self.__default)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__states
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self.__states)
+
+    def __len__(self) -> int:
+        return len(self.__states)
+
+    def get(self, key, default=None):
+        return self.__states.get(key, default)
+
+
+
+
+class TimedEvent(NamedTuple):
+    "An event along with the time (from `perf_counter`) it was received by the display thread."
+    time: float
+    event: pg.Event
+
+
+
+
+class ActionSnapshot(NamedTuple):
+    """
+    The state of every input action in a tick. Actions are stored as bits of a single integer
+    and analog values are stored alongside them.
+    """
+    actions: int
+    action_bits: dict[str, int]
+    left_stick: tuple[float, float] = (0.0, 0.0)
+    right_stick: tuple[float, float] = (0.0, 0.0)
+    left_trigger: float = 0.0
+    right_trigger: float = 0.0
+    # How far into the previous tick each action (as its bit) was pressed if it was pressed since then
+    sub_ticks: dict[int, float] = {}
+
+    def is_active(self, action_name: str) -> bool:
+        try:
+            return bool(self.actions & self.action_bits[action_name])
+        except KeyError:
+            raise ValueError(f"Invalid action_name '{action_name}'")
+
+    def get_sub_tick(self, action_name: str) -> float:
+        """
+        Returns the fraction of a tick between when an action was pressed and the start of the
+        current tick. Returns 0 if the action was not pressed since the previous tick.
+        """
+        try:
+            return self.sub_ticks.get(self.action_bits[action_name], 0.0)
+        except KeyError:
+            raise ValueError(f"Invalid action_name '{action_name}'")
+
+    def any_active(self, *action_names: str) -> bool:
+        "Returns True if any of the actions are active."
+        return any(self.is_active(action_name) for action_name in action_names)
+
+
+
+
+class WeightedSampler(NamedTuple):
+    """
+    Picks random choices based on their weights in constant time using the alias method. Each
+    choice gets a column that picks the choice itself with some probability or its alias otherwise.
+    """
+    choices: tuple[str, ...]
+    weights: tuple[float, ...]
+    probabilities: tuple[float, ...]
+    aliases: tuple[int, ...]
+
+    @classmethod
+    def from_weights(cls, choices: list[str], weights: list[float]) -> Self:
+        "Builds the alias table for a set of choices. Raises ValueError if the weights are invalid."
+        if len(choices) != len(weights):
+            raise ValueError("Number of choices and weights do not match")
+        if any(weight < 0 for weight in weights) or (weights and sum(weights) <= 0):
+            raise ValueError(f"Invalid weights {weights}")
+
+        count = len(weights)
+        scaled = [weight*count/sum(weights) for weight in weights]
+        probabilities = [1.0]*count
+        aliases = list(range(count))
+
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probabilities[less] = scaled[less]
+            aliases[less] = more
+            scaled[more] += scaled[less]-1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        return cls(tuple(choices), tuple(weights), tuple(probabilities), tuple(aliases))
+
+
+    def choose(self) -> str:
+        index = random.randrange(len(self.choices))
+        if random.random() < self.probabilities[index]:
+            return self.choices[index]
+        else:
+            return self.choices[self.aliases[index]]
+
+
+
+
 class LevelData(NamedTuple):
     level_name: str
     base_color: str
@@ -438,30 +798,31 @@ class LevelData(NamedTuple):
     asteroid_density: int
     asteroid_speed: tuple[float, float]
     asteroid_frequency: float
-    asteroid_spawn_weights: tuple[list[str], list[int]]
+    asteroid_spawn_weights: WeightedSampler
 
     enemy_count: int
-    enemy_spawn_weights: tuple[list[str], list[int]]
+    enemy_spawn_weights: WeightedSampler
 
     enemy_frequency: float
     powerup_frequency: float
-    powerup_spawn_weights: tuple[list[str], list[int]]
+    powerup_spawn_weights: WeightedSampler
 
     score_range: tuple[int, int]
     next_level: str
+    music: str | None
 
 
     @property
     def spawn_asteroids(self) -> bool:
-        return self.asteroid_frequency > 0 and len(self.asteroid_spawn_weights[0]) > 0
+        return self.asteroid_frequency > 0 and len(self.asteroid_spawn_weights.choices) > 0
     
     @property
     def spawn_enemies(self) -> bool:
-        return self.enemy_frequency > 0 and len(self.enemy_spawn_weights[0]) > 0
+        return self.enemy_frequency > 0 and len(self.enemy_spawn_weights.choices) > 0
     
     @property
     def spawn_powerups(self) -> bool:
-        return self.powerup_frequency > 0 and len(self.powerup_spawn_weights[0]) > 0
+        return self.powerup_frequency > 0 and len(self.powerup_spawn_weights.choices) > 0
 
 
 
@@ -472,4 +833,24 @@ class SaveData(NamedTuple):
     point_combo: float
     player_lives: int
     camera_pos: tuple[float, float]
-    entity_data: list[dict]
\ No newline at end of file
+    entity_data: list[dict]
+
+
+
+
+class ProgressSnapshot(NamedTuple):
+    "A copy of the state of a game that is turned into SaveData when it is saved."
+    level_name: str
+    score: int
+    point_combo: float
+    player_lives: int
+    camera_pos: tuple[float, float]
+    entity_snapshots: list[tuple[tuple[str, ...], tuple]]
+
+    def to_save_data(self) -> SaveData:
+        return SaveData(self.level_name,
+                        self.score,
+                        self.point_combo,
+                        self.player_lives,
+                        self.camera_pos,
+                        [dict(zip(keys, values)) for keys, values in self.entity_snapshots])
@@ -1,11 +1,13 @@
 "Contains functions that loads all assets required by the game."
 
+import sys
 import pygame as pg
 from typing import Literal, overload
 from functools import lru_cache
+from weakref import WeakKeyDictionary
 
 import debug
-from src.custom_types import GameSound, GameMusic, TextureMap, AnimData, ControllerData
+from src.custom_types import GameSound, GameMusic, TextureMap, AnimData, ControllerData, Animation
 
 from . import load_json
 
@@ -23,18 +25,43 @@ SOUNDS_DIR = "assets/sounds"
 
 COLORKEY = (255, 0, 255)
 
+# Textures with few enough colors are stored as 8-bit palette surfaces. Palette swaps of these
+# textures share the same pixel data and only differ by their palette.
+INDEXED_TEXTURES = True
+MAX_PALETTE_SIZE = 256
+
+# Texture maps packed into the texture atlas by build_atlas.py are loaded from the atlas instead
+USE_TEXTURE_ATLAS = True
+
 
 SOUND_DEFINITIONS: dict[str, dict[str, list[str] | str]] = load_json("assets/sound_definitions")
 MUSIC_DEFINITIONS: dict[str, dict[str, str]] = load_json("assets/music_definitions")
 
+try:
+    TEXTURE_ATLAS: dict[str, list[str] | dict[str, dict]] = load_json("assets/texture_atlas")
+except FileNotFoundError:
+    TEXTURE_ATLAS = {"atlases": [], "texture_maps": {}}
+
+
+# Offset from the center of the original sprite to the center of the trimmed sprite in the atlas
+__trim_offsets: WeakKeyDictionary[pg.Surface, pg.Vector2] = WeakKeyDictionary()
+
 
 
 
 @asset_cache
 def load_texture(path: str, palette_swap_name: str | None = None, file_type="png") -> pg.Surface:
     "Loads a texture from the textures folder as a pygame.Surface"
-    texture_path = f"{TEXTURES_DIR}/{path}.{file_type}"
-    texture = pg.image.load(texture_path).convert()
+    indexed_texture = None
+    if INDEXED_TEXTURES:
+        indexed_texture = load_indexed_texture(path, file_type)
+
+    if indexed_texture is not None:
+        # Every texture loaded is a view of the same pixel data with it's own palette
+        texture = indexed_texture.subsurface(indexed_texture.get_rect())
+    else:
+        texture = pg.image.load(f"{TEXTURES_DIR}/{path}.{file_type}").convert()
+
     if not debug.Cheats.ignore_colorkey:
         texture.set_colorkey(COLORKEY)
     if palette_swap_name is not None:
@@ -44,6 +71,39 @@ def load_texture(path: str, palette_swap_name: str | None = None, file_type="png
 
 
 
+@lru_cache(None)
+def load_indexed_texture(path: str, file_type="png") -> pg.Surface | None:
+    """
+    Loads a texture as an 8-bit palette surface. Returns None if the texture has too many
+    colors to fit in a palette.
+    """
+    return to_indexed_surface(pg.image.load(f"{TEXTURES_DIR}/{path}.{file_type}"))
+
+
+
+def to_indexed_surface(texture: pg.Surface) -> pg.Surface | None:
+    "Converts a surface to an 8-bit palette surface. Returns None if it has more than `MAX_PALETTE_SIZE` colors."
+
+    # Each pixel is read as a single integer so that finding unique colors doesn't create a tuple per pixel
+    pixels = memoryview(pg.image.tobytes(texture, "RGBX")).cast("I")
+    colors = set(pixels)
+
+    if len(colors) > MAX_PALETTE_SIZE:
+        return None
+
+    palette = [tuple(color.to_bytes(4, sys.byteorder)[:3]) for color in colors]
+    indexed_texture = pg.Surface(texture.size, depth=8)
+    indexed_texture.set_palette(palette)
+
+    # New surfaces are filled with the first palette index so it can be skipped
+    for color in palette[1:]:
+        mask = pg.mask.from_threshold(texture, color, (1, 1, 1, 255))
+        mask.to_surface(indexed_texture, setcolor=color, unsetcolor=None)
+
+    return indexed_texture
+
+
+
 
 
 
@@ -59,6 +119,9 @@ def colorkey_surface(size: pg.typing.Point) -> pg.Surface:
 
 @asset_cache
 def load_texture_map(path: str, palette_swap_name: str | None = None) -> TextureMap:
+    if USE_TEXTURE_ATLAS and path in TEXTURE_ATLAS["texture_maps"]:
+        return __load_atlas_texture_map(path, palette_swap_name)
+
     mapping_data = load_json(f"{TEXTURE_MAPS_DIR}/{path}.texture_map")
     main_texture = load_texture(mapping_data["texture"], palette_swap_name)
 
@@ -69,6 +132,33 @@ def load_texture_map(path: str, palette_swap_name: str | None = None) -> Texture
     return texture_map
 
 
+def __load_atlas_texture_map(path: str, palette_swap_name: str | None = None) -> TextureMap:
+    "Loads a texture map from the texture atlas. Sprites may be trimmed, use `get_trim_offset` to center them."
+    atlas_textures: dict[int, pg.Surface] = {}
+
+    texture_map = {}
+    for name, sprite_data in TEXTURE_ATLAS["texture_maps"][path]["mappings"].items():
+        atlas_index = sprite_data["atlas"]
+        if atlas_index not in atlas_textures:
+            atlas_textures[atlas_index] = load_texture(TEXTURE_ATLAS["atlases"][atlas_index], palette_swap_name)
+
+        texture = atlas_textures[atlas_index].subsurface(sprite_data["area"])
+        if any(sprite_data["offset"]):
+            __trim_offsets[texture] = pg.Vector2(sprite_data["offset"])
+        texture_map[name] = texture
+
+    return texture_map
+
+
+def get_trim_offset(texture: pg.Surface) -> pg.Vector2:
+    "Returns how far the center of a trimmed atlas sprite is from the center of the original sprite."
+    offset = __trim_offsets.get(texture)
+    if offset is None:
+        return pg.Vector2(0, 0)
+    else:
+        return offset.copy()
+
+
 
 
 
@@ -82,6 +172,9 @@ def palette_swap(texture: pg.Surface, swap_colors: dict[str, str] | str) -> pg.S
 
     if isinstance(swap_colors, str):
         swap_colors = load_json(f"assets/palette_swaps/{swap_colors}")
+
+    if texture.get_bitsize() == 8:
+        return __swap_palette_table(texture, swap_colors)
     
     masks: dict[pg.typing.ColorLike, pg.Mask] = {}
 
@@ -96,6 +189,18 @@ def palette_swap(texture: pg.Surface, swap_colors: dict[str, str] | str) -> pg.S
     return texture_copy
 
 
+def __swap_palette_table(texture: pg.Surface, swap_colors: dict[str, str]) -> pg.Surface:
+    "Palette swap for 8-bit surfaces. The output shares pixel data with the original texture."
+    swap_table = {tuple(pg.Color(old_c))[:3]: pg.Color(new_c) for old_c, new_c in swap_colors.items()}
+
+    texture_view = texture.subsurface(texture.get_rect())
+    # Colorkey is set before the palette changes so that it keeps the same palette index
+    if texture.get_colorkey() is not None:
+        texture_view.set_colorkey(texture.get_colorkey())
+    texture_view.set_palette([swap_table.get(tuple(color)[:3], color) for color in texture.get_palette()])
+    return texture_view
+
+
 
 
 
@@ -104,6 +209,15 @@ def load_anim_data(path: str) -> dict[str, AnimData]:
     return load_json(f"{ANIMATIONS_DIR}/{path}.animation")
 
 
+@asset_cache
+def load_animations(path: str) -> dict[str, Animation]:
+    """
+    Returns the animations in an animation file. These are shared so objects should use copies
+    of the animations to play them.
+    """
+    return Animation.load_from_dict(load_anim_data(path))
+
+
 @asset_cache
 def load_anim_controller_data(path: str) -> ControllerData:
     return load_json(f"{ANIM_CONTROLLERS_DIR}/{path}.anim_controller")
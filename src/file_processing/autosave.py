@@ -0,0 +1,96 @@
+"Contains the autosave service that periodically saves the player's progress."
+
+from time import perf_counter
+from typing import Callable
+
+from src.custom_types import Timer, ProgressSnapshot
+
+from . import data
+
+
+
+
+class Autosave:
+    """
+    Saves progress every `interval_ticks` base ticks. The state of the game is copied into a snapshot at the
+    end of a tick and is converted into save data and written on a save thread. If copying the
+    state takes longer than `SNAPSHOT_TIME_LIMIT` seconds the snapshot is thrown away and taken
+    again later so a tick is never held up for much longer than that.
+
+    Each time a snapshot is thrown away the next one waits twice as many ticks as the last, starting
+    from the next tick. After `MAX_SKIPS` snapshots in a row are thrown away the next one is taken
+    without a time limit so progress is still saved when the level is too big to copy in time.
+    """
+
+    SNAPSHOT_TIME_LIMIT = 0.005
+    MAX_SKIPS = 5
+
+    def __init__(self, take_snapshot: Callable[[float | None], ProgressSnapshot | None], interval_ticks: int):
+        self.__take_snapshot = take_snapshot
+        self.__save_due = False
+        # The number of snapshots thrown away in a row and the ticks left until the next one
+        self.__skips = 0
+        self.__retry_delay = 0
+        self.__timer = Timer(interval_ticks, True, self.__set_save_due)
+        if interval_ticks > 0:
+            self.__timer.start()
+
+        self.__stats = {"saves": 0, "skipped": 0}
+        self.__last_snapshot_time = 0.0
+        self.__max_snapshot_time = 0.0
+
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return self.__stats.copy()
+
+    @property
+    def last_snapshot_time(self) -> float:
+        return self.__last_snapshot_time
+
+    @property
+    def max_snapshot_time(self) -> float:
+        return self.__max_snapshot_time
+
+
+    def update(self, can_save=True) -> None:
+        "Should be called at the end of every tick. Progress is only saved if `can_save` is True."
+        self.__timer.update()
+        if self.__retry_delay > 0:
+            self.__retry_delay -= 1
+        elif self.__save_due and can_save:
+            self.save()
+
+
+    def save(self) -> bool:
+        "Takes a snapshot and saves it. Returns False if the snapshot took too long."
+        if self.__skips < self.MAX_SKIPS:
+            time_limit = self.SNAPSHOT_TIME_LIMIT
+        else:
+            time_limit = None
+
+        start_time = perf_counter()
+        snapshot = self.__take_snapshot(time_limit)
+        self.__last_snapshot_time = perf_counter()-start_time
+        self.__max_snapshot_time = max(self.__max_snapshot_time, self.__last_snapshot_time)
+
+        if snapshot is None:
+            self.__stats["skipped"] += 1
+            self.__retry_delay = 2**self.__skips - 1
+            self.__skips += 1
+            return False
+
+        data.save_progress(snapshot)
+        self.__save_due = False
+        self.__skips = 0
+        self.__stats["saves"] += 1
+        return True
+
+
+    def debug_info(self) -> str:
+        return (f"autosave: {self.__stats["saves"]} saves, {self.__stats["skipped"]} skipped, "
+                f"snapshot: {self.__last_snapshot_time*1000:.2f}ms (max {self.__max_snapshot_time*1000:.2f}ms)")
+
+
+    def __set_save_due(self) -> None:
+        self.__save_due = True
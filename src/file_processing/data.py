@@ -2,15 +2,15 @@
 
 import pygame as pg
 import os
-import pickle
+import threading
 from json import JSONDecodeError
 
 import debug
 
-from src.custom_types import LevelData, SaveData
+from src.custom_types import LevelData, SaveData, ProgressSnapshot, WeightedSampler
 from src.game_errors import SaveFileError, LevelDataError
 
-from . import load_json, save_json
+from . import load_json, save_json, save_format
 
 
 HIGHSCORE_DATA_PATH = "user_data/highscore"
@@ -19,6 +19,8 @@ SETTINGS_DATA_PATH = "user_data/settings"
 
 LEVELS_DIR = "data/levels"
 
+LEVEL_PACK_PATH = "data/level_pack"
+
 SAVE_DATA_PATH = "user_data/progress.bin"
 
 SCORE_LIMIT = 99999
@@ -31,13 +33,32 @@ DEFAULT_SETTINGS = {
     "scale_blur": False,
     "open_fullscreen": False,
 
-    "show_version_number": True
+    "show_version_number": True,
+    "autosave_interval": 30
 }
 
 
+# Levels compiled into the level pack by build_level_pack.py are loaded from the pack instead
+USE_LEVEL_PACK = True
+
+try:
+    LEVEL_PACK: dict[str, list] = load_json(LEVEL_PACK_PATH)
+except FileNotFoundError:
+    LEVEL_PACK = {"levels": [], "level_data": []}
+
+
 __demo_highscore = 0
 __settings_data: dict[str, bool|float] = {}
 
+__level_pack_index = {name: index for index, name in enumerate(LEVEL_PACK["levels"])}
+__packed_levels: dict[str, LevelData] = {}
+
+__save_lock = threading.Lock()
+__save_threads: list[threading.Thread] = []
+__save_errors: list[Exception] = []
+__save_count = 0
+__last_written_save = 0
+
 
 if not (os.path.exists("user_data") or debug.Cheats.demo_mode):
     os.makedirs("user_data")
@@ -53,19 +74,29 @@ def load_level(name: str) -> LevelData:
     Raises LevelDataError if level data is missing required properties.
     """
 
+    if USE_LEVEL_PACK and name in __level_pack_index:
+        return __load_packed_level(name)
+
     try:
         level_data = load_json(f"{LEVELS_DIR}/{name}")
     except FileNotFoundError:
         raise FileNotFoundError(f"Could not find level '{name}'")
 
-    asteroids: dict = level_data.get("spawn_asteroids", {})
-    asteroid_weights = (list(asteroids.keys()), list(asteroids.values()))
+    return parse_level_data(name, level_data)
+
 
-    enemies: dict = level_data.get("spawn_enemies", {})
-    enemy_weights = (list(enemies.keys()), list(enemies.values()))
 
+def parse_level_data(name: str, level_data: dict) -> LevelData:
+    """
+    Creates a LevelData object from the contents of a level data json file.
+
+    Raises LevelDataError if level data is missing required properties.  
+    Raises ValueError if spawn weights are invalid.
+    """
+
+    asteroids: dict = level_data.get("spawn_asteroids", {})
+    enemies: dict = level_data.get("spawn_enemies", {})
     powerups: dict = level_data.get("spawn_powerups", {})
-    powerup_weights = (list(powerups.keys()), list(powerups.values()))
 
     try:
         level_data_obj = LevelData(
@@ -79,17 +110,18 @@ def load_level(name: str) -> LevelData:
             asteroid_density=       tuple(level_data["asteroid_density"]),
             asteroid_speed=         tuple(level_data["asteroid_speed"]),
             asteroid_frequency=     level_data.get("asteroid_frequency", 0.0),
-            asteroid_spawn_weights= asteroid_weights,
+            asteroid_spawn_weights= WeightedSampler.from_weights(list(asteroids.keys()), list(asteroids.values())),
 
             enemy_frequency=        level_data.get("enemy_frequency", 0.0),
             enemy_count=            level_data.get("enemy_count", 0),
-            enemy_spawn_weights=    enemy_weights,
+            enemy_spawn_weights=    WeightedSampler.from_weights(list(enemies.keys()), list(enemies.values())),
 
             powerup_frequency=      level_data.get("powerup_frequency", 0.0),
-            powerup_spawn_weights=  powerup_weights,
+            powerup_spawn_weights=  WeightedSampler.from_weights(list(powerups.keys()), list(powerups.values())),
 
             score_range=            tuple(level_data["score_range"]),
-            next_level=             level_data["next_level"]
+            next_level=             level_data["next_level"],
+            music=                  level_data.get("music")
         )
     except KeyError as e:
         raise LevelDataError(name, e.args[0])
@@ -98,6 +130,28 @@ def load_level(name: str) -> LevelData:
 
 
 
+def __load_packed_level(name: str) -> LevelData:
+    "Creates level data from the level pack. Levels in the pack are already validated so this only converts types."
+
+    if name not in __packed_levels:
+        packed_data = LEVEL_PACK["level_data"][__level_pack_index[name]]
+        level_data = dict(packed_data, level_name=name)
+
+        for field in ("asteroid_density", "asteroid_speed", "score_range"):
+            level_data[field] = tuple(packed_data[field])
+
+        for field in ("asteroid_spawn_weights", "enemy_spawn_weights", "powerup_spawn_weights"):
+            level_data[field] = WeightedSampler(*map(tuple, packed_data[field]))
+
+        if packed_data["next_level"] is not None:
+            level_data["next_level"] = LEVEL_PACK["levels"][packed_data["next_level"]]
+
+        __packed_levels[name] = LevelData(**level_data)
+
+    return __packed_levels[name]
+
+
+
 
 
 
@@ -140,34 +194,84 @@ def load_progress(path=SAVE_DATA_PATH) -> SaveData | None:
 
     try:
         with open(path, "rb") as fp:
-            try:
-                save_data = pickle.load(fp)
-            except EOFError:
-                return None
-            except Exception:
-                raise SaveFileError("Save file got corrupted")
-    
+            raw = fp.read()
     except FileNotFoundError:
         return None
 
-    
-    if isinstance(save_data, SaveData):
-        return save_data
-    else:
-        raise SaveFileError("Save file is of incorrect type")
+    if not raw:
+        return None
+
+    return save_format.decode_progress(raw)
     
 
 
-def save_progress(save_data: SaveData) -> None:
-    "Saved the player's current progress to be resumed later."
+def save_progress(save_data: SaveData | ProgressSnapshot, path=SAVE_DATA_PATH) -> None:
+    """
+    Saved the player's current progress to be resumed later. The save file is written on a
+    separate thread, call `wait_for_saves` to make sure it has been written. Snapshots are
+    converted to save data on the save thread.
+    """
 
-    if not isinstance(save_data, SaveData):
+    if not isinstance(save_data, (SaveData, ProgressSnapshot)):
         raise SaveFileError("Data must be of type SaveData to store progress")
 
     # Does not save progress in demo mode
     if not debug.Cheats.demo_mode:
-        with open(SAVE_DATA_PATH, "wb") as fp:
-            pickle.dump(save_data, fp)
+        global __save_count
+        __save_count += 1
+
+        thread = threading.Thread(name="save_progress", target=__write_progress, args=(save_data, path, __save_count))
+        # Threads that have finished don't need to be waited for
+        __save_threads[:] = [save_thread for save_thread in __save_threads if save_thread.is_alive()]
+        __save_threads.append(thread)
+        thread.start()
+
+
+
+def __write_progress(save_data: SaveData | ProgressSnapshot, path: str, save_number: int) -> None:
+    """
+    Writes save data to a temporary file that replaces the save file once it has been written
+    so that the save file is never left half written.
+    """
+    global __last_written_save
+    try:
+        if isinstance(save_data, ProgressSnapshot):
+            save_data = save_data.to_save_data()
+        raw = save_format.encode_progress(save_data)
+
+        with __save_lock:
+            # A newer save has already been written
+            if save_number < __last_written_save:
+                return
+
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as fp:
+                fp.write(raw)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(temp_path, path)
+            __last_written_save = save_number
+
+    except Exception as e:
+        __save_errors.append(e)
+
+
+
+def wait_for_saves() -> None:
+    "Waits for all save files to be written. Raises SaveFileError if any of them could not be written."
+
+    __join_save_threads()
+    
+    if __save_errors:
+        errors = __save_errors.copy()
+        __save_errors.clear()
+        raise SaveFileError("Could not write save file") from errors[0]
+
+
+
+def __join_save_threads() -> None:
+    while __save_threads:
+        __save_threads.pop(0).join()
 
 
 
@@ -176,6 +280,8 @@ def delete_progress(path=SAVE_DATA_PATH) -> None:
 
     # Does not delete progress in demo mode.
     if not debug.Cheats.demo_mode:
+        # Saves that are still being written would bring the progress back
+        __join_save_threads()
         with open(path, "wb") as _: pass
 
 
@@ -0,0 +1,224 @@
+"""
+Contains the binary format used to store the player's progress.
+
+A save file starts with a magic number and format version followed by the fields of `SaveData`.
+Entity data is stored in tables, one for each `progress_save_key` (and set of keys in the
+entity's data). Each table stores its fields as columns of struct-packed values so that a whole
+column is packed or unpacked in one call. Fields are described in the file itself so a save
+file can be read even if entities gain or lose fields between versions.
+"""
+
+import json
+import pickle
+import struct
+from io import BytesIO
+from itertools import chain
+from typing import Any, Callable
+
+from src.custom_types import SaveData
+from src.game_errors import SaveFileError
+
+
+MAGIC = b"SRSAVE"
+FORMAT_VERSION = 1
+
+# Migrations upgrade progress data (as a dict of SaveData fields) from the version of the key
+# to the next version. Add a migration here whenever FORMAT_VERSION is increased.
+MIGRATIONS: dict[int, Callable[[dict[str, Any]], dict[str, Any]]] = {}
+
+__HEADER = struct.Struct("<qdq2dI")
+__INT_RANGE = (-2**63, 2**63)
+
+
+
+
+def encode_progress(save_data: SaveData) -> bytes:
+    "Converts save data into bytes that can be written to a save file."
+
+    tables: dict[tuple[str, tuple[str, ...]], list[tuple[int, dict]]] = {}
+    for index, entity_data in enumerate(save_data.entity_data):
+        table_key = (entity_data["save_key"], tuple(entity_data))
+        tables.setdefault(table_key, []).append((index, entity_data))
+
+    buffer = BytesIO()
+    buffer.write(MAGIC)
+    buffer.write(struct.pack("<H", FORMAT_VERSION))
+    __write_str(buffer, save_data.level_name)
+    buffer.write(__HEADER.pack(int(save_data.score), save_data.point_combo, save_data.player_lives,
+                               *save_data.camera_pos, len(tables)))
+
+    for (save_key, fields), rows in tables.items():
+        __write_str(buffer, save_key)
+        fields = [field for field in fields if field != "save_key"]
+        buffer.write(struct.pack("<IH", len(rows), len(fields)))
+        __write_column(buffer, "I", [index for index, _ in rows])
+
+        for field in fields:
+            column = [entity_data[field] for _, entity_data in rows]
+            type_code = __get_type_code(column)
+            __write_str(buffer, field)
+            buffer.write(type_code.encode())
+            __write_column(buffer, type_code, column)
+
+    return buffer.getvalue()
+
+
+
+def decode_progress(raw: bytes) -> SaveData:
+    "Reads save data from the bytes of a save file. Raises SaveFileError if the data is invalid."
+
+    if not raw.startswith(MAGIC):
+        return __decode_legacy_progress(raw)
+
+    try:
+        buffer = BytesIO(raw)
+        buffer.seek(len(MAGIC))
+        version = __read_struct(buffer, "<H")[0]
+        if version > FORMAT_VERSION:
+            raise SaveFileError(f"Save file version {version} is newer than supported version {FORMAT_VERSION}")
+
+        level_name = __read_str(buffer)
+        score, point_combo, player_lives, camera_x, camera_y, table_count = __read_struct(buffer, __HEADER.format)
+
+        entities: list[tuple[int, dict]] = []
+        for _ in range(table_count):
+            save_key = __read_str(buffer)
+            row_count, field_count = __read_struct(buffer, "<IH")
+            indexes = __read_column(buffer, "I", row_count)
+
+            fields = ["save_key"]
+            columns = [[save_key]*row_count]
+            for _ in range(field_count):
+                fields.append(__read_str(buffer))
+                type_code = buffer.read(1).decode()
+                columns.append(__read_column(buffer, type_code, row_count))
+
+            entities.extend(zip(indexes, (dict(zip(fields, values)) for values in zip(*columns))))
+
+    except (struct.error, UnicodeDecodeError, json.JSONDecodeError, ValueError) as e:
+        raise SaveFileError("Save file got corrupted") from e
+
+    entities.sort(key=lambda x: x[0])
+    progress = {"level_name": level_name,
+                "score": score,
+                "point_combo": point_combo,
+                "player_lives": player_lives,
+                "camera_pos": (camera_x, camera_y),
+                "entity_data": [entity_data for _, entity_data in entities]}
+
+    return SaveData(**__migrate(progress, version))
+
+
+
+def __decode_legacy_progress(raw: bytes) -> SaveData:
+    "Reads progress saved with pickle before the binary format was used (version 0)."
+
+    try:
+        save_data = __SaveDataUnpickler(BytesIO(raw)).load()
+    except Exception as e:
+        raise SaveFileError("Save file got corrupted") from e
+
+    if not isinstance(save_data, SaveData):
+        raise SaveFileError("Save file is of incorrect type")
+
+    return SaveData(**__migrate(save_data._asdict(), 0))
+
+
+
+class __SaveDataUnpickler(pickle.Unpickler):
+    "Only allows SaveData to be unpickled so that old save files can't run arbitrary code."
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) == ("src.custom_types", "SaveData"):
+            return SaveData
+        raise pickle.UnpicklingError(f"'{module}.{name}' is not allowed in save files")
+
+
+
+def __migrate(progress: dict[str, Any], version: int) -> dict[str, Any]:
+    while version < FORMAT_VERSION:
+        if version in MIGRATIONS:
+            progress = MIGRATIONS[version](progress)
+        version += 1
+    return progress
+
+
+
+
+def __get_type_code(column: list) -> str:
+    """
+    Returns the type used to store a column.
+
+    q: integers, d: floats, v: pairs of floats (positions and velocities), ?: bools, s: strings,
+    j: anything else stored as json
+    """
+
+    types = set(map(type, column))
+    if types == {bool}:
+        return "?"
+    if types == {int} and __INT_RANGE[0] <= min(column) and max(column) < __INT_RANGE[1]:
+        return "q"
+    if types <= {int, float}:
+        return "d"
+    if types == {str}:
+        return "s"
+    if types <= {tuple, list} and set(map(len, column)) == {2} and set(map(type, chain.from_iterable(column))) <= {int, float}:
+        return "v"
+    return "j"
+
+
+
+def __write_column(buffer: BytesIO, type_code: str, column: list) -> None:
+    match type_code:
+        case "?" | "q" | "d" | "I":
+            buffer.write(struct.pack(f"<{len(column)}{type_code}", *column))
+        case "v":
+            buffer.write(struct.pack(f"<{len(column)*2}d", *chain.from_iterable(column)))
+        case "s" | "j":
+            if type_code == "j":
+                column = [json.dumps(value) for value in column]
+            # Each unique string is only stored once
+            unique_values = {value: index for index, value in enumerate(dict.fromkeys(column))}
+            encoded = [value.encode() for value in unique_values]
+            buffer.write(struct.pack(f"<I{len(encoded)}I", len(encoded), *map(len, encoded)))
+            buffer.write(b"".join(encoded))
+            buffer.write(struct.pack(f"<{len(column)}I", *map(unique_values.__getitem__, column)))
+
+
+
+def __read_column(buffer: BytesIO, type_code: str, length: int) -> list:
+    match type_code:
+        case "?" | "q" | "d" | "I":
+            return list(__read_struct(buffer, f"<{length}{type_code}"))
+        case "v":
+            values = __read_struct(buffer, f"<{length*2}d")
+            return list(zip(values[0::2], values[1::2]))
+        case "s" | "j":
+            unique_count = __read_struct(buffer, "<I")[0]
+            unique_values = [buffer.read(size).decode() for size in __read_struct(buffer, f"<{unique_count}I")]
+            if type_code == "j":
+                unique_values = [json.loads(value) for value in unique_values]
+                # Each entity gets its own copy of mutable values like lists
+                return [json.loads(json.dumps(unique_values[index])) for index in __read_struct(buffer, f"<{length}I")]
+            return [unique_values[index] for index in __read_struct(buffer, f"<{length}I")]
+        case _:
+            raise ValueError(f"Invalid column type '{type_code}'")
+
+
+
+def __read_struct(buffer: BytesIO, format: str) -> tuple:
+    size = struct.calcsize(format)
+    raw = buffer.read(size)
+    if len(raw) != size:
+        raise struct.error("Unexpected end of save file")
+    return struct.unpack(format, raw)
+
+
+def __write_str(buffer: BytesIO, value: str) -> None:
+    encoded = value.encode()
+    buffer.write(struct.pack("<H", len(encoded)))
+    buffer.write(encoded)
+
+
+def __read_str(buffer: BytesIO) -> str:
+    size = __read_struct(buffer, "<H")[0]
+    return buffer.read(size).decode()
@@ -3,6 +3,7 @@
 import pygame as pg
 from pygame.locals import *
 import threading
+from collections import deque
 
 import traceback
 from time import perf_counter
@@ -11,11 +12,15 @@ from config import *
 import debug
 
 from src.input_device import stop_controller_rumble, KeyboardMouse, Controller, InputInterpreter
+from src.custom_types import TimedEvent
 
 from src.ui import blit_to_center, font
 from src.states import StateStack, init_state
 from src.file_processing import assets, data
-from src.audio.soundfx import SoundFXManager
+from src.audio.soundfx import VoiceManager
+from src.audio.dispatch import AudioDispatcher
+from src.audio.soundbank import SoundBank
+from src.audio.music import MusicManager
 from src.misc import set_console_style, bar_of_dashes
 
 
@@ -25,8 +30,13 @@ class GameEngine:
     The engine uses two game loop that run on two threads. The main thread runs with the framerate of the game and
     handles window management, rendering and event handling. The second thread runs with the game's tickrate of 20
     TPS and handles user-input processing and game logic. 
+
+    Events are collected by the main thread every frame along with the time they were received so
+    the game logic can apply them as if they happened part way through a tick.
     """
 
+    INPUT_LATENCY_SAMPLES = 50
+
     def __init__(self) -> None:
         try:
             pg.mixer.pre_init(channels=128, buffer=1024)
@@ -66,7 +76,9 @@ class GameEngine:
         self.__prev_window_size: tuple[int, int] | None = None
 
         self.input_interpreter = InputInterpreter(KeyboardMouse(), None)
-        self.__event_queue: list[pg.Event] = []
+        # Appending and popping from a deque is thread safe
+        self.__event_queue: deque[TimedEvent] = deque()
+        self.__input_latencies: deque[float] = deque(maxlen=self.INPUT_LATENCY_SAMPLES)
 
         self.game_process_thread = threading.Thread(name="game_process", target=self.game_process_loop)
         self.__process_lock = threading.Lock()
@@ -119,6 +131,7 @@ class GameEngine:
         self.run = True
         data.load_settings()
         self.__fullscreen = data.get_setting("open_fullscreen")
+        SoundBank.preload_async()
 
         # Setup Game Window
         self.window = pg.Window(WINDOW_CAPTION, WINDOW_START_SIZE, resizable=True, fullscreen_desktop=self.__fullscreen)
@@ -131,6 +144,8 @@ class GameEngine:
         self.debug_font = pg.font.SysFont("consolas", 13)
         init_state.Initializer(self.state_stack)
 
+        # Starts thread that plays sounds sent from the game logic thread
+        AudioDispatcher.start()
         # Starts game loop that processes game logic
         self.game_process_thread.start()
 
@@ -186,25 +201,29 @@ class GameEngine:
         if self.__do_fullscreen_toggle:
             self.toggle_fullscreen()
             self.__do_fullscreen_toggle = False
-        self.__event_queue.extend(pg.event.get())
+
+        events = pg.event.get()
+        receive_time = perf_counter()
+        self.__event_queue.extend(TimedEvent(receive_time, event) for event in events)
+        self.input_interpreter.predict_actions(events)
 
 
     def get_userinput(self) -> None:
         "Record the user inputs for a game tick."
 
-        current_events = self.__event_queue.copy()
-        
-        for event in current_events:
-            if event.type == QUIT:
+        current_events: list[TimedEvent] = []
+        while self.__event_queue:
+            timed_event = self.__event_queue.popleft()
+            current_events.append(timed_event)
+
+            if timed_event.event.type == QUIT:
                 self.run = False
                 break
 
-            elif event.type == JOYDEVICEADDED or event.type == JOYDEVICEREMOVED:
+            elif timed_event.event.type == JOYDEVICEADDED or timed_event.event.type == JOYDEVICEREMOVED:
                 self.find_controllers()
-            
-            self.__event_queue.remove(event)
 
-        self.input_interpreter.get_userinput(current_events)
+        self.input_interpreter.get_timed_userinput(current_events, perf_counter(), self.tick_rate)
 
 
     def userinput(self) -> None:
@@ -233,7 +252,19 @@ class GameEngine:
         if self.input_interpreter.controller is not None:
             self.input_interpreter.controller.update()
 
-        SoundFXManager.play_sound_queue(self.state_stack.clear_sound_queue())
+        AudioDispatcher.play_sound_queue(self.state_stack.clear_sound_queue())
+
+        # Input has taken effect once the tick that processed it has been updated
+        update_time = perf_counter()
+        self.__input_latencies.extend(update_time-press_time for press_time in self.input_interpreter.press_times)
+
+
+    def get_input_latency(self) -> tuple[float, float]:
+        "Returns the average and maximum time in seconds between recent key presses and the ticks that applied them."
+        latencies = tuple(self.__input_latencies)
+        if not latencies:
+            return 0.0, 0.0
+        return sum(latencies)/len(latencies), max(latencies)
 
 
 
@@ -269,7 +300,10 @@ class GameEngine:
 
 
     def __show_debug_text(self) -> None:
+        average_latency, max_latency = self.get_input_latency()
         blit_text = f"FPS: {self.frame_clock.get_fps():.0f}, TPS: {self.tick_clock.get_fps():.0f}, state: {self.state_stack.top_state}"
+        blit_text += f"\ninput latency: {average_latency*1000:.1f}ms avg, {max_latency*1000:.1f}ms max"
+        blit_text += f"\n{SoundBank.debug_info()}, {VoiceManager.debug_info()}\n{AudioDispatcher.debug_info()}\n{MusicManager.debug_info()}"
         debug_message = self.state_stack.debug_info()
         if debug_message:
             blit_text += f"\n{debug_message}"
@@ -332,12 +366,15 @@ class GameEngine:
 
         self.run = False
         self.game_process_thread.join()
+        AudioDispatcher.stop_looping_sounds()
+        AudioDispatcher.stop()
         stop_controller_rumble()
         if self.error and debug.PAUSE_ON_CRASH:
             input("Save and Exit ->")
         try:
             self.state_stack.quit()
             data.save_settings()
+            data.wait_for_saves()
         
         except:
             traceback.print_exc()
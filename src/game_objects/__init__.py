@@ -1,7 +1,8 @@
 "Game objects represent objects that exist within the game world plus the Camera."
 
 import pygame as pg
-from typing import Iterable, Iterator
+import math
+from typing import Callable, Iterable, Iterator, Self
 
 from src.math_functions import format_angle
 from src.states import State, StateStack
@@ -21,9 +22,13 @@ class GameObject(HasSoundQueue, pg.sprite.Sprite):
     Game objects represent objects that exist within the game world
     """
     progress_save_key: str | None = None
+    snapshot_keys: tuple[str, ...] = ("id", "save_key", "position")
     distance_based_sound=True
     ignore_camera_rotation=False
     can_despawn=True
+    simulation_lod=False
+    # Groups keep track of the objects with a role so they can be found without searching
+    role: str | None = None
 
     __object_type_list: dict[str, type["GameObject"]] = {}
 
@@ -70,6 +75,40 @@ class GameObject(HasSoundQueue, pg.sprite.Sprite):
         obj.__init_from_data__(object_data)
         return obj
 
+
+    @classmethod
+    def init_all_from_data(cls, entity_data: list[dict]) -> list["GameObject"]:
+        """
+        Called on GameObject class to create objects from a list of save data. Objects with the same
+        save key are created together so the type of object is only looked up once. Objects are returned
+        in the same order as their data.
+        """
+
+        indexes_by_key: dict[str, list[int]] = {}
+        for index, object_data in enumerate(entity_data):
+            indexes_by_key.setdefault(object_data["save_key"], []).append(index)
+
+        objects: list[GameObject] = [None]*len(entity_data)
+        for save_key, indexes in indexes_by_key.items():
+            obj_cls = GameObject.__object_type_list[save_key]
+            batch = obj_cls._init_batch_from_data([entity_data[index] for index in indexes])
+            for index, obj in zip(indexes, batch):
+                objects[index] = obj
+
+        return objects
+
+
+    @classmethod
+    def _init_batch_from_data(cls, batch_data: list[dict]) -> list[Self]:
+        "Creates objects of this type from save data. Can be overridden to share work between objects of the same type."
+        objects = []
+        for object_data in batch_data:
+            obj = cls.__new__(cls)
+            obj.__init_from_data__(object_data)
+            objects.append(obj)
+
+        return objects
+
         
 
 
@@ -94,13 +133,19 @@ class GameObject(HasSoundQueue, pg.sprite.Sprite):
         Returns information about game object as a dictionary that can be stored in save file. This data is
         passed into the init_from_data method to recreate the object when loading game from a save file.
         """
+        return dict(zip(self.snapshot_keys, self.get_snapshot()))
+    
+
+    def get_snapshot(self) -> tuple:
+        """
+        Returns the values of the game object's data as a tuple in the order of `snapshot_keys`. This is
+        cheaper than get_data so it can be used to copy the state of the game within a tick.
+        """
 
         if type(self).progress_save_key is None:
             raise NotImplementedError(f"{type(self).__name__} should not be saved in save data.")
         
-        return {"id": id(self),
-                "save_key": type(self).progress_save_key,
-                "position": tuple(self.position)}
+        return (id(self), type(self).progress_save_key, tuple(self.position))
         
 
     def add_to_groups(self, _object: "GameObject") -> None:
@@ -152,11 +197,17 @@ class GameObject(HasSoundQueue, pg.sprite.Sprite):
         ...
 
 
+    def can_defer_update(self) -> bool:
+        "Returns True if the object is only cosmetic so its update can be put off to a later tick when a tick runs long."
+        return False
 
-    def process_collision(self) -> None:
+
+    def catch_up(self, ticks: int) -> None:
+        "Advances the object by a number of ticks it wasn't updated for. Called before the object's next update."
         ...
 
 
+
     def draw(self, surface: pg.Surface, lerp_amount=0.0, offset: pg.typing.Point = (0, 0), rotation=0) -> None:
         "Draws to the sprite onto a surface. The sprite must have a texture. "
         ...
@@ -190,6 +241,13 @@ class ObjectGroup[T=GameObject](HasSoundQueue, pg.sprite.AbstractGroup):
         self.__full_volume_radius = full_volume_radius
         self.__host_state = host_state
         self.__subgroups: set[ObjectSubgroup] = set()
+        self.__projectile_manager = None
+        self.__collision_solver = None
+        self.__simulation_lod = None
+        self.__update_scheduler = None
+        self.__spatial_index = None
+        self.__flow_field = None
+        self.__roles: dict[str, dict[GameObject, None]] = {}
 
 
     @property
@@ -204,11 +262,134 @@ class ObjectGroup[T=GameObject](HasSoundQueue, pg.sprite.AbstractGroup):
             return self.__host_state.state_stack
 
 
+    @property
+    def projectile_manager(self):
+        "Updates the projectiles in the group after every other object has moved."
+        from .projectiles import ProjectileManager
+        if self.__projectile_manager is None:
+            self.__projectile_manager = ProjectileManager(self)
+        return self.__projectile_manager
+
+
+    @property
+    def collision_solver(self):
+        "Resolves collisions between objects after every object has moved."
+        from .collisions import CollisionSolver
+        if self.__collision_solver is None:
+            self.__collision_solver = CollisionSolver(self)
+        return self.__collision_solver
+
+
+    @property
+    def simulation_lod(self):
+        "Decides how often objects far from the sound focus (usually the camera) are updated."
+        from .level_of_detail import SimulationLOD
+        if self.__simulation_lod is None:
+            self.__simulation_lod = SimulationLOD()
+        return self.__simulation_lod
+
+
+    @property
+    def update_scheduler(self):
+        "Puts off updating cosmetic objects when a tick runs long."
+        from .scheduling import UpdateScheduler
+        if self.__update_scheduler is None:
+            self.__update_scheduler = UpdateScheduler()
+        return self.__update_scheduler
+
+
+    @property
+    def spatial_index(self):
+        "Finds the objects in the group nearest to a position."
+        from .spatial_index import SpatialIndex
+        if self.__spatial_index is None:
+            self.__spatial_index = SpatialIndex(self)
+        return self.__spatial_index
+
+
+    @property
+    def flow_field(self):
+        "Leads enemies to the player around asteroids."
+        from .navigation import FlowField
+        if self.__flow_field is None:
+            self.__flow_field = FlowField(self)
+        return self.__flow_field
+
+
+    def get_role(self, role: str) -> GameObject | None:
+        "Returns the object in the group with a role or None if there isn't one. Roles are set with the `role` class attribute."
+        if objects := self.__roles.get(role):
+            return next(iter(objects))
+        else:
+            return None
+
+
+    def nearest[GET_TYPE](self,
+                          position: pg.typing.Point,
+                          object_type: type[GET_TYPE] = GameObject,
+                          max_distance=math.inf,
+                          condition: Callable[[GET_TYPE], bool] | None = None) -> GET_TYPE | None:
+        "Returns the object of `object_type` nearest to `position` that `condition` returns True for, or None if there isn't one within `max_distance`."
+        return self.spatial_index.nearest(position, object_type, max_distance, condition)
+
+
+    def k_nearest[GET_TYPE](self,
+                            position: pg.typing.Point,
+                            k: int,
+                            object_type: type[GET_TYPE] = GameObject,
+                            max_distance=math.inf,
+                            condition: Callable[[GET_TYPE], bool] | None = None) -> list[GET_TYPE]:
+        "Returns up to `k` objects of `object_type` within `max_distance` of `position` that `condition` returns True for, nearest first."
+        return self.spatial_index.k_nearest(position, k, object_type, max_distance, condition)
+
+
+
     def update(self, sound_focus: pg.typing.Point, ignore_types: Iterable[type[GameObject]] = ()) -> None:
+        """
+        Moves every object, then resolves collisions between objects and then updates projectiles.
+        Cosmetic objects are updated last with whatever time is left in the tick.
+        """
+        from .components import ObjectCollision
+        from .projectiles import Projectile
+        updated: list[GameObject] = []
+        projectiles: list[Projectile] = []
+        deferrable: list[GameObject] = []
+        colliders: list[ObjectCollision] = []
+        self.__invalidate_spatial_index()
+        if self.__flow_field is not None:
+            self.__flow_field.start_tick()
+        simulation_lod = self.simulation_lod
+        simulation_lod.start_tick(sound_focus)
+        self.update_scheduler.start_tick()
         for obj in self.sprites():
-            if obj.primary_group is not None and not isinstance(obj, ignore_types):
-                obj.update()
-                self.__process_entity_sound(obj, sound_focus, obj.clear_sound_queue())
+            if obj.primary_group is None:
+                continue
+            # Objects that aren't updated this tick can still be collided with
+            if isinstance(obj, ObjectCollision) and not isinstance(obj, Projectile):
+                colliders.append(obj)
+            if not isinstance(obj, ignore_types):
+                if isinstance(obj, Projectile):
+                    projectiles.append(obj)
+                elif obj.can_defer_update():
+                    deferrable.append(obj)
+                elif simulation_lod.should_update(obj):
+                    obj.update()
+                    updated.append(obj)
+
+        self.collision_solver.update(colliders)
+        if projectiles:
+            self.projectile_manager.update(projectiles)
+        updated += self.update_scheduler.update(deferrable)
+
+        for obj in updated + projectiles:
+            self.__process_entity_sound(obj, sound_focus, obj.clear_sound_queue())
+
+
+    def __invalidate_spatial_index(self) -> None:
+        if self.__spatial_index is not None:
+            self.__spatial_index.invalidate()
+        for subgroup in self.__subgroups:
+            subgroup.__invalidate_spatial_index()
 
 
     def __process_entity_sound(self, _object: T, sound_focus: pg.typing.Point, queue: SoundQueue) -> None:
@@ -297,6 +478,22 @@ class ObjectGroup[T=GameObject](HasSoundQueue, pg.sprite.AbstractGroup):
             obj.force_kill()
 
 
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        if sprite.role is not None:
+            self.__roles.setdefault(sprite.role, {})[sprite] = None
+        if self.__projectile_manager is not None:
+            self.__projectile_manager.add_object(sprite)
+        if self.__spatial_index is not None:
+            self.__spatial_index.add_object(sprite)
+
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        if sprite.role is not None and (objects := self.__roles.get(sprite.role)):
+            objects.pop(sprite, None)
+
+
     def remove(self, *sprites):
         for subgroup in self.__subgroups:
             subgroup.remove(*sprites)
@@ -17,6 +17,8 @@ __all__ = [
 
 class Asteroid(Obstacle, ObjectAnimation):
     progress_save_key = "asteroid"
+    simulation_lod = True
+    snapshot_keys = Obstacle.snapshot_keys + ("velocity", "asteroid_id", "rotation", "angular_vel", "health")
 
     __asteroid_data = load_json("data/asteroids")
     __asset_key = "asteroid"
@@ -96,14 +98,8 @@ class Asteroid(Obstacle, ObjectAnimation):
 
 
 
-    def get_data(self):
-        data = super().get_data()
-        data.update({"velocity": tuple(self._velocity),
-                     "asteroid_id": self.__id,
-                     "rotation": self._rotation,
-                     "angular_vel": self._angular_vel,
-                     "health": self.health})
-        return data
+    def get_snapshot(self):
+        return super().get_snapshot() + (tuple(self._velocity), self.__id, self._rotation, self._angular_vel, self.health)
 
     
     def update(self):
@@ -115,6 +111,11 @@ class Asteroid(Obstacle, ObjectAnimation):
                 self.force_kill()
 
 
+    def can_defer_update(self):
+        # Once destroyed the asteroid is only playing its death animation
+        return not self.has_health()
+
+
 
     def damage(self, amount: int, knockback: pg.Vector2 | None = None) -> None:
         if knockback:
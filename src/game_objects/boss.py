@@ -16,6 +16,8 @@ from .projectiles import EnemyBullet
 class BossShip(Obstacle, ObjectTexture):
     ignore_camera_rotation=True
     can_despawn=False
+    precise_hitbox=True
+    role="boss"
 
     _max_speed = 500
 
@@ -30,6 +32,7 @@ class BossShip(Obstacle, ObjectTexture):
             hitbox_size=(230, 230)
         )
     
+        # Counted down in update so they don't run down while the boss isn't being updated
         self.__timer = Timer(1)
         self.__shoot_start_timer = Timer(30, True, self.shoot)#.start()
 
@@ -56,4 +59,5 @@ class BossShip(Obstacle, ObjectTexture):
             displacement = collided_with.position-self.position
             collided_with.accelerate(displacement*0.1)
             collided_with.kill()
+            self.__timer.stop()
             self.__timer = Timer(4, exec_after=lambda: collided_with.accelerate(displacement*-0.06)).start()
\ No newline at end of file
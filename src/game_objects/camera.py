@@ -2,6 +2,7 @@ import pygame as pg
 
 import debug
 from src.math_functions import unit_vector, format_angle, sign
+from src import time_units
 from src.file_processing import assets
 
 from . import ObjectGroup
@@ -67,7 +68,7 @@ class Camera:
                 self.__following = True
 
         
-        self.__position += self.__velocity
+        self.__position += time_units.per_tick(self.__velocity)
 
     
 
@@ -104,7 +105,7 @@ class Camera:
 
     def lerp_position(self, lerp_amount: float) -> pg.Vector2:
         "Position of camera after taking interpolation into account."
-        return self.position + self.__velocity*lerp_amount
+        return self.position + time_units.per_tick(self.__velocity)*lerp_amount
 
 
     def clear_velocity(self) -> None:
@@ -128,14 +129,14 @@ class RotoZoomCamera(Camera):
         self.__zoom = 1.0
 
 
-    def get_rotation(self) -> int:
+    def get_rotation(self) -> float:
         return self.__rotation
     
     def get_lerp_rotation(self, lerp_amount: float) -> float:
-        return format_angle(self.__rotation-self.__angular_vel*(1-lerp_amount))
+        return format_angle(self.__rotation-time_units.per_tick(self.__angular_vel)*(1-lerp_amount))
     
-    def set_rotation(self, value: int) -> None:
-        self.__rotation = format_angle(int(value))
+    def set_rotation(self, value: float) -> None:
+        self.__rotation = format_angle(value)
 
     def set_target_rotation(self, rotation: int) -> None:
         self.__target_rotation = format_angle(int(rotation))
@@ -167,9 +168,11 @@ class RotoZoomCamera(Camera):
             amount = 360 - amount
             direction *= -1
 
-        target_vel = direction*pg.math.clamp(int(amount*0.1), 1, self.__angular_vel*direction+1)
-        self.set_angular_vel(target_vel)
-        self.rotate(self.__angular_vel)
+        # The camera speeds up by the rotation acceleration every base tick until it reaches the speed it should turn at
+        speed = max(int(amount*0.1), 1)
+        speed = min(speed, max(self.__angular_vel*direction, 0) + time_units.per_tick(self.__rotation_acceleration))
+        self.set_angular_vel(direction*speed)
+        self.rotate(time_units.per_tick(self.__angular_vel))
 
 
 
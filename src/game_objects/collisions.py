@@ -0,0 +1,190 @@
+"Contains the collision solver that resolves collisions between objects after they have all moved."
+
+import pygame as pg
+import math
+from collections import defaultdict
+from typing import Iterable
+
+from . import ObjectGroup
+from .components import ObjectCollision
+
+
+
+
+type Contact = tuple[ObjectCollision, ObjectCollision]
+
+
+class CollisionSolver:
+    """
+    Resolves collisions between the collision objects in a group once every object has moved.
+
+    Contacts are found with a grid so only nearby objects are compared. Objects are swept along the
+    path they moved since the last update so fast objects can't pass through each other between
+    ticks. This includes movement from outside their own update, like catching up on skipped ticks. Colliding
+    objects are moved back to where they first touched and each contact bounces the velocities of both
+    objects once. Any overlaps left are pushed apart over several iterations so objects touching more
+    than one other object settle properly. `on_collide` is called for every contact afterwards in group
+    order, so the result doesn't depend on which object happened to update first.
+
+    If `continuous` is False, paths are checked at a few points along the way instead of being swept.
+    """
+
+    ITERATIONS = 4
+    CELL_SIZE = 64
+    MAX_SUB_STEPS = 8
+
+    def __init__(self, group: ObjectGroup, continuous=True):
+        self.__group = group
+        self.continuous = continuous
+        self.__contacts: list[Contact] = []
+
+        self.__object_count = 0
+        self.__pair_checks = 0
+
+
+    @property
+    def contacts(self) -> list[Contact]:
+        "The pairs of objects that collided in the last update in the order `on_collide` was called."
+        return self.__contacts.copy()
+
+
+
+    def update(self, objects: Iterable[ObjectCollision]) -> None:
+        "Finds and resolves collisions between `objects`. Should be called once every tick after they have moved."
+        all_objects = list(objects)
+        objects = [obj for obj in all_objects if obj.primary_group is self.__group and obj.do_collision()]
+        self.__object_count = len(objects)
+        self.__pair_checks = 0
+        movements = {obj: obj.get_tick_movement() for obj in objects}
+        contacts = self.__find_contacts(objects, movements)
+        self.__contacts = [(obj_1, obj_2) for obj_1, obj_2, _ in contacts]
+
+        # Objects are moved back to where they first touched something. Objects that were already
+        # overlapping at the start of the tick are left to be pushed apart instead.
+        rewound: set[ObjectCollision] = set()
+        for obj_1, obj_2, time in sorted(contacts, key=lambda contact: contact[2]):
+            for obj in (obj_1, obj_2):
+                if time and obj not in rewound:
+                    obj.position -= movements[obj]*(1-time)
+                    rewound.add(obj)
+
+        for obj_1, obj_2 in self.__contacts:
+            normal = obj_1.position-obj_2.position
+            speed = (obj_1.get_speed() + obj_2.get_speed())*0.5
+            obj_1.bounce_off(speed, normal)
+            obj_2.bounce_off(speed, -normal)
+
+        for _ in range(self.ITERATIONS):
+            if not self.__separate():
+                break
+
+        for obj_1, obj_2 in self.__contacts:
+            # An earlier callback may have killed one of the objects
+            if obj_1.do_collision() and obj_2.do_collision():
+                obj_2.on_collide(obj_1)
+                obj_1.on_collide(obj_2)
+
+        # Next tick's paths are swept from where objects were left this tick
+        for obj in all_objects:
+            obj.start_tick_movement()
+
+
+
+    def get_stats(self) -> tuple[int, int, int]:
+        "Returns the number of objects, pairs of objects compared and contacts found in the last update."
+        return self.__object_count, self.__pair_checks, len(self.__contacts)
+
+
+    def debug_info(self) -> str:
+        objects, pair_checks, contacts = self.get_stats()
+        return f"collision objects: {objects}, pair checks: {pair_checks}, contacts: {contacts}"
+
+
+
+    def __find_contacts(self, objects: list[ObjectCollision], movements: dict[ObjectCollision, pg.Vector2]) -> list[tuple[ObjectCollision, ObjectCollision, float]]:
+        "Returns each pair of colliding objects in group order with the fraction of the tick when they first touched."
+        grid: defaultdict[tuple[int, int], list[int]] = defaultdict(list)
+        for index, obj in enumerate(objects):
+            for cell in self.__get_cells(obj, movements[obj]):
+                grid[cell].append(index)
+
+        pairs: set[tuple[int, int]] = set()
+        for cell_indexes in grid.values():
+            for i, index_1 in enumerate(cell_indexes):
+                for index_2 in cell_indexes[i+1:]:
+                    pairs.add((index_1, index_2))
+
+        self.__pair_checks = len(pairs)
+        contacts = []
+        for index_1, index_2 in sorted(pairs):
+            obj_1, obj_2 = objects[index_1], objects[index_2]
+            time = self.__get_contact_time(obj_1, obj_2, movements[obj_1]-movements[obj_2])
+            if time is not None:
+                contacts.append((obj_1, obj_2, time))
+
+        return contacts
+
+
+    def __get_contact_time(self, obj_1: ObjectCollision, obj_2: ObjectCollision, movement: pg.Vector2) -> float | None:
+        "Returns the fraction of the tick when two objects first touched or None if they didn't collide."
+        end_offset = obj_1.position-obj_2.position
+        start_offset = end_offset-movement
+        min_distance = obj_1.radius+obj_2.radius
+
+        if start_offset.magnitude_squared() < min_distance**2:
+            return 0.0
+        if not movement:
+            return None
+
+        if not self.continuous:
+            steps = min(math.ceil(movement.magnitude()/min(obj_1.radius, obj_2.radius)), self.MAX_SUB_STEPS)
+            for step in range(1, steps+1):
+                if (start_offset + movement*(step/steps)).magnitude_squared() < min_distance**2:
+                    return step/steps
+            return None
+
+        # Solves |start_offset + movement*t| = min_distance for the first time t
+        a = movement.dot(movement)
+        b = 2*start_offset.dot(movement)
+        c = start_offset.dot(start_offset) - min_distance**2
+        discriminant = b*b - 4*a*c
+        if discriminant < 0:
+            return None
+
+        time = (-b - math.sqrt(discriminant))/(2*a)
+        if 0 <= time <= 1:
+            return time
+        else:
+            return None
+
+
+    def __get_cells(self, obj: ObjectCollision, movement: pg.Vector2) -> Iterable[tuple[int, int]]:
+        "Returns the cells covered by the object along the path it moved this tick."
+        end_x, end_y = obj.position
+        start_x, start_y = obj.position-movement
+        left, right = min(start_x, end_x)-obj.radius, max(start_x, end_x)+obj.radius
+        top, bottom = min(start_y, end_y)-obj.radius, max(start_y, end_y)+obj.radius
+
+        for cell_x in range(math.floor(left/self.CELL_SIZE), math.floor(right/self.CELL_SIZE)+1):
+            for cell_y in range(math.floor(top/self.CELL_SIZE), math.floor(bottom/self.CELL_SIZE)+1):
+                yield cell_x, cell_y
+
+
+    def __separate(self) -> bool:
+        "Pushes every pair of overlapping objects apart by half the overlap each. Returns False if nothing was overlapping."
+        overlapping = False
+        for obj_1, obj_2 in self.__contacts:
+            normal: pg.Vector2 = obj_1.position-obj_2.position
+            overlap = obj_1.radius+obj_2.radius - normal.magnitude()
+            if overlap <= 0:
+                continue
+
+            overlapping = True
+            if normal:
+                normal.scale_to_length(overlap*0.5)
+            else:
+                normal = pg.Vector2(0, -overlap*0.5)
+            obj_1.position += normal
+            obj_2.position -= normal
+
+        return overlapping
@@ -1,12 +1,15 @@
 "Contains components that game objects can inherit from to gain specific properties."
 
 import pygame as pg
+import math
 from typing import Generator, Any
+from weakref import WeakKeyDictionary
 
 import debug
 
-from src.custom_types import Animation, AnimController
+from src.custom_types import AnimController
 from src.math_functions import unit_vector, vector_min, format_angle
+from src import time_units
 
 from src.file_processing import assets
 
@@ -35,7 +38,7 @@ __all__ = [
 
 
 class ObjectVelocity(GameObject):
-    "Allows game objects to have a velocity."
+    "Allows game objects to have a velocity. Velocity is stored as the distance moved in a base tick."
 
     _max_speed = 100
 
@@ -43,6 +46,8 @@ class ObjectVelocity(GameObject):
         super().__init__(**kwargs)
         self._velocity = pg.Vector2(0, 0)
         self.__max_speed_squared = self._max_speed*self._max_speed
+        # Where the object was when its movement this tick started being measured
+        self.__tick_start_pos = self.position.copy()
 
 
 
@@ -51,9 +56,29 @@ class ObjectVelocity(GameObject):
         super().update()
         if self._velocity.magnitude_squared() > self.__max_speed_squared:
             self._velocity.scale_to_length(self._max_speed)
-        self.move(self._velocity)
+        self.move(time_units.per_tick(self._velocity))
 
 
+    def catch_up(self, ticks):
+        super().catch_up(ticks)
+        self.move(time_units.per_tick(self._velocity)*ticks)
+
+
+
+    def set_position(self, value):
+        super().set_position(value)
+        # Placing an object somewhere shouldn't count as moving through everything in between
+        self.start_tick_movement()
+
+
+    def get_tick_movement(self) -> pg.Vector2:
+        "Returns how far the object has moved since `start_tick_movement` was last called or it was placed with `set_position`."
+        return self.position - self.__tick_start_pos
+
+    def start_tick_movement(self) -> None:
+        "Starts measuring the object's movement from where it is now. Called once collisions have been resolved each tick."
+        self.__tick_start_pos = self.position.copy()
+
 
     def get_velocity(self) -> pg.Vector2:
         return self._velocity.copy()
@@ -70,11 +95,16 @@ class ObjectVelocity(GameObject):
 
 
     def accelerate(self, value: pg.typing.Point) -> None:
+        "Instantly changes the velocity. Use `accelerate_over_tick` for acceleration that is applied every tick."
         self._velocity += pg.Vector2(value)
 
+    def accelerate_over_tick(self, value: pg.typing.Point) -> None:
+        "Applies an acceleration given as the change in velocity over a base tick for the length of a tick."
+        self._velocity += time_units.per_tick(pg.Vector2(value))
+
 
     def get_lerp_pos(self, lerp_amount=0.0) -> pg.Vector2:
-        return self.position - self._velocity*(1-lerp_amount)
+        return self.position - time_units.per_tick(self._velocity)*(1-lerp_amount)
 
 
 
@@ -100,12 +130,12 @@ class ObjectTexture(GameObject):
 
 
     @property
-    def _rotation(self) -> int:
-        "Rotation of game object ranging from -179 to 180."
+    def _rotation(self) -> float:
+        "Rotation of game object ranging from 0 to 360. Angular velocity is stored as the rotation in a base tick."
         return self.__rotation
     @_rotation.setter
-    def _rotation(self, value: int) -> None:
-        self.__rotation = int(format_angle(value))
+    def _rotation(self, value: float) -> None:
+        self.__rotation = format_angle(value)
 
 
     def set_angular_vel(self, amount: float) -> None:
@@ -115,10 +145,10 @@ class ObjectTexture(GameObject):
     def rotate(self, amount: float) -> None:
         self._rotation += amount
 
-    def get_rotation(self) -> int:
+    def get_rotation(self) -> float:
         return self._rotation
 
-    def set_rotation(self, value: int) -> None:
+    def set_rotation(self, value: float) -> None:
         self._rotation = value
 
     def get_rotation_vector(self) -> pg.Vector2:
@@ -127,19 +157,26 @@ class ObjectTexture(GameObject):
     
     def get_lerp_rotation_vector(self, lerp_amount=0.0) -> pg.Vector2:
         "Gets rotation vector taking account interpolation."
-        return pg.Vector2(0, -1).rotate(self._rotation-self._angular_vel*(1-lerp_amount))
+        return pg.Vector2(0, -1).rotate(self._rotation-time_units.per_tick(self._angular_vel)*(1-lerp_amount))
         
 
     def update(self) -> None:
         super().update()
-        self.rotate(self._angular_vel)
+        self.rotate(time_units.per_tick(self._angular_vel))
+
+
+    def catch_up(self, ticks):
+        super().catch_up(ticks)
+        self.rotate(time_units.per_tick(self._angular_vel)*ticks)
 
 
     
     def draw(self, surface: pg.Surface, lerp_amount=0.0, offset: pg.typing.Point = (0, 0), rotation=0) -> None:
         blit_texture = self._get_blit_texture(lerp_amount, rotation)
         center = self._get_blit_pos(offset, lerp_amount)
-        blit_pos = center - pg.Vector2(blit_texture.get_size())*0.5
+        # Textures trimmed in the texture atlas are not centered on the object
+        trim_offset = assets.get_trim_offset(self.texture).rotate(-self._get_blit_angle(lerp_amount, rotation))
+        blit_pos = center + trim_offset - pg.Vector2(blit_texture.get_size())*0.5
         surface.blit(blit_texture, blit_pos)
 
         if debug.Cheats.show_bounding_boxes:
@@ -150,7 +187,17 @@ class ObjectTexture(GameObject):
 
     
     def _get_blit_texture(self, lerp_amount=0.0, rotation=0) -> pg.Surface:
-        return pg.transform.rotate(self.texture, -(self._rotation-self._angular_vel*(1-lerp_amount)) - rotation)
+        return pg.transform.rotate(self.texture, self._get_blit_angle(lerp_amount, rotation))
+
+
+    def _get_collision_texture(self) -> pg.Surface | None:
+        "Returns the unrotated texture used for precise hitboxes."
+        return self.texture
+    
+
+    def _get_blit_angle(self, lerp_amount=0.0, rotation=0) -> float:
+        "Returns the anti-clockwise angle the texture is rotated by when drawn."
+        return -(self._rotation-time_units.per_tick(self._angular_vel)*(1-lerp_amount)) - rotation
     
 
     def _get_blit_pos(self, offset: pg.typing.Point, lerp_amount=0.0) -> pg.Vector2:
@@ -199,7 +246,7 @@ class ObjectAnimation(ObjectTexture):
         self.__texture_map = assets.load_texture_map(self.__texture_map_path, self._palette_swap)
         self.__controller = AnimController(
             assets.load_anim_controller_data(self.__controller_path),
-            Animation.load_from_dict(assets.load_anim_data(self.__anim_path))
+            {name: anim.copy() for name, anim in assets.load_animations(self.__anim_path).items()}
         )
 
 
@@ -215,6 +262,11 @@ class ObjectAnimation(ObjectTexture):
         self._update_animations()
 
 
+    def catch_up(self, ticks):
+        super().catch_up(ticks)
+        self._advance_animation(time_units.per_tick(ticks))
+
+
     def _update_animations(self):
         self.__controller.update(self)
 
@@ -236,6 +288,9 @@ class ObjectAnimation(ObjectTexture):
     def _get_blit_texture(self, lerp_amount=0, rotation=0):
         self.texture = self.__controller.get_frame(self.__texture_map, lerp_amount)
         return super()._get_blit_texture(lerp_amount, rotation)
+
+    def _get_collision_texture(self):
+        return self.__controller.get_frame(self.__texture_map)
     
     def _set_anim_state(self, state_name: str) -> None:
         self.__controller.set_state(state_name)
@@ -253,33 +308,128 @@ class ObjectAnimation(ObjectTexture):
 
 
 class ObjectHitbox(GameObject):
-    "Gives objects a hitbox that can be used to perform collision checks."
+    """
+    Gives objects a hitbox that can be used to perform collision checks. The hitbox rect is moved
+    along with the object so it can be used as often as needed without making a new rect.
+
+    Objects with `precise_hitbox` set to True also check the pixels of their texture once the hitbox
+    overlaps. A mask is made the first time each texture frame is used at each multiple of
+    `MASK_ROTATION_STEP` degrees and reused after that.
+    """
     _layer = 0
 
+    precise_hitbox = False
+    MASK_ROTATION_STEP = 6
+
+    __rect: pg.FRect | None = None
+    __mask_cache: WeakKeyDictionary[pg.Surface, dict[int, pg.Mask]] = WeakKeyDictionary()
+
     def __init__(self, *, hitbox_size: pg.typing.Point, **kwargs):
         super().__init__(**kwargs)
         self._set_hitbox_size(hitbox_size)
 
 
 
+    @property
+    def position(self) -> pg.Vector2:
+        return self.__position
+    @position.setter
+    def position(self, value: pg.Vector2) -> None:
+        self.__position = value
+        if self.__rect is not None:
+            self.__rect.center = value
+
+
     @property
     def rect(self) -> pg.FRect:
-        rect = pg.FRect(0, 0, *self.__hitbox_size)
-        rect.center = self.position
-        return rect
+        "The hitbox of the object. The same rect is updated whenever the object moves so it should not be changed."
+        return self.__rect
     
 
     def colliderect(self, rect: pg.typing.RectLike) -> bool:
-        return self.rect.colliderect(rect)
+        if not self.__rect.colliderect(rect):
+            return False
+
+        mask_data = self.get_mask()
+        if mask_data is None:
+            return True
+
+        mask, topleft = mask_data
+        rect = pg.FRect(rect)
+        rect_mask = pg.Mask((max(round(rect.width), 1), max(round(rect.height), 1)), fill=True)
+        return mask.overlap(rect_mask, (round(rect.left-topleft.x), round(rect.top-topleft.y))) is not None
+
+
+    def overlaps(self, other: "ObjectHitbox") -> bool:
+        "Returns True if the hitboxes of both objects overlap."
+        if not self.__rect.colliderect(other.rect):
+            return False
+
+        mask_data = self.get_mask()
+        other_mask_data = other.get_mask()
+        if mask_data is None:
+            return other.colliderect(self.__rect)
+        elif other_mask_data is None:
+            return self.colliderect(other.rect)
+        else:
+            offset = other_mask_data[1]-mask_data[1]
+            return mask_data[0].overlap(other_mask_data[0], (round(offset.x), round(offset.y))) is not None
+
+
+    def collides_with_lines(self, lines: list[tuple[pg.Vector2, pg.Vector2]]) -> bool:
+        "Returns True if any of the lines pass through the hitbox."
+        clipped_lines = [line for line in map(self.__rect.clipline, lines) if line]
+        if not clipped_lines:
+            return False
+
+        mask_data = self.get_mask()
+        if mask_data is None:
+            return True
+
+        mask, topleft = mask_data
+        width, height = mask.get_size()
+        for start, end in clipped_lines:
+            start, end = pg.Vector2(start)-topleft, pg.Vector2(end)-topleft
+            steps = max(math.ceil(start.distance_to(end)), 1)
+            for step in range(steps+1):
+                x, y = start.lerp(end, step/steps)
+                if 0 <= x < width and 0 <= y < height and mask.get_at((int(x), int(y))):
+                    return True
+
+        return False
     
 
     def overlapping_objects(self) -> Generator["ObjectHitbox", Any]:
         "Returns a generator all objects in primary group whose hitbox overlaps with this objects's."
         for obj in self.primary_group:
-            if obj is not self and isinstance(obj, ObjectHitbox) and self.colliderect(obj.rect):
+            if obj is not self and isinstance(obj, ObjectHitbox) and self.overlaps(obj):
                 yield obj
 
 
+    def get_mask(self) -> tuple[pg.Mask, pg.Vector2] | None:
+        """
+        Returns the mask of the current texture frame at the nearest rotation step along with the
+        position of its top left corner. Returns None if the object doesn't use a precise hitbox.
+        """
+        if not (self.precise_hitbox and isinstance(self, ObjectTexture)):
+            return None
+
+        texture = self._get_collision_texture()
+        if texture is None:
+            return None
+
+        step = round(self.get_rotation()/self.MASK_ROTATION_STEP) % (360//self.MASK_ROTATION_STEP)
+        angle = step*self.MASK_ROTATION_STEP
+        masks = self.__mask_cache.setdefault(texture, {})
+        if step not in masks:
+            masks[step] = pg.mask.from_surface(pg.transform.rotate(texture, -angle))
+
+        mask = masks[step]
+        # Textures trimmed in the texture atlas are not centered on the object
+        center = self.position + assets.get_trim_offset(texture).rotate(angle)
+        return mask, center - pg.Vector2(mask.get_size())*0.5
+
+
 
     def draw(self, surface: pg.Surface, lerp_amount=0.0, offset: pg.typing.Point = (0, 0), rotation=0) -> str | None:
         super().draw(surface, lerp_amount, offset, rotation)
@@ -304,7 +454,8 @@ class ObjectHitbox(GameObject):
 
 
     def _set_hitbox_size(self, size: pg.typing.Point):
-        self.__hitbox_size = tuple(size)
+        self.__rect = pg.FRect((0, 0), size)
+        self.__rect.center = self.position
 
 
 
@@ -328,11 +479,6 @@ class ObjectCollision(ObjectVelocity):
         return self.__radius
 
 
-    def update(self) -> None:
-        super().update()
-        self.process_collision()
-
-
     def draw(self, surface, lerp_amount=0, offset=(0, 0), rotation=0):
         super().draw(surface, lerp_amount, offset, rotation)
         if debug.Cheats.show_bounding_boxes:
@@ -357,29 +503,15 @@ class ObjectCollision(ObjectVelocity):
             raise TypeError(f"Other object must be of type {ObjectCollision.__name__} not {type(other).__name__}")
     
 
-    def process_collision(self) -> None:
-        for other_obj in self.colliding_objects():
-            prev_position = self.position.copy()
-            normal: pg.Vector2 = self.position-other_obj.position
-            normal.scale_to_length(self.radius+other_obj.radius)
-
-            speed = (self.get_speed() + other_obj.get_speed())*0.5
-
-            self.process_collision_internal(other_obj.position, speed, normal)
-            other_obj.process_collision_internal(prev_position, speed, -normal)
-            other_obj.on_collide(self)
-
-            self.on_collide(other_obj)
-            break
-
-        super().process_collision()
-
-
-    def process_collision_internal(self, other_pos: pg.Vector2, speed: float, normal: pg.Vector2) -> None:
-        self.position = other_pos + normal
+    def bounce_off(self, speed: float, normal: pg.Vector2) -> None:
+        """
+        Changes the velocity after colliding. `speed` is shared between the colliding objects and `normal`
+        points away from the other object. The velocity is only reflected if moving towards the other object.
+        """
         try:
             self._velocity.scale_to_length(speed*self.__bounce)
-            self._velocity.reflect_ip(normal)
+            if self._velocity.dot(normal) < 0:
+                self._velocity.reflect_ip(normal)
         except ValueError:
             # If the magnitude of velocity is very small the scale_to_length function
             # raises a ValueError saying that it can't scale a zero vector
@@ -2,6 +2,7 @@ import pygame as pg
 import random
 
 from src.custom_types import Timer
+from src import time_units
 from .asteroids import Asteroid
 from .projectiles import EnemyBullet
 
@@ -23,19 +24,20 @@ from .components import ObjectAnimation, ObjectHitbox, Obstacle
 
 class Enemy(Obstacle, ObjectAnimation):
     _layer = 9
+    simulation_lod = True
 
     def __init__(self, *, health=1, points=0, point_display_height=0, **kwargs):
         super().__init__(health=health, points=points, point_display_height=point_display_height, **kwargs)
-        self._player_ship = None
+
+
+    def can_defer_update(self):
+        # Once destroyed the enemy is only playing its death animation
+        return not self.has_health()
 
 
     
     def _get_player(self):
-        from .spaceship import PlayerShip
-
-        for obj in self.primary_group:
-            if isinstance(obj, PlayerShip):
-                return obj
+        return self.primary_group.get_role("player")
 
 
 
@@ -68,6 +70,7 @@ class EnemyShip(Enemy):
 
         self.__speed = 0
         self.__move_direction = pg.Vector2()
+        # Counted down in update so they don't run down while the enemy isn't being updated
         self.__shoot_interval = Timer(22)
         self.__start_attack_delay = Timer(35).start()
 
@@ -89,33 +92,30 @@ class EnemyShip(Enemy):
         self.__shoot_interval.update()
         self.__start_attack_delay.update()
     
-        for obj in self.primary_group:
-            if (isinstance(obj, Asteroid)
-                and obj.health
-                and self.within_distance(obj, self.__asteroid_shoot_range)):
-                if self.__shoot_interval.time_elapsed > 8:
-                    self.__shoot(obj.position-self.position)
-                
-                self.__decrease_speed()
-                break
+        # Shoots at the closest asteroid in range before going after the player
+        asteroid = self.primary_group.nearest(self.position, Asteroid, self.__asteroid_shoot_range, Asteroid.has_health)
+        if asteroid is not None:
+            if self.__shoot_interval.time_elapsed > 8:
+                self.__shoot(asteroid.position-self.position)
+            
+            self.__decrease_speed()
         else:
-            if self._player_ship is None:
-                self._player_ship = self._get_player()
-
+            player_ship = self._get_player()
 
-            elif self._player_ship.health:
-                displacement = self._player_ship.position-self.position
+            if player_ship is not None and player_ship.health:
+                displacement = player_ship.position-self.position
                 
-                if self.within_distance(self._player_ship, 50):
+                if self.within_distance(player_ship, 50):
                     self.__decrease_speed()
                 else:
                     self.__increase_speed()
                 
 
-                if self.__start_attack_delay.complete and self.__shoot_interval.complete and self.within_distance(self._player_ship, self.__player_shoot_range):
+                if self.__start_attack_delay.complete and self.__shoot_interval.complete and self.within_distance(player_ship, self.__player_shoot_range):
                     self.__shoot(displacement.rotate(random.randint(-self.__shoot_deviation, self.__shoot_deviation)))
                 
-                self.__move_direction = displacement
+                # Follows the path around asteroids until it is close enough to head straight for the player
+                self.__move_direction = self.primary_group.flow_field.get_direction(self.position) or displacement
 
 
         if self.__move_direction and self.__speed > 0:
@@ -139,10 +139,10 @@ class EnemyShip(Enemy):
 
 
     def __increase_speed(self) -> None:
-        self.__speed = min(self.__speed+0.5, self.__move_speed)
+        self.__speed = min(self.__speed+time_units.per_tick(0.5), self.__move_speed)
     
     def __decrease_speed(self) -> None:
-        self.__speed = max(self.__speed-0.5, 0)
+        self.__speed = max(self.__speed-time_units.per_tick(0.5), 0)
         
 
     
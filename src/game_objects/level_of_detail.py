@@ -0,0 +1,119 @@
+"Contains the simulation level of detail that updates objects less often the further they are from the camera."
+
+import pygame as pg
+from weakref import WeakKeyDictionary
+
+from src import time_units
+
+from . import GameObject
+from .components import ObjectVelocity, ObjectHealth
+
+
+
+
+class SimulationLOD:
+    """
+    Decides how much of each object's update is run based on how far it is from the focus point.
+
+    - **Full** - Objects within `NEAR_RADIUS` are updated every tick.
+    - **Reduced** - Objects within `FAR_RADIUS` are updated every `REDUCED_INTERVAL` ticks. Before
+    updating they are moved by the ticks they missed.
+    - **Dormant** - Objects further away are not updated at all. They keep moving in a straight line
+    from where they went dormant so their position doesn't drift. They wake once they come back
+    within `FAR_RADIUS-WAKE_MARGIN` of the focus point.
+
+    Only objects with `simulation_lod` set to True are affected. Objects that are dying are always
+    fully updated so their death animations finish.
+    """
+
+    NEAR_RADIUS = 300
+    FAR_RADIUS = 420
+    WAKE_MARGIN = 20
+    REDUCED_INTERVAL = 2
+
+    FULL = 0
+    REDUCED = 1
+    DORMANT = 2
+
+    def __init__(self):
+        self.__tick = 0
+        self.__focus = pg.Vector2(0, 0)
+
+        # The last tick each object was updated on
+        self.__last_updates: WeakKeyDictionary[GameObject, int] = WeakKeyDictionary()
+        # The position, velocity and tick each dormant object went dormant on
+        self.__dormant: WeakKeyDictionary[GameObject, tuple[pg.Vector2, pg.Vector2, int]] = WeakKeyDictionary()
+
+        self.__tier_counts = [0, 0, 0]
+
+
+    def start_tick(self, focus: pg.typing.Point) -> None:
+        "Should be called at the start of every tick before `should_update`."
+        self.__tick += 1
+        self.__focus = pg.Vector2(focus)
+        self.__tier_counts = [0, 0, 0]
+
+
+    def should_update(self, obj: GameObject) -> bool:
+        "Returns True if the object should be updated this tick. Moves objects that are not being updated."
+        tier = self.get_tier(obj)
+        self.__tier_counts[tier] += 1
+        if not obj.simulation_lod:
+            return True
+
+        if tier == self.DORMANT:
+            self.__move_dormant(obj)
+            return False
+
+        self.__dormant.pop(obj, None)
+        last_update = self.__last_updates.setdefault(obj, self.__tick-1)
+        if tier == self.REDUCED and self.__tick-last_update < self.REDUCED_INTERVAL:
+            return False
+
+        if isinstance(obj, ObjectVelocity) and self.__tick-last_update > 1:
+            obj.move(time_units.per_tick(obj.get_velocity())*(self.__tick-last_update-1))
+
+        self.__last_updates[obj] = self.__tick
+        return True
+
+
+    def get_tier(self, obj: GameObject) -> int:
+        "Returns the level of detail the object is simulated at this tick."
+        if not obj.simulation_lod or (isinstance(obj, ObjectHealth) and not obj.has_health()):
+            return self.FULL
+
+        distance_squared = obj.position.distance_squared_to(self.__focus)
+        if obj in self.__dormant:
+            wake_radius = self.FAR_RADIUS-self.WAKE_MARGIN
+            if distance_squared > wake_radius*wake_radius:
+                return self.DORMANT
+
+        if distance_squared > self.FAR_RADIUS*self.FAR_RADIUS:
+            return self.DORMANT
+        elif distance_squared > self.NEAR_RADIUS*self.NEAR_RADIUS:
+            return self.REDUCED
+        else:
+            return self.FULL
+
+
+
+    def get_stats(self) -> tuple[int, int, int]:
+        "Returns the number of objects at full, reduced and dormant level of detail this tick."
+        return tuple(self.__tier_counts)
+
+
+    def debug_info(self) -> str:
+        full, reduced, dormant = self.get_stats()
+        return f"simulation lod: {full} full, {reduced} reduced, {dormant} dormant"
+
+
+
+    def __move_dormant(self, obj: GameObject) -> None:
+        if obj not in self.__dormant:
+            velocity = obj.get_velocity() if isinstance(obj, ObjectVelocity) else pg.Vector2(0, 0)
+            # Dormant motion carries on from where the object was at its last update
+            self.__dormant[obj] = (obj.position.copy(), velocity, self.__last_updates.get(obj, self.__tick-1))
+
+        start_pos, velocity, start_tick = self.__dormant[obj]
+        obj.set_position(start_pos + time_units.per_tick(velocity)*(self.__tick-start_tick))
+        self.__last_updates[obj] = self.__tick
@@ -0,0 +1,202 @@
+"Contains the flow field that enemies follow to reach the player while steering around asteroids."
+
+import pygame as pg
+import math
+import heapq
+from time import perf_counter
+
+from src import time_units
+
+from . import ObjectGroup
+from .asteroids import Asteroid
+
+
+
+
+class FlowField:
+    """
+    A grid of directions centered on the player that leads every cell to the player along the
+    cheapest path. Enemies sample the cell they are in instead of each finding their own way, so the
+    cost of navigation doesn't grow with the number of enemies.
+
+    Cells close to an asteroid cost `OBSTACLE_COST` times as much to cross so paths go around
+    asteroids where they can. The cost of reaching the player from every cell is found with Dijkstra's
+    algorithm and each cell points towards its cheapest neighbour.
+
+    The field is built when it is first sampled and rebuilt every `REBUILD_INTERVAL` base ticks, or
+    sooner if the player has moved more than `REBUILD_DISTANCE` from the center of the field.
+    """
+
+    CELL_SIZE = 32
+    RADIUS = 12
+    CLEARANCE = 12
+    OBSTACLE_COST = 25
+    REBUILD_INTERVAL = 5
+    REBUILD_DISTANCE = 48
+
+    def __init__(self, group: ObjectGroup):
+        self.__group = group
+        self.__tick = 0
+        self.__next_build = 0
+        self.__center: pg.Vector2 | None = None
+        # The cell in the top left corner of the field
+        self.__origin = (0, 0)
+        self.__directions: list[pg.Vector2] = []
+        # The index, distance and direction of the neighbours of every cell, which are the same for every build
+        self.__neighbours = self.__get_neighbours()
+
+        self.__builds = 0
+        self.__blocked_cells = 0
+        self.__build_time = 0.0
+        self.__samples = 0
+
+
+    @property
+    def size(self) -> int:
+        "The number of cells along each side of the field."
+        return self.RADIUS*2 + 1
+
+
+    def start_tick(self) -> None:
+        "Should be called at the start of every tick before the field is sampled."
+        self.__tick += 1
+        self.__samples = 0
+
+
+
+    def get_direction(self, position: pg.typing.Point) -> pg.Vector2:
+        """
+        Returns the direction to move in from `position` to reach the player. Returns a zero vector if
+        there is no player, the position is outside the field or the position is in the player's cell.
+        """
+        self.__samples += 1
+        target = self.__group.get_role("player")
+        if target is None or not target.health:
+            return pg.Vector2(0, 0)
+
+        if (self.__center is None
+            or self.__tick >= self.__next_build
+            or not self.__center.distance_squared_to(target.position) <= self.REBUILD_DISTANCE**2):
+            self.__build(target.position)
+
+        index = self.__get_index(position)
+        if index is None:
+            return pg.Vector2(0, 0)
+        return self.__directions[index].copy()
+
+
+
+    def get_stats(self) -> tuple[int, int, int, float]:
+        "Returns the number of times the field has been built, cells near asteroids in the last build, samples this tick and how long the last build took in milliseconds."
+        return self.__builds, self.__blocked_cells, self.__samples, self.__build_time*1000
+
+
+    def debug_info(self) -> str:
+        builds, blocked_cells, samples, build_time = self.get_stats()
+        return f"flow field: {builds} builds, {blocked_cells}/{self.size**2} blocked, {samples} samples, build: {build_time:.2f}ms"
+
+
+
+    def __build(self, center: pg.Vector2) -> None:
+        start_time = perf_counter()
+        self.__center = pg.Vector2(center)
+        self.__next_build = self.__tick + max(round(time_units.to_ticks(self.REBUILD_INTERVAL)), 1)
+        self.__origin = (math.floor(center.x/self.CELL_SIZE) - self.RADIUS,
+                         math.floor(center.y/self.CELL_SIZE) - self.RADIUS)
+
+        costs = self.__get_costs()
+        integrated = self.__integrate(costs)
+
+        no_direction = pg.Vector2(0, 0)
+        directions = []
+        for total, neighbours in zip(integrated, self.__neighbours):
+            best = total
+            best_direction = no_direction
+            for next_index, _, direction in neighbours:
+                if integrated[next_index] < best:
+                    best = integrated[next_index]
+                    best_direction = direction
+            directions.append(best_direction)
+
+        self.__directions = directions
+        self.__builds += 1
+        self.__build_time = perf_counter() - start_time
+
+
+    def __get_costs(self) -> list[float]:
+        "Returns the cost of crossing each cell. Cells within `CLEARANCE` of an asteroid cost more."
+        size = self.size
+        origin_x, origin_y = self.__origin
+        costs = [1.0]*(size*size)
+        self.__blocked_cells = 0
+
+        for asteroid in self.__group.get_type(Asteroid):
+            if not asteroid.has_health():
+                continue
+
+            reach = asteroid.radius + self.CLEARANCE
+            left = max(math.floor((asteroid.position.x-reach)/self.CELL_SIZE) - origin_x, 0)
+            right = min(math.floor((asteroid.position.x+reach)/self.CELL_SIZE) - origin_x, size-1)
+            top = max(math.floor((asteroid.position.y-reach)/self.CELL_SIZE) - origin_y, 0)
+            bottom = min(math.floor((asteroid.position.y+reach)/self.CELL_SIZE) - origin_y, size-1)
+
+            for y in range(top, bottom+1):
+                for x in range(left, right+1):
+                    index = y*size + x
+                    if costs[index] == self.OBSTACLE_COST:
+                        continue
+                    # Checks the point in the cell closest to the asteroid
+                    cell_left, cell_top = (origin_x+x)*self.CELL_SIZE, (origin_y+y)*self.CELL_SIZE
+                    closest = (pg.math.clamp(asteroid.position.x, cell_left, cell_left+self.CELL_SIZE),
+                               pg.math.clamp(asteroid.position.y, cell_top, cell_top+self.CELL_SIZE))
+                    if asteroid.position.distance_squared_to(closest) < reach*reach:
+                        costs[index] = self.OBSTACLE_COST
+                        self.__blocked_cells += 1
+
+        return costs
+
+
+    def __integrate(self, costs: list[float]) -> list[float]:
+        "Returns the cheapest cost of reaching the center cell from every cell."
+        size = self.size
+        integrated = [math.inf]*(size*size)
+        center_index = self.RADIUS*size + self.RADIUS
+        integrated[center_index] = 0.0
+        queue = [(0.0, center_index)]
+
+        while queue:
+            total, index = heapq.heappop(queue)
+            if total > integrated[index]:
+                continue
+
+            for next_index, distance, _ in self.__neighbours[index]:
+                # Moving between cells costs the average of the two cells
+                next_total = total + distance*(costs[index]+costs[next_index])*0.5
+                if next_total < integrated[next_index]:
+                    integrated[next_index] = next_total
+                    heapq.heappush(queue, (next_total, next_index))
+
+        return integrated
+
+
+    def __get_neighbours(self) -> list[list[tuple[int, float, pg.Vector2]]]:
+        size = self.size
+        offsets = [(x, y) for x in (-1, 0, 1) for y in (-1, 0, 1) if x or y]
+        directions = {offset: pg.Vector2(offset).normalize() for offset in offsets}
+
+        neighbours = []
+        for index in range(size*size):
+            x, y = index%size, index//size
+            neighbours.append([((y+offset_y)*size + x+offset_x, math.hypot(offset_x, offset_y), directions[offset_x, offset_y])
+                               for offset_x, offset_y in offsets
+                               if 0 <= x+offset_x < size and 0 <= y+offset_y < size])
+        return neighbours
+
+
+    def __get_index(self, position: pg.typing.Point) -> int | None:
+        x = math.floor(position[0]/self.CELL_SIZE) - self.__origin[0]
+        y = math.floor(position[1]/self.CELL_SIZE) - self.__origin[1]
+        if 0 <= x < self.size and 0 <= y < self.size:
+            return y*self.size + x
+        else:
+            return None
@@ -4,7 +4,8 @@ import pygame as pg
 import random
 from math import sin, pi
 
-from src.custom_types import Timer
+from src.custom_types import Timer, TimerWheel
+from src import time_units
 
 from .components import *
 
@@ -22,6 +23,7 @@ class ShipSmoke(ObjectAnimation, ObjectVelocity):
     _layer=6
 
     progress_save_key="ship_thruster_smoke"
+    snapshot_keys=ObjectAnimation.snapshot_keys + ("velocity", "angular_vel", "total_time", "time_elapsed")
 
     def __init__(self, position: pg.typing.Point, velocity: pg.typing.Point):
         
@@ -34,27 +36,21 @@ class ShipSmoke(ObjectAnimation, ObjectVelocity):
 
         self.accelerate(velocity)
         self._angular_vel = random.randint(-6, 6)
-        self.__lifetime = Timer(random.randint(12, 18), exec_after=self.kill).start()
+        self.__lifetime = Timer(random.randint(12, 18), exec_after=self.kill, wheel=TimerWheel.get_active()).start()
 
     
     def __init_from_data__(self, object_data):
         self.__init__(object_data["position"], object_data["velocity"])
         self._angular_vel = object_data["angular_vel"]
-        self.__lifetime = Timer(object_data["total_time"], exec_after=self.kill).start()
+        # The lifetime started by __init__ would still kill the smoke if it was left on the wheel
+        self.__lifetime.stop()
+        self.__lifetime = Timer(object_data["total_time"], exec_after=self.kill, wheel=TimerWheel.get_active()).start()
         self.__lifetime.advance(object_data["time_elapsed"])
         self._advance_animation(object_data["time_elapsed"])
     
 
-    def get_data(self):
-        data = super().get_data()
-        data.update({
-            "position": tuple(self.position),
-            "velocity": tuple(self._velocity),
-            "angular_vel": self._angular_vel,
-            "total_time": self.__lifetime.duration,
-            "time_elapsed": self.__lifetime.time_elapsed
-        })
-        return data
+    def get_snapshot(self):
+        return super().get_snapshot() + (tuple(self._velocity), self._angular_vel, self.__lifetime.duration, self.__lifetime.time_elapsed)
 
 
     def update(self):
@@ -62,6 +58,16 @@ class ShipSmoke(ObjectAnimation, ObjectVelocity):
         self.__lifetime.update()
 
 
+    def can_defer_update(self):
+        return True
+
+    def catch_up(self, ticks):
+        super().catch_up(ticks)
+        # Lifetimes on a timer wheel keep counting down while the smoke isn't updated
+        if self.__lifetime.wheel is None:
+            self.__lifetime.advance(time_units.per_tick(ticks))
+
+
 
 
 
@@ -90,12 +96,24 @@ class DisplayText(ObjectTexture):
 
     def update(self):
         super().update()
-
-        self.__lifetime -= 1
-        if self.__lifetime == 0:
+        self.__advance()
+        if not self.__lifetime:
             self.kill()
-        
-        self.position.y -= sin(self.__lifetime*pi/12)*2
+
+
+    def can_defer_update(self):
+        return True
+
+    def catch_up(self, ticks):
+        super().catch_up(ticks)
+        for _ in range(ticks):
+            self.__advance()
+
+
+    def __advance(self) -> None:
+        "Counts down the lifetime by a tick and moves the text up."
+        self.__lifetime = max(self.__lifetime-time_units.tick_scale(), 0)
+        self.position.y -= time_units.per_tick(sin(self.__lifetime*pi/12)*2)
 
     def _get_blit_pos(self, offset, lerp_amount=0):
         return super()._get_blit_pos(offset, lerp_amount) - (0, self.__y_offset)
\ No newline at end of file
@@ -139,7 +139,9 @@ class PowerUpGroup(HasSoundQueue):
 
 class PowerupCollectable(ObjectTexture, ObjectHitbox, ObjectCollision):
     ignore_camera_rotation=True
+    simulation_lod=True
     progress_save_key="powerup_collectable"
+    snapshot_keys=ObjectTexture.snapshot_keys + ("velocity", "powerup", "angular_vel")
 
     def __init__(
             self,
@@ -165,7 +167,6 @@ class PowerupCollectable(ObjectTexture, ObjectHitbox, ObjectCollision):
 
         self.accelerate(velocity)
         self.__powerup_name = powerup_name
-        self.__player_ship: PlayerShip | None = None
 
 
     def __init_from_data__(self, object_data):
@@ -178,29 +179,16 @@ class PowerupCollectable(ObjectTexture, ObjectHitbox, ObjectCollision):
         return self.__powerup_name
 
 
-    def get_data(self):
-        data = super().get_data()
-        data.update({
-            "position": tuple(self.position),
-            "velocity": tuple(self._velocity),
-            "powerup": self.__powerup_name,
-            "angular_vel": self._angular_vel
-        })
-
-        return data
+    def get_snapshot(self):
+        return super().get_snapshot() + (tuple(self._velocity), self.__powerup_name, self._angular_vel)
 
 
     def update(self):
         super().update()
 
-        if self.__player_ship is None:
-            for obj in self.primary_group:
-                if isinstance(obj, PlayerShip):
-                    self.__player_ship = obj
-                    break
-        
-        elif self.rect.colliderect(self.__player_ship.rect):
-            self.__player_ship.acquire_powerup(self.__powerup_name)
+        player_ship: PlayerShip | None = self.primary_group.get_role("player")
+        if player_ship is not None and self.overlaps(player_ship):
+            player_ship.acquire_powerup(self.__powerup_name)
             self.host_state.powerup_info(PowerUp.powerup_list[self.__powerup_name])
             self.kill()
 
@@ -214,6 +202,7 @@ class PowerupCollectable(ObjectTexture, ObjectHitbox, ObjectCollision):
 class SuperLaser(PowerUp):
     __charge_time = 16
     __cooldown = 100
+    __laser_width = 50
 
     texture_key = "super_laser"
 
@@ -253,17 +242,18 @@ class SuperLaser(PowerUp):
             return
         
         offset = pg.Vector2(offset)
-        direction = spaceship.get_rotation_vector()
-        perp = direction.rotate(90)*25
-        start_pos = spaceship.position + offset
-        end_pos = start_pos + direction*300
-
-        pg.draw.line(surface, "red", start_pos+perp, end_pos+perp)
-        pg.draw.line(surface, "red", start_pos-perp, end_pos+direction-perp)
+        lines = Laser.get_beam_lines(spaceship.position, spaceship.get_rotation(), self.__laser_width)
+        for start_pos, end_pos in (lines[0], lines[-1]):
+            pg.draw.line(surface, "red", start_pos+offset, end_pos+offset)
+
+        # Shows which asteroids the laser would destroy if it was fired now
+        if spaceship.primary_group is not None:
+            for obj in Laser.find_targets(lines, spaceship.primary_group):
+                pg.draw.rect(surface, "red", obj.rect.move(offset), 1)
     
 
     def __fire_laser(self, spaceship: PlayerShip) -> None:
-        self.__laser = Laser(spaceship.position, spaceship.get_rotation(), 50, 1)
+        self.__laser = Laser(spaceship.position, spaceship.get_rotation(), self.__laser_width, 1)
         spaceship.primary_group.add(self.__laser)
         spaceship.accelerate(-spaceship.get_rotation_vector()*5)
 
@@ -1,15 +1,19 @@
 import pygame as pg
-from typing import Iterable
+import math
+from collections import defaultdict
+from typing import Iterable, Sequence
 
 import debug
 
 from src.custom_types import Timer
 from src.file_processing import assets
 from src.math_functions import unit_vector
+from src import time_units
 from src.ui import font
 
-from . import GameObject
-from .components import ObjectTexture, ObjectVelocity, ObjectHitbox
+from . import GameObject, ObjectGroup
+from .components import ObjectTexture, ObjectVelocity, ObjectHitbox, Obstacle
+from .asteroids import Asteroid
 from .particles import DisplayText
 
 
@@ -48,6 +52,63 @@ def rect_line_collision(rect: pg.typing.RectLike, lines: CollisionLines) -> bool
 
 
 
+def lines_hit_rects(lines: CollisionLines, rects: Sequence[pg.FRect | pg.Rect]) -> set[int]:
+    """
+    Returns the indexes of all the rects that any of the lines pass through. Rects outside the box
+    around all the lines are skipped straight away and the rest are tested with the slab method.
+    """
+
+    if not lines:
+        return set()
+
+    segments = []
+    for start, end in lines:
+        x, y = start
+        dx, dy = end[0]-x, end[1]-y
+        segments.append((x, y, dx, dy, 1/dx if dx else None, 1/dy if dy else None))
+
+    xs = [point[0] for line in lines for point in line]
+    ys = [point[1] for line in lines for point in line]
+    min_x, max_x, min_y, max_y = min(xs), max(xs), min(ys), max(ys)
+
+    hits = set()
+    for index, rect in enumerate(rects):
+        # Like rect.clipline, the last pixel row and column are the edges of the rect
+        left, top, right, bottom = rect.left, rect.top, rect.right-1, rect.bottom-1
+        if left > max_x or right < min_x or top > max_y or bottom < min_y:
+            continue
+
+        for x, y, dx, dy, inv_dx, inv_dy in segments:
+            t_min, t_max = 0.0, 1.0
+
+            if inv_dx is None:
+                if not left <= x <= right:
+                    continue
+            else:
+                t1, t2 = (left-x)*inv_dx, (right-x)*inv_dx
+                if t1 > t2:
+                    t1, t2 = t2, t1
+                t_min, t_max = max(t_min, t1), min(t_max, t2)
+                if t_min > t_max:
+                    continue
+
+            if inv_dy is None:
+                if not top <= y <= bottom:
+                    continue
+            else:
+                t1, t2 = (top-y)*inv_dy, (bottom-y)*inv_dy
+                if t1 > t2:
+                    t1, t2 = t2, t1
+                if max(t_min, t1) > min(t_max, t2):
+                    continue
+
+            hits.add(index)
+            break
+
+    return hits
+
+
+
 
 
 class Projectile(ObjectTexture, ObjectVelocity):
@@ -77,25 +138,45 @@ class Projectile(ObjectTexture, ObjectVelocity):
 
         self._distance_traveled = 0.0
         self._lifetime = lifetime
+        self.__collision_lines: CollisionLines | None = None
 
 
 
     def update(self):
+        self.travel()
+        if self.primary_group is not None:
+            self.resolve_hits(self.primary_group)
+
+
+    def travel(self) -> None:
+        "Moves the projectile for the current tick without checking for collisions."
         super().update()
-        self._distance_traveled += self.__speed
+        self._distance_traveled += time_units.per_tick(self.__speed)
+        self.__collision_lines = None
 
-        if self.primary_group is None:
-            return
 
+    def resolve_hits(self, objects: Iterable[GameObject]) -> bool:
+        """
+        Assesses collisions with `objects` in order and counts down the projectile's lifetime. The
+        projectile is killed if it hits anything or runs out of lifetime. Returns True if it hit anything.
+        """
         hit = False
-        for obj in self.primary_group:
+        for obj in objects:
             hit = self._assess_collision(obj) or hit
         if hit:
             self.kill()
-        
-        self._lifetime -= 1
-        if self._lifetime <= 0:
+            return True
+
+        self._lifetime = max(self._lifetime-time_units.tick_scale(), 0)
+        if not self._lifetime:
             self.kill()
+        return False
+
+
+    def advance(self, amount: float) -> None:
+        "Moves the projectile forward by a fraction of a tick. Used when it was fired part way through a tick."
+        self.move(time_units.per_tick(self._velocity)*amount)
+        self._distance_traveled += time_units.per_tick(self.__speed)*amount
 
             
         
@@ -104,7 +185,7 @@ class Projectile(ObjectTexture, ObjectVelocity):
         super().draw(surface, lerp_amount, offset, rotation)
 
         if debug.Cheats.show_bounding_boxes:
-            for line in self.__get_collision_lines(offset):
+            for line in self.__make_collision_lines(offset):
                 pg.draw.line(surface, "blue", *line)
     
     
@@ -112,16 +193,23 @@ class Projectile(ObjectTexture, ObjectVelocity):
         return pg.math.clamp(self._distance_traveled-30, 1, self.__speed*2)
 
 
-    def __get_collision_lines(self, offset: pg.typing.Point = (0, 0)) -> CollisionLines:
+    def get_collision_lines(self) -> CollisionLines:
+        "Returns the lines covering the path the projectile took this tick. These are only worked out once a tick."
+        if self.__collision_lines is None:
+            self.__collision_lines = self.__make_collision_lines()
+        return self.__collision_lines
+
+
+    def __make_collision_lines(self, offset: pg.typing.Point = (0, 0)) -> CollisionLines:
         return get_collision_lines(
-            self.position-self._velocity+offset,
+            self.position-time_units.per_tick(self._velocity)+offset,
             -self.get_rotation_vector(),
             self.__collision_line_length(),
             self.__width
         )
     
-    def _collides_with(self, rect: pg.typing.RectLike) -> bool:
-        return rect_line_collision(rect, self.__get_collision_lines())
+    def _collides_with(self, obj: ObjectHitbox) -> bool:
+        return obj.collides_with_lines(self.get_collision_lines())
     
 
     def _assess_collision(self, obj: GameObject) -> bool:
@@ -140,6 +228,7 @@ class Projectile(ObjectTexture, ObjectVelocity):
 
 class PlayerBullet(Projectile):
     progress_save_key = "player_bullet"
+    snapshot_keys = Projectile.snapshot_keys + ("velocity", "rotation", "lifetime", "distance_traveled")
 
     __speed = 40
     __lifetime_value = 18
@@ -169,19 +258,12 @@ class PlayerBullet(Projectile):
 
 
     
-    def get_data(self):
-        data = super().get_data()
-        data.update({"position": tuple(self.position),
-                     "velocity": tuple(self._velocity),
-                     "rotation": self._rotation,
-                     "lifetime": self._lifetime,
-                     "distance_traveled": self._distance_traveled})
-        return data
+    def get_snapshot(self):
+        return super().get_snapshot() + (tuple(self._velocity), self._rotation, self._lifetime, self._distance_traveled)
 
 
     def _assess_collision(self, obj):
-        from .asteroids import Obstacle, Asteroid
-        if isinstance(obj, Obstacle) and obj.has_health() and self._collides_with(obj.rect):
+        if isinstance(obj, Obstacle) and obj.has_health() and self._collides_with(obj):
             if isinstance(obj, Asteroid):
                 obj.damage(1, self._velocity*0.1/obj.size)
             else:
@@ -224,7 +306,7 @@ class Laser(ObjectTexture):
         self.__damage = damage
         self._rotation = rotation
 
-        self.__collision_lines = get_collision_lines(position, self.get_rotation_vector(), 300, width, 5)
+        self.__collision_lines = self.get_beam_lines(position, rotation, width)
         self.killed_list: list[GameObject] = []
 
 
@@ -235,13 +317,27 @@ class Laser(ObjectTexture):
 
 
 
+    @staticmethod
+    def get_beam_lines(position: pg.typing.Point, rotation: float, width: int) -> CollisionLines:
+        "Returns the collision lines of a laser fired from `position` at an angle of `rotation`."
+        return get_collision_lines(pg.Vector2(position), pg.Vector2(0, -1).rotate(rotation), 300, width, 5)
+
+
+    @staticmethod
+    def find_targets[T: ObjectHitbox](lines: CollisionLines, objects: Iterable[T]) -> list[T]:
+        "Returns the asteroids in `objects` that are in the path of a beam, in the same order. All of them are tested in one batch."
+        targets = [obj for obj in objects if isinstance(obj, Asteroid) and obj.has_health()]
+        hits = lines_hit_rects(lines, [obj.rect for obj in targets])
+        return [obj for index, obj in enumerate(targets)
+                if index in hits and (not obj.precise_hitbox or obj.collides_with_lines(lines))]
+
+
+
     def update(self):
-        from .asteroids import Asteroid
         if not self.__damage_duration.complete:
-            for obj in self.primary_group:
-                if isinstance(obj, Asteroid) and obj.has_health() and rect_line_collision(obj.rect, self.__collision_lines):
-                    obj.kill(False)
-                    self.killed_list.append(obj)
+            for obj in self.find_targets(self.__collision_lines, self.primary_group):
+                obj.kill(False)
+                self.killed_list.append(obj)
         
         self.__damage_duration.update()
 
@@ -274,12 +370,133 @@ class EnemyBullet(Projectile):
     
     def _assess_collision(self, obj):
         from .spaceship import PlayerShip
-        from .asteroids import Asteroid
-        if isinstance(obj, PlayerShip) and self._collides_with(obj.rect):
+        if isinstance(obj, PlayerShip) and self._collides_with(obj):
             obj.kill()
             return True
-        elif isinstance(obj, Asteroid) and obj.health and self._collides_with(obj.rect):
+        elif isinstance(obj, Asteroid) and obj.health and self._collides_with(obj):
             obj.damage(1, self._velocity*0.1/obj.size)
             return True
         else:
-            return False
\ No newline at end of file
+            return False
+
+
+
+
+
+
+
+class ProjectileManager:
+    """
+    Updates all the projectiles in a group together. The collision lines of every projectile are
+    worked out once a tick and only tested against hitboxes in the grid cells the lines pass over.
+    This means the amount of work grows with the number of projectiles rather than the number of
+    projectiles multiplied by the number of objects.
+    """
+
+    CELL_SIZE = 128
+
+    def __init__(self, group: ObjectGroup):
+        self.__group = group
+
+        self.__projectiles: list[Projectile] = []
+        # The bounding boxes of each projectile's collision lines as (left, top, right, bottom)
+        self.__bounds: list[tuple[float, float, float, float]] = []
+        # Objects are stored with their position in the group so hits are assessed in group order
+        self.__grid: defaultdict[tuple[int, int], list[tuple[int, ObjectHitbox, pg.FRect]]] = defaultdict(list)
+        self.__next_index = 0
+        self.__updating = False
+
+        self.__candidates = 0
+        self.__hits = 0
+
+
+    def update(self, projectiles: Iterable[Projectile]) -> None:
+        "Moves `projectiles` and assesses their collisions with the objects in the group. Should be called once every tick."
+        self.__projectiles = [proj for proj in projectiles if proj.primary_group is self.__group]
+        self.__bounds.clear()
+        self.__candidates = 0
+        self.__hits = 0
+
+        for proj in self.__projectiles:
+            proj.travel()
+            self.__bounds.append(self.__get_bounds(proj.get_collision_lines()))
+
+        self.__build_grid()
+        self.__updating = True
+
+        for proj, bounds in zip(self.__projectiles, self.__bounds):
+            if proj.primary_group is None:
+                continue
+
+            candidates = self.__query(bounds)
+            self.__candidates += len(candidates)
+            if proj.resolve_hits(candidates):
+                self.__hits += 1
+
+        self.__updating = False
+
+
+    def add_object(self, obj: GameObject) -> None:
+        "Adds objects spawned part way through an update (like asteroid fragments) to the grid so later projectiles can hit them."
+        if self.__updating and isinstance(obj, ObjectHitbox):
+            self.__add_to_grid(obj)
+
+
+    def query_rect(self, rect: pg.typing.RectLike) -> list[ObjectHitbox]:
+        "Returns the objects in the group whose hitbox overlaps `rect` as of the last update, in group order."
+        rect = pg.FRect(rect)
+        return self.__query((rect.left, rect.top, rect.right, rect.bottom))
+
+
+    def get_stats(self) -> tuple[int, int, int]:
+        "Returns the number of projectiles updated, collision candidates assessed and projectiles that hit something in the last update."
+        return len(self.__projectiles), self.__candidates, self.__hits
+
+
+    def debug_info(self) -> str:
+        projectiles, candidates, hits = self.get_stats()
+        return f"projectiles: {projectiles}, candidates: {candidates}, hits: {hits}"
+
+
+
+    def __build_grid(self) -> None:
+        self.__grid.clear()
+        self.__next_index = 0
+        for obj in self.__group.sprites():
+            if isinstance(obj, ObjectHitbox):
+                self.__add_to_grid(obj)
+
+
+    def __add_to_grid(self, obj: ObjectHitbox) -> None:
+        rect = obj.rect
+        for cell in self.__get_cells((rect.left, rect.top, rect.right, rect.bottom)):
+            self.__grid[cell].append((self.__next_index, obj, rect))
+        self.__next_index += 1
+
+
+    def __query(self, bounds: tuple[float, float, float, float]) -> list[ObjectHitbox]:
+        left, top, right, bottom = bounds
+        found: dict[int, ObjectHitbox] = {}
+        for cell in self.__get_cells(bounds):
+            for index, obj, rect in self.__grid.get(cell, ()):
+                if (index not in found
+                    and rect.left <= right and left <= rect.right
+                    and rect.top <= bottom and top <= rect.bottom
+                    and obj.primary_group is not None):
+                    found[index] = obj
+
+        return [found[index] for index in sorted(found)]
+
+
+    def __get_cells(self, bounds: tuple[float, float, float, float]) -> Iterable[tuple[int, int]]:
+        left, top, right, bottom = bounds
+        for x in range(math.floor(left/self.CELL_SIZE), math.floor(right/self.CELL_SIZE)+1):
+            for y in range(math.floor(top/self.CELL_SIZE), math.floor(bottom/self.CELL_SIZE)+1):
+                yield x, y
+
+
+    @staticmethod
+    def __get_bounds(lines: CollisionLines) -> tuple[float, float, float, float]:
+        xs = [point[0] for line in lines for point in line]
+        ys = [point[1] for line in lines for point in line]
+        return min(xs), min(ys), max(xs), max(ys)
@@ -0,0 +1,99 @@
+"Contains the update scheduler that spreads the updates of cosmetic objects over several ticks when a tick runs long."
+
+import time
+from weakref import WeakKeyDictionary
+from typing import Iterable
+
+from src import time_units
+
+from . import GameObject
+
+
+
+
+class UpdateScheduler:
+    """
+    Decides which deferrable objects are updated each tick so cosmetic objects can't make a long tick
+    even longer.
+
+    Critical objects (the player, obstacles and projectiles) are always updated. Objects that return
+    True from `can_defer_update` are updated after them with whatever is left of the tick's time
+    budget. Once the budget has run out the rest are deferred to a later tick. Deferred objects are
+    updated oldest first so the work is shared out across ticks, and no object goes more than
+    `MAX_DEFER_TICKS` ticks without an update. Before a deferred object is updated it is caught up on
+    the ticks it missed with `catch_up`.
+
+    The budget is `BUDGET_FRACTION` of the length of a tick unless `budget` is given in seconds.
+    """
+
+    BUDGET_FRACTION = 0.4
+    MAX_DEFER_TICKS = 4
+
+    def __init__(self, budget: float | None = None):
+        self.budget = budget
+        self.__tick = 0
+        self.__tick_start = time.perf_counter()
+
+        # The last tick each object was updated on
+        self.__last_updates: WeakKeyDictionary[GameObject, int] = WeakKeyDictionary()
+
+        self.__deferrable = 0
+        self.__deferred = 0
+        self.__worst_age = 0
+
+
+    def start_tick(self) -> None:
+        "Should be called at the start of every tick before any objects are updated."
+        self.__tick += 1
+        self.__tick_start = time.perf_counter()
+
+
+    def get_budget(self) -> float:
+        "Returns the time in seconds that objects can be updated for in a tick."
+        if self.budget is None:
+            return self.BUDGET_FRACTION/time_units.get_tickrate()
+        else:
+            return self.budget
+
+
+
+    def update(self, objects: Iterable[GameObject]) -> list[GameObject]:
+        "Updates as many deferrable objects as the rest of the tick's budget allows. Returns the objects that were updated."
+        deadline = self.__tick_start + self.get_budget()
+        last_updates = self.__last_updates
+        objects = list(objects)
+        for obj in objects:
+            last_updates.setdefault(obj, self.__tick-1)
+        # Sorting is stable so objects that are as old as each other stay in group order
+        objects.sort(key=lambda obj: last_updates[obj])
+
+        self.__deferrable = len(objects)
+        self.__deferred = 0
+        self.__worst_age = 0
+        updated: list[GameObject] = []
+
+        for obj in objects:
+            age = self.__tick - last_updates[obj]
+            if age < self.MAX_DEFER_TICKS and time.perf_counter() > deadline:
+                self.__deferred += 1
+                self.__worst_age = max(self.__worst_age, age)
+                continue
+
+            if age > 1:
+                obj.catch_up(age-1)
+            obj.update()
+            last_updates[obj] = self.__tick
+            updated.append(obj)
+
+        return updated
+
+
+
+    def get_stats(self) -> tuple[int, int, int]:
+        "Returns the number of deferrable objects, how many of them were deferred and the most ticks one has gone without an update this tick."
+        return self.__deferrable, self.__deferred, self.__worst_age
+
+
+    def debug_info(self) -> str:
+        deferrable, deferred, worst_age = self.get_stats()
+        return f"deferred updates: {deferred}/{deferrable}, worst age: {worst_age} ticks"
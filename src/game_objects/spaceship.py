@@ -1,12 +1,13 @@
 import pygame as pg
 import math
 import random
-from typing import Literal
+from typing import Literal, NamedTuple
 
 import debug
 
 from src.math_functions import sign
-from src.custom_types import Timer
+from src import time_units
+from src.custom_types import Timer, TimerWheel, ActionSnapshot
 from src.input_device import controller_rumble, InputInterpreter
 from src.ui import font
 
@@ -25,9 +26,12 @@ from .particles import ShipSmoke, DisplayText
 
 
 class Spaceship(ObjectAnimation, ObjectHitbox, ObjectCollision):
+    snapshot_keys = ObjectAnimation.snapshot_keys + ("velocity", "rotation")
     _layer = 10
     _rotation_speed = 30
+    _turn_acceleration = 8
     _thrust_power = 1
+    _smoke_rate = 5
     __asset_key = "spaceship"
 
     def __init__(self, position):
@@ -46,6 +50,10 @@ class Spaceship(ObjectAnimation, ObjectHitbox, ObjectCollision):
         self.health = True
         self.__thrust = False
         self.__turn_direction: Literal[-1, 0, 1] = 0
+        # How far into the previous tick thrusting or turning started
+        self.__thrust_sub_tick = 0.0
+        self.__turn_sub_tick = 0.0
+        self.__smoke_to_release = 0.0
 
 
 
@@ -66,27 +74,20 @@ class Spaceship(ObjectAnimation, ObjectHitbox, ObjectCollision):
 
 
 
-    def get_data(self):
-        data = super().get_data()
-        data.update({"position": tuple(self.position),
-                     "velocity": tuple(self._velocity),
-                     "rotation": self._rotation})
-        return data
+    def get_snapshot(self):
+        return super().get_snapshot() + (tuple(self._velocity), self._rotation)
 
 
 
 
     def update(self) -> None:
         if self.__thrust:
-            self.accelerate(pg.Vector2(0, -self._thrust_power).rotate(self._rotation))
+            self.accelerate_over_tick(pg.Vector2(0, -self._thrust_power*(1+self.__thrust_sub_tick)).rotate(self._rotation))
             self.__release_smoke()
             self._queue_sound("entity.ship.boost", pg.math.clamp(abs(self._rotation-180)*0.002+0.4, 0, 0.8), True)
 
         if self.health:
-            if self._angular_vel*self.__turn_direction <= 0:
-                self._angular_vel = 0
-            if self.__turn_direction and abs(self._angular_vel) < self._rotation_speed:
-                self._angular_vel += 8*self.__turn_direction
+            self._angular_vel = self._get_next_angular_vel(self.__turn_direction, self.__turn_sub_tick)
         else:
             self._angular_vel = 0
 
@@ -102,16 +103,20 @@ class Spaceship(ObjectAnimation, ObjectHitbox, ObjectCollision):
 
         self.__thrust = False
         self.__turn_direction = 0
+        self.__thrust_sub_tick = 0.0
+        self.__turn_sub_tick = 0.0
                 
 
 
 
 
 
-    def shoot(self) -> PlayerBullet:
+    def shoot(self, sub_tick=0.0) -> PlayerBullet:
+        "Fires a bullet. `sub_tick` is how far into the previous tick the shot was fired."
         from .projectiles import PlayerBullet
         direction = self.get_rotation_vector()
         bullet = PlayerBullet(self.position+direction*12, direction, self.get_velocity())
+        bullet.advance(sub_tick)
         self.primary_group.add(bullet)
         if not self.__thrust:
             self.accelerate(-direction*0.5)
@@ -148,36 +153,72 @@ class Spaceship(ObjectAnimation, ObjectHitbox, ObjectCollision):
         super().force_kill()
 
 
-    def _thrust(self) -> None:
+    def _thrust(self, sub_tick=0.0) -> None:
         self.__thrust = True
+        self.__thrust_sub_tick = sub_tick
 
 
-    def _turn(self, direction: Literal[-1, 1]) -> None:
+    def _turn(self, direction: Literal[-1, 1], sub_tick=0.0) -> None:
         self.__turn_direction = sign(self.__turn_direction+direction)
+        self.__turn_sub_tick = max(self.__turn_sub_tick, sub_tick)
+
+
+    def _get_next_angular_vel(self, turn_direction: Literal[-1, 0, 1], sub_tick=0.0) -> float:
+        "Returns the angular velocity the ship would have after the next update if it turned in a direction."
+        # The ship stops speeding up after the first base tick its speed reaches the rotation speed
+        top_speed = math.ceil(self._rotation_speed/self._turn_acceleration)*self._turn_acceleration
+        angular_vel = self._angular_vel if self._angular_vel*turn_direction > 0 else 0
+        if turn_direction and abs(angular_vel) < top_speed:
+            angular_vel += time_units.per_tick(self._turn_acceleration)*turn_direction*(1+sub_tick)
+            angular_vel = pg.math.clamp(angular_vel, -top_speed, top_speed)
+        return angular_vel
 
     
 
     def __release_smoke(self) -> None:
-        for _ in range(5):
+        # Smoke is released at the same rate whatever the tick rate is
+        self.__smoke_to_release += time_units.per_tick(self._smoke_rate)
+        smoke_count = int(self.__smoke_to_release)
+        self.__smoke_to_release -= smoke_count
+
+        for _ in range(smoke_count):
             direction = self.get_rotation_vector()
             velocity = direction.rotate(random.randint(-15, 15))*random.randint(-15, -3)+self._velocity
-            position = self.position-direction*16+self._velocity
+            position = self.position-direction*16+time_units.per_tick(self._velocity)
             self.primary_group.add(ShipSmoke(position, velocity))
         
 
 
 
 
+class TurnPrediction(NamedTuple):
+    "How much further the player ship is shown turning because of input that hasn't been applied by a tick yet."
+    # The number of times the ship had been updated when the prediction was made
+    tick: int
+    turn: float
+
+
+
+
 class PlayerShip(Spaceship):
     distance_based_sound=False
     progress_save_key="player_spaceship"
+    snapshot_keys=Spaceship.snapshot_keys + ("powerups",)
     can_despawn=False
+    role="player"
 
     def __init__(self, position):
         super().__init__(position)
         from .powerups import PowerUpGroup
         self.__powerups = PowerUpGroup()
-        self.__invincibility_timer = Timer(1)
+        self.__invincibility_timer = Timer(1, wheel=TimerWheel.get_active())
+
+        # The actions the ship was last controlled with and the turning shown for input that hasn't
+        # been applied yet. The prediction is only replaced as a whole by the display thread.
+        self.__input_actions: ActionSnapshot | None = None
+        self.__updates = 0
+        self.__turn_prediction = TurnPrediction(0, 0.0)
+        self.__prev_shown_turn = 0.0
 
     
     @property
@@ -197,32 +238,36 @@ class PlayerShip(Spaceship):
         self._skip_animation_to_end()
 
 
-    def get_data(self):
-        data = super().get_data()
-        data.update({"powerups": [powerup.get_name() for powerup in self.__powerups]})
-        return data
+    def get_snapshot(self):
+        return super().get_snapshot() + (tuple(powerup.get_name() for powerup in self.__powerups),)
 
 
 
     def userinput(self, inputs: InputInterpreter):
-        if self.health and not inputs.keyboard_mouse.hold_keys[pg.KMOD_CTRL]:            
-            if inputs.check_input("ship_forward"):
-                self._thrust()
+        self.__input_actions = None
+        if self.health and not inputs.keyboard_mouse.hold_keys[pg.KMOD_CTRL]:
+            actions = self.__input_actions = inputs.actions
+            if actions.is_active("ship_forward"):
+                self._thrust(actions.get_sub_tick("ship_forward"))
 
-            if inputs.check_input("ship_left"):
-                self._turn(-1)
+            if actions.is_active("ship_left"):
+                self._turn(-1, actions.get_sub_tick("ship_left"))
 
-            if inputs.check_input("ship_right"):
-                self._turn(1)
+            if actions.is_active("ship_right"):
+                self._turn(1, actions.get_sub_tick("ship_right"))
             
-            if inputs.check_input("shoot") and self.alive():
-                self.shoot()
+            if actions.is_active("shoot") and self.alive():
+                self.shoot(actions.get_sub_tick("shoot"))
 
             self.__powerups.userinput(inputs)
 
     
     def update(self):
         super().update()
+        # A prediction made before the last update was for input that has already been applied
+        prediction = self.__turn_prediction
+        self.__prev_shown_turn = prediction.turn if prediction.tick == self.__updates else 0.0
+        self.__updates += 1
         self.__powerups.update(self)
         self._join_sound_queue(self.__powerups.clear_sound_queue())
 
@@ -235,14 +280,43 @@ class PlayerShip(Spaceship):
         self.__powerups.draw(self, surface, lerp_amount, offset)
 
 
-    def _thrust(self):
-        super()._thrust()
+    def _get_blit_angle(self, lerp_amount=0.0, rotation=0):
+        # The turning shown before the last tick fades out so the ship doesn't jump back when the tick is applied
+        return super()._get_blit_angle(lerp_amount, rotation) - self.__prev_shown_turn*(1-lerp_amount) - self.__predict_turn(lerp_amount)
+
+
+    def __predict_turn(self, lerp_amount: float) -> float:
+        """
+        Returns how much further the ship will turn because of turning input that has been received
+        since the last tick. This lets turning show up on the next frame instead of the next tick.
+        """
+        tick = self.__updates
+        input_actions = self.__input_actions
+        interpreter = InputInterpreter.get_current_instance()
+        turn = 0.0
+        if (self.health and input_actions is not None
+            and interpreter is not None and interpreter.actions is input_actions):
+            turn_direction = self.__get_turn_direction(interpreter.predicted_actions)
+            if turn_direction != self.__get_turn_direction(input_actions):
+                turn = time_units.per_tick(self._get_next_angular_vel(turn_direction)-self._angular_vel)*lerp_amount
+
+        self.__turn_prediction = TurnPrediction(tick, turn)
+        return turn
+
+
+    @staticmethod
+    def __get_turn_direction(actions: ActionSnapshot) -> Literal[-1, 0, 1]:
+        return actions.is_active("ship_right") - actions.is_active("ship_left")
+
+
+    def _thrust(self, sub_tick=0.0):
+        super()._thrust(sub_tick)
         controller_rumble("ship_thrusters", 0.25, True)
 
 
-    def shoot(self) -> PlayerBullet:
+    def shoot(self, sub_tick=0.0) -> PlayerBullet:
         controller_rumble("gun_fire")
-        return super().shoot()
+        return super().shoot(sub_tick)
 
 
     def do_collision(self):
@@ -251,7 +325,7 @@ class PlayerShip(Spaceship):
 
     
     def invincibility_frames(self, amount=30) -> None:
-        self.__invincibility_timer = Timer(amount).start()
+        self.__invincibility_timer = Timer(amount, wheel=TimerWheel.get_active()).start()
 
 
     def kill(self):
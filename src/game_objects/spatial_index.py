@@ -0,0 +1,199 @@
+"Contains the spatial index used to find the objects in a group that are nearest to a position."
+
+import pygame as pg
+import math
+import heapq
+from collections import defaultdict
+from typing import Callable
+
+from . import GameObject, ObjectGroup
+
+
+
+
+type Cell = tuple[int, int]
+# The order the object was added to the grid in, the object and where it was at the time
+type Entry = tuple[int, GameObject, tuple[float, float]]
+
+
+class Grid:
+    "The objects of one type in a group sorted into cells."
+
+    def __init__(self, cell_size: int):
+        self.cell_size = cell_size
+        self.cells: defaultdict[Cell, list[Entry]] = defaultdict(list)
+        self.count = 0
+        self.__bounds: tuple[int, int, int, int] | None = None
+
+
+    def add(self, obj: GameObject) -> None:
+        x, y = obj.position
+        self.cells[math.floor(x/self.cell_size), math.floor(y/self.cell_size)].append((self.count, obj, (x, y)))
+        self.count += 1
+        self.__bounds = None
+
+
+    def get_bounds(self) -> tuple[int, int, int, int]:
+        "Returns the smallest and largest x and y of the cells that have objects in them."
+        if self.__bounds is None:
+            xs = [cell_x for cell_x, _ in self.cells]
+            ys = [cell_y for _, cell_y in self.cells]
+            self.__bounds = min(xs), min(ys), max(xs), max(ys)
+        return self.__bounds
+
+
+
+
+class SpatialIndex:
+    """
+    Finds the objects in a group that are closest to a position.
+
+    The objects of a type are sorted into grid cells the first time that type is searched for in a
+    tick. Searches start from the cell the position is in and move outwards a ring of cells at a time,
+    stopping once no object in the cells left could be closer than the ones already found. If a ring
+    has more cells than there are objects, the rest of the objects are checked directly instead.
+
+    Positions are taken when a grid is built, so objects are found where they were at that point in
+    the tick. Objects added to the group afterwards are added to the grids that have been built, and
+    objects that have left the group are skipped.
+    """
+
+    CELL_SIZE = 64
+
+    def __init__(self, group: ObjectGroup):
+        self.__group = group
+        self.__grids: dict[type[GameObject], Grid] = {}
+
+        self.__queries = 0
+        self.__checks = 0
+
+
+    def invalidate(self) -> None:
+        "Clears the grids so they are rebuilt with the new positions of objects. Should be called once every tick before objects move."
+        self.__grids.clear()
+        self.__queries = 0
+        self.__checks = 0
+
+
+    def add_object(self, obj: GameObject) -> None:
+        "Adds an object that joined the group to the grids that have already been built."
+        for object_type, grid in self.__grids.items():
+            if isinstance(obj, object_type):
+                grid.add(obj)
+
+
+
+    def k_nearest[T: GameObject](self,
+                                 position: pg.typing.Point,
+                                 k: int,
+                                 object_type: type[T] = GameObject,
+                                 max_distance=math.inf,
+                                 condition: Callable[[T], bool] | None = None) -> list[T]:
+        """
+        Returns up to `k` objects of `object_type` within `max_distance` of `position`, nearest first.
+        Only objects that `condition` returns True for are included. Objects as far away as each other
+        are returned in group order.
+        """
+
+        self.__queries += 1
+        grid = self.__get_grid(object_type)
+        if not grid.count or k <= 0:
+            return []
+
+        x, y = position
+        cell_x, cell_y = math.floor(x/grid.cell_size), math.floor(y/grid.cell_size)
+        max_distance_squared = max_distance*max_distance
+        members = self.__group.spritedict
+        # The furthest of the nearest objects found so far is at the top
+        best: list[tuple[float, int, T]] = []
+
+        def check(entries: list[Entry]) -> None:
+            self.__checks += len(entries)
+            for order, obj, (obj_x, obj_y) in entries:
+                distance_squared = (obj_x-x)**2 + (obj_y-y)**2
+                if (distance_squared > max_distance_squared
+                    or (len(best) == k and (distance_squared, order) >= (-best[0][0], -best[0][1]))
+                    or obj not in members
+                    or (condition is not None and not condition(obj))):
+                    continue
+
+                if len(best) == k:
+                    heapq.heapreplace(best, (-distance_squared, -order, obj))
+                else:
+                    heapq.heappush(best, (-distance_squared, -order, obj))
+
+        min_x, min_y, max_x, max_y = grid.get_bounds()
+        last_ring = max(abs(cell_x-min_x), abs(cell_x-max_x), abs(cell_y-min_y), abs(cell_y-max_y))
+
+        for ring in range(last_ring+1):
+            if ring*8 > grid.count:
+                # The rest of the grid is quicker to check directly than cell by cell
+                for (other_x, other_y), entries in grid.cells.items():
+                    if max(abs(other_x-cell_x), abs(other_y-cell_y)) >= ring:
+                        check(entries)
+                break
+
+            for cell in self.__get_ring(cell_x, cell_y, ring):
+                if cell in grid.cells:
+                    check(grid.cells[cell])
+
+            # Objects in cells outside this ring are at least this far away
+            min_distance = ring*grid.cell_size
+            if min_distance*min_distance > max_distance_squared:
+                break
+            if len(best) == k and -best[0][0] <= min_distance*min_distance:
+                break
+
+        return [obj for _, _, obj in sorted(best, reverse=True)]
+
+
+    def nearest[T: GameObject](self,
+                               position: pg.typing.Point,
+                               object_type: type[T] = GameObject,
+                               max_distance=math.inf,
+                               condition: Callable[[T], bool] | None = None) -> T | None:
+        "Returns the object of `object_type` nearest to `position` that `condition` returns True for, or None if there isn't one within `max_distance`."
+        objects = self.k_nearest(position, 1, object_type, max_distance, condition)
+        if objects:
+            return objects[0]
+        else:
+            return None
+
+
+
+    def get_stats(self) -> tuple[int, int, int]:
+        "Returns the number of grids built, searches made and objects checked this tick."
+        return len(self.__grids), self.__queries, self.__checks
+
+
+    def debug_info(self) -> str:
+        grids, queries, checks = self.get_stats()
+        return f"spatial index: {grids} grids, {queries} queries, {checks} checks"
+
+
+
+    def __get_grid(self, object_type: type[GameObject]) -> Grid:
+        if object_type not in self.__grids:
+            grid = Grid(self.CELL_SIZE)
+            for obj in self.__group.sprites():
+                if isinstance(obj, object_type):
+                    grid.add(obj)
+            self.__grids[object_type] = grid
+
+        return self.__grids[object_type]
+
+
+    @staticmethod
+    def __get_ring(cell_x: int, cell_y: int, ring: int) -> list[Cell]:
+        "Returns the cells that are `ring` cells away from a cell."
+        if ring == 0:
+            return [(cell_x, cell_y)]
+
+        cells = []
+        for x in range(cell_x-ring, cell_x+ring+1):
+            cells.append((x, cell_y-ring))
+            cells.append((x, cell_y+ring))
+        for y in range(cell_y-ring+1, cell_y+ring):
+            cells.append((cell_x-ring, y))
+            cells.append((cell_x+ring, y))
+        return cells
@@ -2,10 +2,10 @@ import pygame as pg
 from pygame.locals import *
 
 from typing import Any, Literal, Self
-from collections import defaultdict
 
-from src.custom_types import TapKeys, HoldKeys, InputType, BindData, KeybindsType
+from src.custom_types import TapKeys, HoldKeys, KeyStates, InputType, KeybindsType, ActionSnapshot, TimedEvent
 from src.math_functions import sign
+from src import time_units
 
 from src.file_processing import load_json, data
 
@@ -39,17 +39,20 @@ def get_control_icon_name(action_name: str) -> str | None:
 
 class KeyboardMouse:
     def __init__(self) -> None:
-        self.__tap_keys: TapKeys = defaultdict(bool)
-        self.__hold_keys: HoldKeys = defaultdict(float)
+        self.__tap_keys: TapKeys = {}
+        self.__hold_keys: HoldKeys = {}
+        self.__tap_keys_view = KeyStates(self.__tap_keys, False)
+        self.__hold_keys_view = KeyStates(self.__hold_keys, 0.0)
 
     
     @property
-    def tap_keys(self) -> TapKeys:
-        return self.__tap_keys.copy()
+    def tap_keys(self) -> KeyStates[int | str, bool]:
+        return self.__tap_keys_view
     
     @property
-    def hold_keys(self) -> HoldKeys:
-        return self.__hold_keys.copy()
+    def hold_keys(self) -> KeyStates[int | str, float]:
+        "How long each key has been held for in base ticks."
+        return self.__hold_keys_view
     
 
 
@@ -57,7 +60,7 @@ class KeyboardMouse:
         self.__tap_keys.clear()
         for key, amount in self.__hold_keys.items():
             if amount:
-                self.__hold_keys[key] += 1
+                self.__hold_keys[key] += time_units.tick_scale()
         
         for event in events:
             if event.type == KEYDOWN:
@@ -104,8 +107,10 @@ class Controller:
         self.__mappings: dict[str, dict[str, Any]] = self.__get_mappings(working_name)
 
 
-        self.__tap_buttons: TapKeys = defaultdict(bool)
-        self.__hold_buttons: HoldKeys = defaultdict(int)
+        self.__tap_buttons: TapKeys = {}
+        self.__hold_buttons: HoldKeys = {}
+        self.__tap_buttons_view = KeyStates(self.__tap_buttons, False)
+        self.__hold_buttons_view = KeyStates(self.__hold_buttons, 0.0)
 
         self.__left_stick = pg.Vector2()
         self.__right_stick = pg.Vector2()
@@ -128,13 +133,18 @@ class Controller:
     def device_name(self) -> str:
         return self.__joystick.get_name()
 
+    def get_button_name(self, button: int) -> str | None:
+        "Returns the name of a button from its index or None if the button is not mapped."
+        return self.__mappings["buttons"].get(str(button))
+
 
     @property
-    def tap_buttons(self) -> TapKeys:
-        return self.__tap_buttons.copy()
+    def tap_buttons(self) -> KeyStates[str, bool]:
+        return self.__tap_buttons_view
     @property
-    def hold_buttons(self) -> HoldKeys:
-        return self.__hold_buttons.copy()
+    def hold_buttons(self) -> KeyStates[str, float]:
+        "How long each button has been held for in base ticks."
+        return self.__hold_buttons_view
     
     @property
     def left_stick(self) -> pg.Vector2:
@@ -157,13 +167,13 @@ class Controller:
         self.__tap_buttons.clear()
         for button, value in self.__hold_buttons.items():
             if value:
-                self.__hold_buttons[button] += 1
+                self.__hold_buttons[button] += time_units.tick_scale()
 
         for event in events:
             
             # Controller Buttons
             if event.type == JOYBUTTONDOWN:
-                button_name = self.__mappings["buttons"].get(str(event.button))
+                button_name = self.get_button_name(event.button)
 
                 if button_name is not None:
                     self.__tap_buttons[button_name] = True
@@ -171,7 +181,7 @@ class Controller:
                     self.__hold_buttons[button_name] = 1
                 
             elif event.type == JOYBUTTONUP:
-                button_name = self.__mappings["buttons"].get(str(event.button))
+                button_name = self.get_button_name(event.button)
 
                 if button_name is not None:
                     self.__hold_buttons[button_name] = 0
@@ -238,7 +248,7 @@ class Controller:
 
     def __set_button(self, button: str, pressed: bool) -> None:
         if pressed:
-            if not self.hold_buttons[button]:
+            if not self.__hold_buttons.get(button):
                 self.__tap_buttons[button] = True
                 self.__hold_buttons[button] = 1
         else:
@@ -296,16 +306,17 @@ class Controller:
         
         self.__rumble_queue.clear()
 
-        prev_time = -1
+        # Pattern times are in base ticks and the queue is played one entry per tick
+        prev_ticks = 0
         for time, values in self.__rumble_patterns[pattern_name].items():
-            time = int(time)
+            ticks = round(time_units.to_ticks(int(time)+1))
             working_values = values.copy()
             working_values[0] *= intensity
             working_values[1] *= intensity
-            for _ in range(time-prev_time):
+            for _ in range(ticks-prev_ticks):
                 self.__rumble_queue.append(working_values)
             
-            prev_time = time
+            prev_ticks = ticks
 
 
     
@@ -336,11 +347,31 @@ class InputInterpreter:
     __action_icons = load_json(f"{INPUT_DETAILS_DIR}/action_icons")
     __current_instance: "InputInterpreter | None" = None
 
+    # Keybinds compiled into lookup tables of the actions (as bits) each key or button triggers
+    __action_bits: dict[str, int] = {}
+    __key_taps: dict[int, int] = {}
+    __key_holds: dict[int, list[tuple[int, int]]] = {}
+    __button_taps: dict[str, int] = {}
+    __button_holds: dict[str, list[tuple[int, int]]] = {}
+    __analog_binds: list[tuple[int, float, int]] = []
+    # Actions that become active as soon as a key or button is pressed
+    __key_presses: dict[int, int] = {}
+    __button_presses: dict[str, int] = {}
+    __analog_indexes = {("stick", "left", "x"): 0, ("stick", "left", "y"): 1,
+                        ("stick", "right", "x"): 2, ("stick", "right", "y"): 3,
+                        ("trigger", "left", None): 4, ("trigger", "right", None): 5}
+
     def __init__(self, keyboard_mouse: KeyboardMouse, controller: Controller | None):
         self.__current_input_type: InputType
 
         self.__keyboard_mouse = keyboard_mouse
         self.controller = controller
+
+        if not self.__action_bits:
+            self.__compile_keybinds()
+        self.__snapshot = ActionSnapshot(0, self.__action_bits)
+        self.__predicted_actions = 0
+        self.__press_times: list[float] = []
         
         type(self).__current_instance = self
 
@@ -376,16 +407,63 @@ class InputInterpreter:
 
 
     
+    @property
+    def actions(self) -> ActionSnapshot:
+        "The state of all actions in the current tick."
+        return self.__snapshot
+
+    @property
+    def predicted_actions(self) -> ActionSnapshot:
+        "The state of all actions including input received since the current tick. Only used for visuals."
+        return ActionSnapshot(self.__predicted_actions, self.__action_bits)
+
+    @property
+    def press_times(self) -> tuple[float, ...]:
+        "The times of all key and button presses that were processed in the current tick."
+        return tuple(self.__press_times)
+
+
     def get_keybind_names(self) -> list[str]:
         return list(self.__keybinds.keys())
-    
 
 
-    def __get_bind_options(self, action_name: str) -> list[BindData]:
-        if action_name not in self.__keybinds:
-            raise ValueError(f"Invalid action_name '{action_name}'")
-        else:
-            return self.__keybinds[action_name]
+
+    @classmethod
+    def __compile_keybinds(cls) -> None:
+        "Converts the keybinds into lookup tables so that all actions can be checked at once each tick."
+        for index, (action_name, bind_options) in enumerate(cls.__keybinds.items()):
+            action_bit = 1 << index
+            cls.__action_bits[action_name] = action_bit
+
+            for bind_data in bind_options:
+                threshold = bind_data.get("threshold", 0)
+
+                if bind_data["input_device"] == "keyboard_mouse":
+                    key_code = pg.key.key_code(bind_data["key"])
+                    if bind_data["type"] == "hold":
+                        cls.__key_holds.setdefault(key_code, []).append((threshold, action_bit))
+                    else:
+                        cls.__key_taps[key_code] = cls.__key_taps.get(key_code, 0) | action_bit
+
+                    if bind_data["type"] != "hold" or threshold == 0:
+                        cls.__key_presses[key_code] = cls.__key_presses.get(key_code, 0) | action_bit
+
+                elif bind_data["input_device"] == "controller":
+                    match bind_data["type"]:
+                        case "tap_button":
+                            button = bind_data["value"]
+                            cls.__button_taps[button] = cls.__button_taps.get(button, 0) | action_bit
+                            cls.__button_presses[button] = cls.__button_presses.get(button, 0) | action_bit
+
+                        case "hold_button":
+                            button = bind_data["value"]
+                            cls.__button_holds.setdefault(button, []).append((threshold, action_bit))
+                            if threshold == 0:
+                                cls.__button_presses[button] = cls.__button_presses.get(button, 0) | action_bit
+
+                        case "stick" | "trigger":
+                            analog_index = cls.__analog_indexes[(bind_data["type"], bind_data["side"], bind_data.get("axis"))]
+                            cls.__analog_binds.append((analog_index, bind_data["value"], action_bit))
 
     
 
@@ -400,45 +478,104 @@ class InputInterpreter:
             if self.__controller.tap_buttons["any"]:
                 self.__current_input_type = "controller"
 
+        self.__snapshot = self.__evaluate_actions()
+        self.__predicted_actions = self.__snapshot.actions
+        self.__press_times.clear()
 
-    def check_input(self, action_name: str) -> bool:
-        result = False
-
-        for bind_data in self.__get_bind_options(action_name):
-            if bind_data["input_device"] == "keyboard_mouse":
-                key_code = pg.key.key_code(bind_data["key"])
-                if bind_data["type"] == "hold":
-                    result = self.__keyboard_mouse.hold_keys[key_code] > bind_data.get("threshold", 0)
-                else:
-                    result = self.__keyboard_mouse.tap_keys[key_code]
-        
 
-            elif bind_data["input_device"] == "controller" and self.controller is not None:
-                match bind_data["type"]:
-                    case "tap_button":
-                        result = self.__controller.tap_buttons[bind_data["value"]]
-                    
-                    case "hold_button":
-                        result = self.__controller.hold_buttons[bind_data["value"]] > bind_data.get("threshold", 0)
-
-                    case "stick" | "trigger":
-                        side = bind_data["side"]
-                        target_value = bind_data["value"]
-
-                        if bind_data["type"] == "stick":
-                            axis = bind_data["axis"]
-                            stick_value = self.__controller.get_stick_value(side, axis)
-                        elif side == "right":
-                            stick_value = self.__controller.right_trigger
-                        else:
-                            stick_value = self.__controller.left_trigger
+    def get_timed_userinput(self, timed_events: list[TimedEvent], tick_time: float, tick_rate: float) -> None:
+        """
+        Processes input the same way as `get_userinput` but also works out how far into the previous
+        tick each action was pressed so that actions can be applied as if they happened at that time.
+        """
+        self.get_userinput([timed_event.event for timed_event in timed_events])
 
-                        result = abs(stick_value) > abs(target_value) and sign(stick_value) == sign(target_value)
-        
-            if result:
-                return True
+        sub_ticks: dict[int, float] = {}
+        for event_time, event in timed_events:
+            press_bits = self.__get_press_bits(event)
+            if not press_bits:
+                continue
+
+            self.__press_times.append(event_time)
+            sub_tick = pg.math.clamp((tick_time-event_time)*tick_rate, 0, 1)
+            for action_bit in self.__action_bits.values():
+                if press_bits & action_bit & self.__snapshot.actions:
+                    sub_ticks[action_bit] = max(sub_ticks.get(action_bit, 0.0), sub_tick)
+
+        if sub_ticks:
+            self.__snapshot = self.__snapshot._replace(sub_ticks=sub_ticks)
 
-        return False
+
+    def predict_actions(self, events: list[pg.Event]) -> None:
+        """
+        Updates the predicted actions with events that have not been processed by a tick yet. This
+        is called by the display thread so that input can be shown before the tick that applies it.
+        """
+        predicted_actions = self.__predicted_actions
+        for event in events:
+            if event.type == KEYDOWN or event.type == JOYBUTTONDOWN:
+                predicted_actions |= self.__get_press_bits(event)
+
+            elif event.type == KEYUP:
+                for _, action_bit in self.__key_holds.get(event.key, ()):
+                    predicted_actions &= ~action_bit
+
+            elif event.type == JOYBUTTONUP and self.__controller is not None:
+                for _, action_bit in self.__button_holds.get(self.__controller.get_button_name(event.button), ()):
+                    predicted_actions &= ~action_bit
+
+        self.__predicted_actions = predicted_actions
+
+
+    def __get_press_bits(self, event: pg.Event) -> int:
+        "Returns the actions that become active straight away from a key or button press."
+        if event.type == KEYDOWN:
+            return self.__key_presses.get(event.key, 0)
+        if event.type == JOYBUTTONDOWN and self.__controller is not None:
+            return self.__button_presses.get(self.__controller.get_button_name(event.button), 0)
+        return 0
+
+
+
+    def __evaluate_actions(self) -> ActionSnapshot:
+        "Works out which actions are active from the keys and buttons that are pressed."
+        actions = 0
+        for key, pressed in self.__keyboard_mouse.tap_keys.items():
+            if pressed:
+                actions |= self.__key_taps.get(key, 0)
+
+        for key, hold_time in self.__keyboard_mouse.hold_keys.items():
+            for threshold, action_bit in self.__key_holds.get(key, ()):
+                if hold_time > threshold:
+                    actions |= action_bit
+
+        if self.__controller is None:
+            return ActionSnapshot(actions, self.__action_bits)
+
+        for button, pressed in self.__controller.tap_buttons.items():
+            if pressed:
+                actions |= self.__button_taps.get(button, 0)
+
+        for button, hold_time in self.__controller.hold_buttons.items():
+            for threshold, action_bit in self.__button_holds.get(button, ()):
+                if hold_time > threshold:
+                    actions |= action_bit
+
+        left_stick = tuple(self.__controller.left_stick)
+        right_stick = tuple(self.__controller.right_stick)
+        analog_values = (*left_stick, *right_stick, self.__controller.left_trigger, self.__controller.right_trigger)
+        for analog_index, target_value, action_bit in self.__analog_binds:
+            value = analog_values[analog_index]
+            if abs(value) > abs(target_value) and sign(value) == sign(target_value):
+                actions |= action_bit
+
+        return ActionSnapshot(actions, self.__action_bits, left_stick, right_stick,
+                              self.__controller.left_trigger, self.__controller.right_trigger)
+
+
+    def check_input(self, action_name: str) -> bool:
+        "Returns True if an action is active in the current tick."
+        return self.__snapshot.is_active(action_name)
     
 
 
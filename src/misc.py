@@ -1,7 +1,6 @@
 "Other stuff that I didn't know where else to put."
 
 
-import random
 import debug
 
 
@@ -28,11 +27,6 @@ def level_completion_amount(score: int, score_range: tuple[int, int]) -> float:
     return (score-score_range[0])/(score_range[1]-score_range[0])
 
 
-def weighted_choice[T](choices: tuple[list[T], list[int]]) -> T:
-    return random.choices(*choices)[0]
-
-
-
 def set_console_style(*style_codes: int) -> None:
     if not style_codes:
         style_codes = (0,)
@@ -7,6 +7,7 @@ from src.misc import increment_score, get_start_level
 from src.custom_types import LevelData
 from src.input_device import InputInterpreter
 from src.file_processing import data
+from src import time_units
 
 from src.ui import blit_to_center, font, effects, elements, hud
 
@@ -61,12 +62,7 @@ class TitleScreen(State):
 
                 # The game will start once the player presses one of the controls
                 if (not inputs.keyboard_mouse.hold_keys[pg.KMOD_CTRL]
-                    and (inputs.check_input("select")
-                         or inputs.check_input("ship_forward")
-                         or inputs.check_input("shoot")
-                         or inputs.check_input("ship_left")
-                         or inputs.check_input("ship_right"))
-                    ):
+                    and inputs.actions.any_active("select", "ship_forward", "shoot", "ship_left", "ship_right")):
                     self.__start_gameplay = True
                     self.title.set_effect("main_exit")
                 
@@ -347,7 +343,7 @@ class GameOverScreen(State):
             self.state_stack.pop()
             self.state_stack.push(ShowScore(self.__level_name, self.__score_data))
         else:
-            self.__timer -= 1
+            self.__timer = max(self.__timer-time_units.tick_scale(), 0)
 
 
     def draw(self, surface, lerp_amount=0):
@@ -405,7 +401,7 @@ class ShowScore(State):
             self.display_score = increment_score(self.display_score, self.score, 0.15)
             self._queue_sound("game.point", 0.3)
         elif self.__timer:
-            self.__timer -= 1
+            self.__timer = max(self.__timer-time_units.tick_scale(), 0)
 
 
 
@@ -1,12 +1,14 @@
 import pygame as pg
 import math
 import random
+from time import perf_counter
 from typing import Self
 
 import debug
 
-from src.custom_types import Timer, SaveData
+from src.custom_types import Timer, TimerWheel, SaveData, ProgressSnapshot
 from src.file_processing import assets, data
+from src.audio.music import MusicManager
 
 from src.game_objects import (
     GameObject, ObjectGroup, asteroids, camera, components, enemies, powerups, projectiles, spaceship, particles
@@ -32,6 +34,7 @@ class Play(State):
     _despawn_radius = 500
     _player_respawn_radius = 250
     _player_max_lives = 3
+    _music_fade_time = 1.0
 
     __max_combo = 30
 
@@ -44,9 +47,11 @@ class Play(State):
         self.__score_limit = None
         self.__save_progress = True
     
-        self._object_spawn_delay = Timer(15)
-        self._game_over_timer = Timer(40, False, self._game_over)
-        self._respawn_timer = Timer(25, False, self._respawn_player)
+        # Counts down the timers of the state and of objects created while it is active
+        self.timer_wheel = TimerWheel()
+        self._object_spawn_delay = Timer(15, wheel=self.timer_wheel)
+        self._game_over_timer = Timer(40, False, self._game_over, self.timer_wheel)
+        self._respawn_timer = Timer(25, False, self._respawn_player, self.timer_wheel)
         self._player_lives = self._player_max_lives
         self._score = 0
         self._point_combo = 1.0
@@ -55,10 +60,11 @@ class Play(State):
     def __init__(self):
         super().__init__()
         self._setup()
-        self._setup_game_objects()
+        with self.timer_wheel.activate():
+            self._setup_game_objects()
 
-        self.spaceship = spaceship.PlayerShip((0, 0))
-        self.entities.add(self.spaceship)
+            self.spaceship = spaceship.PlayerShip((0, 0))
+            self.entities.add(self.spaceship)
     
 
     @property
@@ -75,9 +81,9 @@ class Play(State):
         self = cls.__new__(cls)
         super().__init__(self)
         self._setup()
-        self._setup_game_objects()
-
-        self.__load_objects_from_save(save_data.entity_data)
+        with self.timer_wheel.activate():
+            self._setup_game_objects()
+            self.__load_objects_from_save(save_data.entity_data)
         self.camera.set_position(save_data.camera_pos)
         self._score = save_data.score
         self._player_lives = save_data.player_lives
@@ -122,6 +128,25 @@ class Play(State):
         self.__background_tint = self._level_data.background_tint
         self.__score_limit = self._level_data.score_range[1]
 
+        self.__setup_level_music()
+
+
+
+    def __setup_level_music(self) -> None:
+        "Plays the music of the current level and prefetches the music of the next level."
+
+        if self._level_data.music is not None and MusicManager.get_track_name() != self._level_data.music:
+            MusicManager.play(self._level_data.music, fade=self._music_fade_time)
+
+        if self._level_data.next_level is not None:
+            try:
+                next_music = data.load_level(self._level_data.next_level).music
+            except FileNotFoundError:
+                next_music = None
+
+            if next_music is not None and next_music != self._level_data.music:
+                MusicManager.prefetch(next_music)
+
 
 
     def __load_objects_from_save(self, entity_data: list[dict]) -> None:
@@ -129,20 +154,19 @@ class Play(State):
         Loads all objects from a save data's entity data attribute. _setup_game_objects
         must have been called beforehand.
         """
-        object_dict = {}
         self.spaceship = None
 
-        for entity_data in entity_data:
-            entity = GameObject.init_from_data(entity_data)
-            self.entities.add(entity)
-            if isinstance(entity, asteroids.Asteroid):
-                self.asteroids.add(entity)
-            if isinstance(entity, powerups.PowerupCollectable):
-                self.powerups.add(entity)
-            elif isinstance(entity, spaceship.PlayerShip):
-                self.spaceship = entity
+        entities = GameObject.init_all_from_data(entity_data)
+        object_dict = {data["id"]: entity for data, entity in zip(entity_data, entities)}
+
+        # Entities are added to groups in bulk rather than one at a time
+        self.entities.add(*entities)
+        self.asteroids.add(*(entity for entity in entities if isinstance(entity, asteroids.Asteroid)))
+        self.powerups.add(*(entity for entity in entities if isinstance(entity, powerups.PowerupCollectable)))
 
-            object_dict[entity_data["id"]] = entity
+        for entity in entities:
+            if isinstance(entity, spaceship.PlayerShip):
+                self.spaceship = entity
         
         if self.spaceship is None:
             self.can_save_progress(False)
@@ -192,20 +216,18 @@ class Play(State):
 
 
     def update(self):
-        if not self._game_over_timer.complete or not self._respawn_timer.complete:
-            self.entities.update(self.camera.position, (components.Obstacle, powerups.PowerupCollectable))
-            for obj in self.asteroids.sprites() + self.enemies.sprites():
-                if not obj.has_health():
-                    obj.update()
-        elif self._player_lives:
-            self._game_loop()
+        with self.timer_wheel.activate():
+            self.timer_wheel.update()
+            if not self._game_over_timer.complete or not self._respawn_timer.complete:
+                self.entities.update(self.camera.position, (components.Obstacle, powerups.PowerupCollectable))
+                for obj in self.asteroids.sprites() + self.enemies.sprites():
+                    if not obj.has_health():
+                        obj.update()
+            elif self._player_lives:
+                self._game_loop()
 
         self._join_sound_queue(self.entities.clear_sound_queue())
 
-        self._object_spawn_delay.update()
-        self._game_over_timer.update()
-        self._respawn_timer.update()
-
 
 
 
@@ -379,10 +401,13 @@ class Play(State):
 
 
 
+    def _get_object_spawn_distance(self) -> float:
+        "Returns how far from the camera objects spawn so that they spawn offscreen."
+        return (self._spawn_radius+self.spaceship.get_speed()*0.3)*math.sqrt(2)
+
     def _get_object_spawn_pos(self) -> pg.Vector2:
         "Returns a random position for objects like asteroids and powerups to spawn offscreen."
-        distance_from_center = self._spawn_radius+self.spaceship.get_speed()*0.3
-        return self.camera.position + pg.Vector2(distance_from_center).rotate(random.randint(0, 360))
+        return self.camera.position + pg.Vector2(0, -self._get_object_spawn_distance()).rotate(random.randint(0, 360))
     
 
     def _get_object_spawn_velocity(self, start_pos: pg.typing.Point, magnitude: float) -> pg.Vector2:
@@ -402,16 +427,27 @@ class Play(State):
             self.spaceship.set_position(respawn_pos)
 
 
-        entity_data = [entity.get_data()
-                       for entity in self.entities.sprites()
-                       
-                       if entity.progress_save_key is not None]
-        
-        save_data = SaveData(self._level_data.level_name,
-                             self._score,
-                             self._point_combo,
-                             self._player_lives,
-                             tuple(self.camera.position),
-                             entity_data)
-
-        data.save_progress(save_data)
\ No newline at end of file
+        data.save_progress(self._take_snapshot())
+
+
+
+    def _take_snapshot(self, time_limit: float | None = None) -> ProgressSnapshot | None:
+        "Copies the current state of the game. Returns None if copying takes longer than `time_limit` seconds."
+
+        start_time = perf_counter()
+        entity_snapshots = []
+
+        for count, entity in enumerate(self.entities.sprites(), 1):
+            if entity.progress_save_key is not None:
+                entity_snapshots.append((entity.snapshot_keys, entity.get_snapshot()))
+
+            # Time is only checked every few entities as it takes longer than copying one
+            if time_limit is not None and not count % 64 and perf_counter()-start_time > time_limit:
+                return None
+
+        return ProgressSnapshot(self._level_data.level_name,
+                                self._score,
+                                self._point_combo,
+                                self._player_lives,
+                                tuple(self.camera.position),
+                                entity_snapshots)
\ No newline at end of file
@@ -8,17 +8,20 @@ from typing import Self
 import config
 import debug
 
-from src.misc import increment_score, level_completion_amount, weighted_choice
+from src.misc import increment_score, level_completion_amount
 from src.custom_types import SaveData, Timer
 from src.file_processing import data
+from src import time_units
+from src.file_processing.autosave import Autosave
 
-from src.game_objects import asteroids, components, enemies, powerups
+from src.game_objects import asteroids, components, enemies, powerups, spaceship
 
 from src.ui import font, hud
 
 from .menus import GameOverScreen
 from .visuals import ShowText
 from .play import Play
+from .spawning import SpawnDirector
 
 
 
@@ -105,6 +108,16 @@ class PlayLevel(Play):
         self.__lvl_transition_timer = Timer(60)
         self.__level_cleared = False
         self.__lives_indicator = hud.LivesIndicator(self._player_max_lives)
+        self.__autosave = Autosave(self._take_snapshot, int(data.get_setting("autosave_interval")*config.BASE_TICKRATE))
+
+
+    def _setup_game_objects(self):
+        super()._setup_game_objects()
+        self.__spawn_director = SpawnDirector(
+            self.asteroids,
+            self._spawn_radius,
+            asteroids.Asteroid._max_speed + spaceship.PlayerShip._max_speed
+        )
 
 
     
@@ -126,6 +139,7 @@ class PlayLevel(Play):
             super().update()
             self.__process_score()
             self.__hud_timer.update()
+            self.__autosave.update(self.is_saving_progress and self._respawn_timer.complete)
             
 
 
@@ -152,8 +166,17 @@ class PlayLevel(Play):
 
 
     def debug_info(self) -> str | None:
-        return f"""level: {self._level_data.level_name}, entity count: {self.entities.count()}, asteroids_density: {self.__asteroid_density()}/{self.__required_asteroid_density()}, camera: ({self.camera.position.x:.0f}, {self.camera.position.y:.0f})
-score: {self._score}, combo: {self._point_combo:.1f}, lives: {self._player_lives}"""
+        return f"""level: {self._level_data.level_name}, entity count: {self.entities.count()}, asteroids_density: {self.__spawn_director.density}/{self.__required_asteroid_density()}, camera: ({self.camera.position.x:.0f}, {self.camera.position.y:.0f})
+score: {self._score}, combo: {self._point_combo:.1f}, lives: {self._player_lives}
+{self.__spawn_director.debug_info()}
+{self.entities.simulation_lod.debug_info()}
+{self.entities.update_scheduler.debug_info()}
+{self.timer_wheel.debug_info()}
+{self.entities.collision_solver.debug_info()}
+{self.entities.projectile_manager.debug_info()}
+{self.entities.spatial_index.debug_info()}
+{self.entities.flow_field.debug_info()}
+{self.__autosave.debug_info()}"""
 
 
 
@@ -192,6 +215,8 @@ score: {self._score}, combo: {self._point_combo:.1f}, lives: {self._player_lives
 
 
     def _game_loop(self):
+        self.__spawn_director.update(self.spaceship.position)
+
         if not self.__level_cleared:
             self.__do_object_spawning()            
             
@@ -267,30 +292,19 @@ score: {self._score}, combo: {self._point_combo:.1f}, lives: {self._player_lives
         "Returns wether an asteroid should spawn in the tick."
         return (self._level_data.spawn_asteroids
                 and self._object_spawn_delay.complete
-                and self.__required_asteroid_density() > self.__asteroid_density()
-                and random.random() < self._level_data.asteroid_frequency)
+                and self.__required_asteroid_density() > self.__spawn_director.density
+                and random.random() < time_units.chance(self._level_data.asteroid_frequency))
 
 
     def __spawn_asteroid(self) -> None:
-        spawn_pos = self._get_object_spawn_pos()
-        velocity = self._get_object_spawn_velocity(spawn_pos, self.__get_asteroid_speed())
-        asteroid_id = weighted_choice(self._level_data.asteroid_spawn_weights)
+        asteroid_id = self._level_data.asteroid_spawn_weights.choose()
+        asteroid = asteroids.Asteroid((0, 0), (0, 0), asteroid_id)
 
-        asteroid = asteroids.Asteroid(
-            spawn_pos,
-            velocity,
-            asteroid_id
-        )
-
-        for a in self.asteroids.sprites():
-            if asteroid.collides_with(a):
-                try:
-                    return self.__spawn_asteroid()
-                except RecursionError:
-                    print(f"Failed to spawn asteroid a {spawn_pos}")
-                    return None
-
-        self.asteroids.add(asteroid)
+        # If there is no space the asteroid will try to spawn again in a later tick
+        spawn_pos = self.__spawn_director.find_spawn_pos(asteroid, self.camera.position, self._get_object_spawn_distance())
+        if spawn_pos is not None:
+            asteroid.set_velocity(self._get_object_spawn_velocity(spawn_pos, self.__get_asteroid_speed()))
+            self.asteroids.add(asteroid)
 
 
     def __should_spawn_enemy(self) -> bool:
@@ -298,7 +312,7 @@ score: {self._score}, combo: {self._point_combo:.1f}, lives: {self._player_lives
         return (self._level_data.spawn_enemies
                 and self._object_spawn_delay.complete
                 and self.enemies.count() < self._level_data.enemy_count
-                and random.random() < self._level_data.enemy_frequency)
+                and random.random() < time_units.chance(self._level_data.enemy_frequency))
 
 
     def __spawn_enemy(self) -> None:
@@ -311,11 +325,11 @@ score: {self._score}, combo: {self._point_combo:.1f}, lives: {self._player_lives
         return (self._level_data.spawn_powerups
                 and self._object_spawn_delay.complete
                 and self.powerups.count() == 0
-                and random.random() < self._level_data.powerup_frequency)
+                and random.random() < time_units.chance(self._level_data.powerup_frequency))
 
 
     def __spawn_powerup(self) -> None:
-        powerups_name = weighted_choice(self._level_data.powerup_spawn_weights)
+        powerups_name = self._level_data.powerup_spawn_weights.choose()
         if not self.spaceship.has_powerup(powerups_name):
             spawn_pos = self._get_object_spawn_pos()
             velocity = self._get_object_spawn_velocity(spawn_pos, 2)
@@ -353,12 +367,6 @@ score: {self._score}, combo: {self._point_combo:.1f}, lives: {self._player_lives
         return asteroid_speed
     
 
-    def __asteroid_density(self) -> int:
-        "The sum of the sizes of all asteroids loaded in."
-        return sum(asteroid.size for asteroid in self.asteroids if asteroid.within_distance(self.spaceship, self._spawn_radius))
-                
-    
-
     def __set_score(self) -> None:
         "Updates the score to match the value stored in the spaceship object. Changes highscore if score is larger."
         self.__display_score = self._score
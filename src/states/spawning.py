@@ -0,0 +1,199 @@
+"Contains the spawn director that tracks how crowded the area around the player is and finds places to spawn objects."
+
+import pygame as pg
+import math
+import random
+from collections import defaultdict
+
+from src import time_units
+from src.game_objects import ObjectGroup
+from src.game_objects.components import ObjectCollision
+
+
+
+
+class SpawnDirector:
+    """
+    Keeps a running total of the sizes of objects within a radius (the spawn ring) and finds
+    places to spawn new objects that don't overlap existing ones.
+
+    Objects are only checked again when they could have crossed the edge of the spawn ring based
+    on how far from the edge they were and how fast they and the center can move. The total is
+    recounted every so often in case objects were moved by something other than their velocity.
+    Finding spawn positions has a limited amount of work it can do every tick so spawning
+    never makes a tick take much longer.
+    """
+
+    RESYNC_INTERVAL = 40
+    CANDIDATE_COUNT = 8
+    WORK_BUDGET = 256
+    CELL_SIZE = 64
+
+    def __init__(self, group: ObjectGroup, radius: float, max_relative_speed: float):
+        self.__group = group
+        self.__radius = radius
+        # The furthest an object can move relative to the center in a base tick
+        self.__max_relative_speed = max_relative_speed
+
+        self.__tick = 0
+        self.__center: pg.Vector2 | None = None
+        self.__density = 0
+        # Whether each tracked object is inside the spawn ring
+        self.__tracked: dict[ObjectCollision, bool] = {}
+        self.__checks_due: defaultdict[int, list[ObjectCollision]] = defaultdict(list)
+
+        self.__work_left = self.WORK_BUDGET
+        self.__grid: dict[tuple[int, int], list[ObjectCollision]] | None = None
+        self.__max_radius = 0.0
+
+        self.__checks = 0
+        self.__spawns = 0
+        self.__failed_spawns = 0
+        self.__over_budget = 0
+
+
+    @property
+    def density(self) -> int:
+        "The sum of the sizes of all objects within the spawn ring."
+        return self.__density
+
+
+
+    def update(self, center: pg.typing.Point) -> None:
+        "Updates the density of the spawn ring around `center`. Should be called once every tick."
+        center = pg.Vector2(center)
+        self.__tick += 1
+        self.__work_left = self.WORK_BUDGET
+        self.__grid = None
+        self.__checks = 0
+
+        max_distance_moved = time_units.per_tick(self.__max_relative_speed)
+        resync_interval = max(round(time_units.to_ticks(self.RESYNC_INTERVAL)), 1)
+
+        if (self.__center is None
+            or self.__tick%resync_interval == 0
+            or not self.__center.distance_squared_to(center) <= max_distance_moved**2):
+            self.__center = center
+            self.__recount()
+            return
+
+        self.__center = center
+        members = self.__group.spritedict.keys()
+
+        for obj in self.__tracked.keys() - members:
+            if self.__tracked.pop(obj):
+                self.__density -= obj.size
+
+        for obj in members - self.__tracked.keys():
+            self.__tracked[obj] = False
+            self.__check(obj)
+
+        for obj in self.__checks_due.pop(self.__tick, ()):
+            if obj in self.__tracked:
+                self.__check(obj)
+
+
+
+    def find_spawn_pos(self, obj: ObjectCollision, center: pg.typing.Point, distance: float) -> pg.Vector2 | None:
+        """
+        Tries to find a position `distance` away from `center` where `obj` would not overlap any
+        objects in the group. The object is moved to the position if one is found. Returns None if
+        there is no space or if there is no work left for the current tick.
+        """
+
+        grid = self.__get_grid()
+        for candidate in self.get_ring_candidates(center, distance, self.CANDIDATE_COUNT):
+            if self.__work_left <= 0:
+                self.__over_budget += 1
+                return None
+
+            obj.set_position(candidate)
+            if not self.__overlaps(obj, grid):
+                self.__spawns += 1
+                grid[self.__get_cell(candidate)].append(obj)
+                self.__max_radius = max(self.__max_radius, obj.radius)
+                return candidate
+
+        self.__failed_spawns += 1
+        return None
+
+
+    @staticmethod
+    def get_ring_candidates(center: pg.typing.Point, distance: float, count: int) -> list[pg.Vector2]:
+        """
+        Returns spread out random positions on a circle. The circle is split into equal arcs with
+        one position in each arc so positions are never bunched up. Positions are in a random order.
+        """
+        arc = 360/count
+        offset = random.uniform(0, 360)
+        candidates = [pg.Vector2(center) + pg.Vector2(0, -distance).rotate(offset + arc*(i+random.random()))
+                      for i in range(count)]
+        random.shuffle(candidates)
+        return candidates
+
+
+
+    def get_stats(self) -> tuple[int, int, int, int]:
+        "Returns the number of spawns, failed spawns, spawns stopped by the work budget and objects checked this tick."
+        return self.__spawns, self.__failed_spawns, self.__over_budget, self.__checks
+
+
+    def debug_info(self) -> str:
+        spawns, failed_spawns, over_budget, checks = self.get_stats()
+        return f"spawns: {spawns}, failed: {failed_spawns}, over budget: {over_budget}, density checks: {checks}/{len(self.__tracked)}"
+
+
+
+    def __recount(self) -> None:
+        self.__tracked.clear()
+        self.__checks_due.clear()
+        self.__density = 0
+        for obj in self.__group.spritedict:
+            self.__tracked[obj] = False
+            self.__check(obj)
+
+
+    def __check(self, obj: ObjectCollision) -> None:
+        "Updates whether an object is in the spawn ring and works out when it could next cross the edge of the ring."
+        self.__checks += 1
+        distance = obj.position.distance_to(self.__center)
+        in_ring = distance <= self.__radius
+
+        if in_ring != self.__tracked[obj]:
+            self.__tracked[obj] = in_ring
+            self.__density += obj.size if in_ring else -obj.size
+
+        ticks_until_edge = int(abs(distance-self.__radius)/time_units.per_tick(self.__max_relative_speed))
+        self.__checks_due[self.__tick+max(ticks_until_edge, 1)].append(obj)
+
+
+
+    def __get_grid(self) -> dict[tuple[int, int], list[ObjectCollision]]:
+        "Puts the objects in the group into grid cells so only nearby objects are tested for overlaps."
+        if self.__grid is None:
+            self.__grid = defaultdict(list)
+            self.__max_radius = 0.0
+            for obj in self.__group.spritedict:
+                self.__grid[self.__get_cell(obj.position)].append(obj)
+                self.__max_radius = max(self.__max_radius, obj.radius)
+
+        return self.__grid
+
+
+    def __get_cell(self, position: pg.typing.Point) -> tuple[int, int]:
+        return math.floor(position[0]/self.CELL_SIZE), math.floor(position[1]/self.CELL_SIZE)
+
+
+    def __overlaps(self, obj: ObjectCollision, grid: dict[tuple[int, int], list[ObjectCollision]]) -> bool:
+        # Large objects can overlap objects more than one cell away
+        reach = math.ceil((obj.radius+self.__max_radius)/self.CELL_SIZE)
+        cell_x, cell_y = self.__get_cell(obj.position)
+
+        for x in range(cell_x-reach, cell_x+reach+1):
+            for y in range(cell_y-reach, cell_y+reach+1):
+                for other in grid.get((x, y), ()):
+                    self.__work_left -= 1
+                    if other is not obj and obj.collides_with(other):
+                        return True
+
+        return False
@@ -0,0 +1,65 @@
+"""
+Converts gameplay values between base ticks and simulation ticks.
+
+Every time based value in the game (timer durations, lifetimes, animation timelines, rumble
+patterns, velocities and accelerations) is written in base ticks, which are ticks at
+`BASE_TICKRATE`. The simulation can run at a different tick rate, in which case each tick only
+covers part of a base tick (or more than one). Game objects store values in base ticks and use
+these functions to work out how much they change in a single tick.
+"""
+
+from config import TICKRATE, BASE_TICKRATE
+
+
+SUPPORTED_TICKRATES = (20, 30, 60, 120)
+
+__tickrate: int = TICKRATE
+__tick_scale: float = BASE_TICKRATE/TICKRATE
+
+
+
+
+def set_tickrate(tickrate: int) -> None:
+    "Sets the tick rate that the simulation runs at. Raises ValueError if the tick rate is not supported."
+    global __tickrate, __tick_scale
+
+    if tickrate not in SUPPORTED_TICKRATES:
+        raise ValueError(f"Tick rate {tickrate} is not one of {SUPPORTED_TICKRATES}")
+
+    __tickrate = tickrate
+    __tick_scale = BASE_TICKRATE/tickrate
+
+
+def get_tickrate() -> int:
+    return __tickrate
+
+
+def tick_scale() -> float:
+    "The length of a tick in base ticks."
+    return __tick_scale
+
+
+
+def to_ticks(base_ticks: float) -> float:
+    "Converts a duration in base ticks into a number of ticks."
+    return base_ticks/__tick_scale
+
+
+def per_tick[T](amount_per_base_tick: T) -> T:
+    "Converts an amount that changes every base tick (like a velocity) into the amount it changes by in a tick."
+    return amount_per_base_tick*__tick_scale
+
+
+def decay(factor_per_base_tick: float) -> float:
+    "Converts a factor that a value is multiplied by every base tick (like drag) into the factor for a tick."
+    return factor_per_base_tick**__tick_scale
+
+
+def chance(chance_per_base_tick: float) -> float:
+    "Converts the chance of something happening in a base tick into the chance of it happening in a tick."
+    return 1 - (1-chance_per_base_tick)**__tick_scale
+
+
+
+
+set_tickrate(TICKRATE)
@@ -51,27 +51,42 @@ class AnimatedText:
     def __make_title_effect(self, title_surface: pg.Surface) -> TextureMap:
         texture_map = assets.load_texture_map(self.__effects_file).copy()
 
+        # Masks for the colors of the title are the same for every effect frame so they are only made once
+        title_masks = self.__get_title_masks(title_surface)
+
         for name, surface in texture_map.items():
             if name == "main":
                 texture_map[name] = title_surface
                 continue
 
             surface = pg.transform.scale(surface, title_surface.size)
-            texture_map[name] = self.__apply_masks(surface, title_surface)
+            texture_map[name] = self.__apply_masks(surface, title_surface, title_masks)
         
         texture_map["blank"] = assets.colorkey_surface(title_surface.size)
         
         return texture_map
+
+
+    def __get_title_masks(self, title_surface: pg.Surface) -> dict[str, pg.Mask]:
+        title_masks = {}
+        for data in self.__effect_mask_colors.values():
+            for old_c in data.get("change_colors", {}):
+                if old_c not in title_masks:
+                    title_masks[old_c] = pg.mask.from_threshold(title_surface, old_c, (1, 1, 1, 255))
+        
+        return title_masks
     
 
-    def __apply_masks(self, effect_surface: pg.Surface, title_surface: pg.Surface) -> None:
+    def __apply_masks(self, effect_surface: pg.Surface, title_surface: pg.Surface, title_masks: dict[str, pg.Mask]) -> pg.Surface:
         output_surface = title_surface.copy()
         for mask_color, data in self.__effect_mask_colors.items():
             base_mask = pg.mask.from_threshold(effect_surface, mask_color, (1, 1, 1, 255))
+            if not base_mask.count():
+                continue
+
             base_mask.to_surface(output_surface, setcolor=data["default_color"], unsetcolor=None)
             for old_c, new_c in data.get("change_colors", {}).items():
-                overlay_mask = pg.mask.from_threshold(title_surface, old_c, (1, 1, 1, 255))
-                overlay_mask = overlay_mask.overlap_mask(base_mask, (0, 0))
+                overlay_mask = title_masks[old_c].overlap_mask(base_mask, (0, 0))
                 overlay_mask.to_surface(output_surface, setcolor=new_c, unsetcolor=None)
 
-        return output_surface
\ No newline at end of file
+        return output_surface
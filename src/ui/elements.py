@@ -1,7 +1,7 @@
 import pygame as pg
 from typing import Iterable, Callable
 
-from src.custom_types import Timer, Animation, AnimController
+from src.custom_types import Timer, AnimController
 from src.math_functions import sign
 from src.input_device import InputInterpreter
 from src.file_processing import assets
@@ -195,7 +195,7 @@ class Toggle(UIElement):
         self.__texture_map = assets.load_texture_map("ui_elements")
         self.__controller = AnimController(
             assets.load_anim_controller_data("toggle"),
-            Animation.load_from_dict(assets.load_anim_data("ui_elements"))
+            {name: anim.copy() for name, anim in assets.load_animations("ui_elements").items()}
         )
         self.__controller.do_transitions(self)
         self.__controller.skip_to_end()
@@ -0,0 +1,251 @@
+import pygame as pg
+import threading
+
+import unittest
+from unittest.mock import patch
+
+from src.file_processing import assets
+from src.audio.soundbank import SoundBank
+from src.audio.soundfx import VoiceManager
+from src.audio.dispatch import AudioDispatcher
+from src.audio.music import MusicManager
+from src.custom_types import GameMusic
+
+
+
+
+class SoundBankTest(unittest.TestCase):
+    """
+    Test the SoundBank class in audio.
+    """
+
+    test_sound = "entity.asteroid.small_explode"
+
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+
+    def setUp(self):
+        SoundBank.clear()
+
+    def tearDown(self):
+        SoundBank.clear()
+
+
+    def test_preload(self):
+        SoundBank.preload()
+        for name in assets.SOUND_DEFINITIONS:
+            self.assertTrue(SoundBank.is_loaded(name))
+        
+        memory_usage = SoundBank.get_memory_usage()
+        self.assertEqual(memory_usage.keys(), assets.SOUND_DEFINITIONS.keys())
+        self.assertGreater(memory_usage[self.test_sound], 0)
+        self.assertEqual(SoundBank.get_total_memory(), sum(memory_usage.values()))
+
+
+    def test_preload_memory_budget(self):
+        with patch.object(SoundBank, "MEMORY_BUDGET", 0):
+            SoundBank.preload()
+
+        self.assertFalse(SoundBank.is_loaded(self.test_sound))
+        self.assertEqual(SoundBank.get_total_memory(), 0)
+        # Sounds that are not in the bank are still loaded when needed
+        self.assertEqual(SoundBank.get_sound(self.test_sound).name, self.test_sound)
+
+
+    def test_preload_long_sounds(self):
+        with patch.object(SoundBank, "LONG_SOUND_LENGTH", 0.0):
+            SoundBank.preload()
+
+        self.assertFalse(SoundBank.is_loaded(self.test_sound))
+
+
+    def test_get_sound(self):
+        SoundBank.preload()
+        self.assertIs(SoundBank.get_sound(self.test_sound), SoundBank.get_sound(self.test_sound))
+        
+        with self.assertRaises(ValueError):
+            SoundBank.get_sound("not_a_sound")
+
+
+
+
+class VoiceManagerTest(unittest.TestCase):
+    """
+    Test the VoiceManager class in audio.
+    """
+
+    test_sound = "entity.asteroid.small_explode"
+    other_sound = "game.point"
+
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.mixer.set_num_channels(64)
+
+    def setUp(self):
+        VoiceManager.reset()
+
+    def tearDown(self):
+        VoiceManager.reset()
+
+
+    def test_merge_sounds(self):
+        VoiceManager.play_sounds([(self.test_sound, 0.4)]*5 + [(self.other_sound, 1.0)])
+        self.assertEqual(VoiceManager.get_voice_count(self.test_sound), 1)
+        self.assertEqual(VoiceManager.get_voice_count(), 2)
+        self.assertEqual(VoiceManager.get_stats()["merged"], 4)
+
+
+    def test_voice_limit_per_sound(self):
+        for _ in range(VoiceManager.MAX_VOICES_PER_SOUND+2):
+            VoiceManager.play_sounds([(self.test_sound, 0.5)])
+
+        self.assertEqual(VoiceManager.get_voice_count(self.test_sound), VoiceManager.MAX_VOICES_PER_SOUND)
+        self.assertEqual(VoiceManager.get_stats()["stolen"], 2)
+
+
+    def test_quieter_sound_limited(self):
+        for _ in range(VoiceManager.MAX_VOICES_PER_SOUND):
+            VoiceManager.play_sounds([(self.test_sound, 1.0)])
+        
+        VoiceManager.play_sounds([(self.test_sound, 0.2)])
+        self.assertEqual(VoiceManager.get_voice_count(self.test_sound), VoiceManager.MAX_VOICES_PER_SOUND)
+        self.assertEqual(VoiceManager.get_stats()["limited"], 1)
+        self.assertEqual(VoiceManager.get_stats()["stolen"], 0)
+
+
+    def test_global_voice_limit(self):
+        with patch.object(VoiceManager, "MAX_VOICES", 1):
+            VoiceManager.play_sounds([(self.test_sound, 0.5)])
+            VoiceManager.play_sounds([(self.other_sound, 0.8)])
+            
+            self.assertEqual(VoiceManager.get_voice_count(), 1)
+            self.assertEqual(VoiceManager.get_voice_count(self.other_sound), 1)
+            self.assertEqual(VoiceManager.get_stats()["stolen"], 1)
+
+
+
+
+class AudioDispatcherTest(unittest.TestCase):
+    """
+    Test the AudioDispatcher class in audio.
+    """
+
+    test_queue = [("entity.ship.shoot", 1.0, 0), ("entity.ship.boost", 0.5, 1)]
+
+
+    def setUp(self):
+        AudioDispatcher.reset_stats()
+
+    def tearDown(self):
+        AudioDispatcher.stop()
+
+
+    @patch("src.audio.soundfx.SoundFXManager.play_sound_queue")
+    def test_run_without_thread(self, mock_play):
+        AudioDispatcher.play_sound_queue(self.test_queue)
+        mock_play.assert_called_once_with(self.test_queue)
+        self.assertEqual(AudioDispatcher.get_queue_depth(), 0)
+
+
+    @patch("src.audio.soundfx.SoundFXManager.play_sound_queue")
+    def test_run_on_thread(self, mock_play):
+        done = threading.Event()
+        mock_play.side_effect = lambda queue: done.set()
+
+        AudioDispatcher.start()
+        self.assertTrue(AudioDispatcher.is_running())
+        AudioDispatcher.play_sound_queue(self.test_queue)
+
+        self.assertTrue(done.wait(1.0))
+        mock_play.assert_called_once_with(self.test_queue)
+        self.assertGreater(AudioDispatcher.get_latency()[1], 0.0)
+
+        AudioDispatcher.stop()
+        self.assertFalse(AudioDispatcher.is_running())
+
+
+    @patch("src.audio.soundfx.SoundFXManager.stop_looping_sounds")
+    @patch("src.audio.soundfx.SoundFXManager.play_sound_queue")
+    def test_queue_full(self, mock_play, mock_stop):
+        release = threading.Event()
+        mock_play.side_effect = lambda queue: release.wait(1.0)
+
+        with patch.object(AudioDispatcher, "QUEUE_SIZE", 2):
+            AudioDispatcher.start()
+            for _ in range(6):
+                AudioDispatcher.play_sound_queue(self.test_queue)
+            
+            self.assertLessEqual(AudioDispatcher.get_queue_depth(), 2)
+            self.assertGreaterEqual(AudioDispatcher.get_stats()["dropped"], 3)
+            
+            release.set()
+            AudioDispatcher.stop()
+        
+        self.assertEqual(AudioDispatcher.get_queue_depth(), 0)
+        self.assertEqual(mock_play.call_count+AudioDispatcher.get_stats()["dropped"], 6)
+        mock_stop.assert_not_called()
+
+
+
+
+class MusicManagerTest(unittest.TestCase):
+    """
+    Test the MusicManager class in audio.
+    """
+
+    test_music = "test_music"
+    test_files = {"music/test_folder/apt.ogg": b"music data"}
+
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+
+    def tearDown(self):
+        MusicManager.stop()
+        MusicManager.wait()
+        MusicManager.clear_prefetched()
+
+
+    @patch.object(GameMusic, "load_files", return_value=test_files)
+    def test_prefetch(self, mock_load):
+        MusicManager.prefetch(self.test_music)
+        MusicManager.wait()
+        self.assertTrue(MusicManager.is_prefetched(self.test_music))
+        
+        # Tracks are only read once
+        MusicManager.prefetch(self.test_music)
+        MusicManager.wait()
+        mock_load.assert_called_once()
+
+
+    @patch.object(GameMusic, "play_music")
+    @patch.object(GameMusic, "load_files", return_value=test_files)
+    def test_play_prefetched(self, mock_load, mock_play):
+        MusicManager.prefetch(self.test_music)
+        MusicManager.play(self.test_music)
+        self.assertEqual(MusicManager.get_track_name(), self.test_music)
+        MusicManager.wait()
+
+        mock_load.assert_called_once()
+        mock_play.assert_called_once_with(0.0, True, self.test_files, 0)
+        self.assertFalse(MusicManager.is_prefetched(self.test_music))
+        self.assertIsNotNone(MusicManager.get_switch_latency())
+
+
+    @patch.object(GameMusic, "play_music")
+    @patch.object(GameMusic, "load_files")
+    def test_stop_while_loading(self, mock_load, mock_play):
+        def load_files():
+            MusicManager.stop()
+            return self.test_files
+        
+        mock_load.side_effect = load_files
+        MusicManager.play(self.test_music)
+        MusicManager.wait()
+        mock_load.assert_called_once()
+        mock_play.assert_not_called()
@@ -0,0 +1,84 @@
+import math
+import unittest
+
+import config
+from src import time_units
+from src.custom_types import Timer, TimerWheel
+
+
+
+
+class SmallTimerWheel(TimerWheel):
+    "A wheel with few slots so timers move between levels and into the overflow quickly."
+    SLOTS = 4
+    LEVELS = 2
+
+
+class TimerWheelTest(unittest.TestCase):
+
+    def tearDown(self):
+        time_units.set_tickrate(config.TICKRATE)
+
+
+    def test_same_as_polled(self):
+        for tickrate in time_units.SUPPORTED_TICKRATES:
+            time_units.set_tickrate(tickrate)
+            for duration in (0, 1, 15, 70, 300):
+                wheel = SmallTimerWheel()
+                polled = Timer(duration).start()
+                timer = Timer(duration, wheel=wheel).start()
+                for _ in range(math.ceil(time_units.to_ticks(duration))+2):
+                    polled.update()
+                    wheel.update()
+                    msg = f"{duration} ticks at {tickrate} TPS"
+                    self.assertEqual(timer.complete, polled.complete, msg)
+                    self.assertAlmostEqual(timer.countdown, polled.countdown, msg=msg)
+
+    def test_callbacks(self):
+        wheel = SmallTimerWheel()
+        calls = []
+        Timer(5, exec_after=lambda: calls.append(("once", wheel.tick)), wheel=wheel).start()
+        Timer(3, True, lambda: calls.append(("loop", wheel.tick)), wheel).start()
+        Timer(40, exec_after=lambda: calls.append(("long", wheel.tick)), wheel=wheel).start()
+        for _ in range(40):
+            wheel.update()
+
+        self.assertEqual(calls.count(("once", 5)), 1)
+        self.assertEqual([tick for name, tick in calls if name == "loop"], list(range(3, 41, 3)))
+        self.assertEqual(calls[-1], ("long", 40))
+
+    def test_stop_and_advance(self):
+        wheel = TimerWheel()
+        calls = []
+        stopped = Timer(5, exec_after=lambda: calls.append("stopped"), wheel=wheel).start()
+        advanced = Timer(10, exec_after=lambda: calls.append("advanced"), wheel=wheel).start()
+        restarted = Timer(5, exec_after=lambda: calls.append("restarted"), wheel=wheel).start()
+        wheel.update()
+        stopped.stop()
+        advanced.advance(6)
+        restarted.restart()
+        self.assertTrue(stopped.complete)
+        self.assertEqual(advanced.countdown, 3)
+
+        for tick in range(2, 7):
+            wheel.update()
+            if tick == 4:
+                self.assertEqual(calls, ["advanced"])
+
+        self.assertEqual(calls, ["advanced", "restarted"])
+        # The entry from before the advanced timer was moved forward stays on the wheel until its tick
+        self.assertEqual(wheel.get_stats(), (1, 1))
+
+    def test_active_wheel(self):
+        self.assertIsNone(TimerWheel.get_active())
+        outer, inner = TimerWheel(), TimerWheel()
+        with outer.activate():
+            with inner.activate():
+                self.assertIs(Timer(5, wheel=TimerWheel.get_active()).wheel, inner)
+            self.assertIs(TimerWheel.get_active(), outer)
+        self.assertIsNone(TimerWheel.get_active())
+
+        # Timers on a wheel aren't counted down by update
+        timer = Timer(5, wheel=outer).start()
+        timer.update()
+        self.assertEqual(timer.countdown, 5)
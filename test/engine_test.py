@@ -1,7 +1,9 @@
 import pygame as pg
 import unittest
+from unittest.mock import patch
 
 from src.game import GameEngine
+from src.basic_engine import BasicEngine
 
 
 
@@ -18,4 +20,25 @@ class TestEngine(unittest.TestCase):
     def test_pygame_initialization(self):
         """Verify that the engine modules core initialized correctly."""
         self.assertTrue(pg.get_init())
-        self.assertTrue(pg.display.get_init())
\ No newline at end of file
+        self.assertTrue(pg.display.get_init())
+
+
+
+
+class BasicEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = BasicEngine()
+
+    def tearDown(self):
+        pg.quit()
+
+    def test_userinput_actions(self):
+        with patch("pygame.event.get", return_value=[pg.Event(pg.KEYDOWN, key=pg.K_SPACE)]):
+            self.engine.get_userinput()
+        self.assertTrue(self.engine.input_interpreter.check_input("shoot"))
+        self.assertTrue(self.engine.input_interpreter.actions.is_active("shoot"))
+
+        with patch("pygame.event.get", return_value=[pg.Event(pg.KEYUP, key=pg.K_SPACE)]):
+            self.engine.get_userinput()
+        self.assertFalse(self.engine.input_interpreter.check_input("shoot"))
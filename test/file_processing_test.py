@@ -1,12 +1,17 @@
 import pygame as pg
+import os
+import json
 import pickle
+import tempfile
+import threading
 from json import JSONDecodeError
 
 import unittest
 from unittest.mock import patch, MagicMock, mock_open, ANY
 
-from src.file_processing import assets, data
-from src.custom_types import LevelData, SaveData
+from src.file_processing import assets, data, save_format
+from src.file_processing.autosave import Autosave
+from src.custom_types import LevelData, SaveData, ProgressSnapshot, WeightedSampler
 
 from src import game_errors
 
@@ -90,6 +95,38 @@ class AssetsTest(unittest.TestCase):
     
 
 
+    def test_load_texture_indexed_palette_swap(self):
+        texture = assets.load_texture(self.texture_path)
+        swapped_texture = assets.load_texture(self.texture_path, palette_swap_name=self.pallette_swap)
+        self.assertEqual(swapped_texture.get_bitsize(), 8)
+        # Palette swaps share pixel data with the original texture
+        self.assertIs(swapped_texture.get_abs_parent(), texture.get_abs_parent())
+        self.assertNotEqual(swapped_texture.get_palette(), texture.get_palette())
+
+
+
+    # Test to_indexed_surface
+    def test_to_indexed_surface(self):
+        test_surface = pg.Surface((10, 10))
+        test_surface.fill((255, 0, 0))
+        test_surface.fill((0, 0, 255), (0, 0, 5, 5))
+
+        indexed_surface = assets.to_indexed_surface(test_surface)
+        self.assertEqual(indexed_surface.get_bitsize(), 8)
+        self.assertEqual(indexed_surface.get_at((0, 0))[0:3], (0, 0, 255))
+        self.assertEqual(indexed_surface.get_at((9, 9))[0:3], (255, 0, 0))
+
+    def test_to_indexed_surface_too_many_colors(self):
+        test_surface = pg.Surface((32, 32))
+        for x in range(32):
+            for y in range(32):
+                test_surface.set_at((x, y), (x*8, y*8, 0))
+
+        self.assertIsNone(assets.to_indexed_surface(test_surface))
+
+
+
+
     # Test colorkey_surface
     def test_colorkey_surface(self):
         size = (200, 200)
@@ -119,6 +156,30 @@ class AssetsTest(unittest.TestCase):
 
 
 
+    def test_texture_atlas_up_to_date(self):
+        """
+        Check that every sprite in the texture atlas matches the original texture map. If this
+        fails run build_atlas.py to rebuild the atlas.
+        """
+        for name, atlas_data in assets.TEXTURE_ATLAS["texture_maps"].items():
+            mapping_data = assets.load_json(f"{assets.TEXTURE_MAPS_DIR}/{name}.texture_map")
+            self.assertEqual(mapping_data["texture"], atlas_data["source"], f"texture for '{name}' changed")
+            self.assertEqual(list(mapping_data["mappings"]), list(atlas_data["mappings"]), f"mappings for '{name}' changed")
+
+            texture = assets.load_texture(mapping_data["texture"])
+            texture_map = assets.load_texture_map(name)
+            for sprite_name, area in mapping_data["mappings"].items():
+                sprite = texture_map[sprite_name]
+                original = texture.subsurface(area)
+                untrimmed = assets.colorkey_surface(original.size)
+                untrimmed.blit(sprite, (pg.Vector2(original.size)-sprite.size)*0.5 + assets.get_trim_offset(sprite))
+
+                self.assertEqual(pg.image.tobytes(untrimmed, "RGB"), pg.image.tobytes(original, "RGB"),
+                                 f"sprite '{sprite_name}' in '{name}' does not match texture atlas")
+
+
+
+
     # Test load_anim_data
     def test_load_anim_data(self):
         anim_data = assets.load_anim_data("spaceship")
@@ -133,6 +194,32 @@ class AssetsTest(unittest.TestCase):
 
 
 
+    # Test load_animations
+    def test_load_animations(self):
+        animations = assets.load_animations("asteroid")
+        self.assertEqual(animations.keys(), assets.load_anim_data("asteroid")["animations"].keys())
+
+    def test_load_animations_caching(self):
+        animations1 = assets.load_animations("asteroid")
+        animations2 = assets.load_animations("asteroid")
+        self.assertIs(animations1, animations2)
+
+    def test_animation_copy(self):
+        animation = assets.load_animations("asteroid")["small_explode"]
+        anim_copy = animation.copy()
+        self.assertIsNot(anim_copy, animation)
+        self.assertEqual(anim_copy.name, animation.name)
+        self.assertEqual(anim_copy.duration, animation.duration)
+
+        animation.restart()
+        anim_copy.restart()
+        anim_copy.skip_to_end()
+        self.assertTrue(anim_copy.complete)
+        self.assertFalse(animation.complete)
+
+
+
+
     # Test load_anim_controller_data
     def test_load_anim_controller_data(self):
         controller_data = assets.load_anim_controller_data("spaceship")
@@ -192,6 +279,18 @@ class AssetsTest(unittest.TestCase):
         result = assets.palette_swap(test_surface, swap_colors)
         
         self.assertEqual(result.get_size(), test_surface.get_size())
+        self.assertEqual(result.get_at((0, 0))[0:3], (0, 255, 0))
+
+    def test_palette_swap_indexed(self):
+        test_surface = pg.Surface((10, 10))
+        test_surface.fill((255, 0, 0))
+        indexed_surface = assets.to_indexed_surface(test_surface)
+
+        result = assets.palette_swap(indexed_surface, {"#FF0000": "#00FF00"})
+
+        self.assertEqual(result.get_bitsize(), 8)
+        self.assertEqual(result.get_at((0, 0))[0:3], (0, 255, 0))
+        self.assertEqual(indexed_surface.get_at((0, 0))[0:3], (255, 0, 0))
 
     @patch('src.file_processing.assets.load_json')
     def test_palette_swap_with_file(self, mock_load_json: MagicMock):
@@ -275,6 +374,16 @@ class DataTest(unittest.TestCase):
         return SaveData("test", 100, 2.0, 3, (0, 0), {})
 
 
+    def get_test_entity_save_data(self) -> SaveData:
+        entity_data = [
+            {"id": 1, "save_key": "player_spaceship", "position": (0.0, 0.0), "velocity": (1.5, -2.0), "rotation": 90, "powerups": ["SuperLaser"]},
+            {"id": 2, "save_key": "asteroid", "position": (10.0, 5.0), "velocity": (0.0, 1.0), "asteroid_id": "blue_small", "rotation": 45.5, "angular_vel": 3, "health": 2},
+            {"id": 3, "save_key": "asteroid", "position": (-4.0, 8.0), "velocity": (2.0, 1.0), "asteroid_id": "blue_medium", "rotation": 10.0, "angular_vel": -1.5, "health": 4},
+            {"id": 4, "save_key": "ship_thruster_smoke", "position": (3.0, 3.0), "velocity": (0.0, 0.0), "angular_vel": 0.0, "total_time": 10, "time_elapsed": 2.5},
+        ]
+        return SaveData("test", 100, 2.0, 3, (12.0, -6.5), entity_data)
+
+
     def get_test_save_bytes(self) -> bytes:
         return pickle.dumps(self.get_test_save_data())
 
@@ -316,14 +425,14 @@ class DataTest(unittest.TestCase):
         self.assertEqual(level.asteroid_density, (10, 15))
         self.assertEqual(level.asteroid_speed, (1, 6))
         self.assertEqual(level.asteroid_frequency, 0.0)
-        self.assertEqual(level.asteroid_spawn_weights, ([], []))
+        self.assertEqual(level.asteroid_spawn_weights.choices, ())
 
         self.assertEqual(level.enemy_frequency, 0.0)
         self.assertEqual(level.enemy_count, 0)
-        self.assertEqual(level.enemy_spawn_weights, ([], []))
+        self.assertEqual(level.enemy_spawn_weights.choices, ())
 
         self.assertEqual(level.powerup_frequency, 0.0)
-        self.assertEqual(level.powerup_spawn_weights, ([], []))
+        self.assertEqual(level.powerup_spawn_weights.choices, ())
 
         self.assertEqual(level.score_range, (0, 10000))
         self.assertEqual(level.next_level, "level_2")
@@ -346,14 +455,17 @@ class DataTest(unittest.TestCase):
         self.assertEqual(level.asteroid_density, (20, 30))
         self.assertEqual(level.asteroid_speed, (1, 6))
         self.assertEqual(level.asteroid_frequency, 0.5)
-        self.assertEqual(level.asteroid_spawn_weights, (["small_rock", "medium_rock"], [70, 30]))
+        self.assertEqual(level.asteroid_spawn_weights.choices, ("small_rock", "medium_rock"))
+        self.assertEqual(level.asteroid_spawn_weights.weights, (70, 30))
 
         self.assertEqual(level.enemy_frequency, 0.2)
         self.assertEqual(level.enemy_count, 5)
-        self.assertEqual(level.enemy_spawn_weights, (["basic_enemy", "big_chungus"], [100, 80]))
+        self.assertEqual(level.enemy_spawn_weights.choices, ("basic_enemy", "big_chungus"))
+        self.assertEqual(level.enemy_spawn_weights.weights, (100, 80))
 
         self.assertEqual(level.powerup_frequency, 0.67)
-        self.assertEqual(level.powerup_spawn_weights, (["health", "speed_boost"], [100, 50]))
+        self.assertEqual(level.powerup_spawn_weights.choices, ("health", "speed_boost"))
+        self.assertEqual(level.powerup_spawn_weights.weights, (100, 50))
 
         self.assertEqual(level.score_range, (10000, 20000))
         self.assertEqual(level.next_level, "level_3")
@@ -378,6 +490,65 @@ class DataTest(unittest.TestCase):
         self.assertEqual(context.exception.level_name, "test_level")
         self.assertEqual(context.exception.missing_property, "score_range")
 
+    def test_weighted_sampler(self):
+        weights = [70, 30, 5, 0, 15]
+        sampler = WeightedSampler.from_weights(["a", "b", "c", "d", "e"], weights)
+
+        # Work out the chance of picking each choice from the alias table
+        chances = [0.0]*len(weights)
+        for index, (probability, alias) in enumerate(zip(sampler.probabilities, sampler.aliases)):
+            chances[index] += probability/len(weights)
+            chances[alias] += (1-probability)/len(weights)
+
+        for chance, weight in zip(chances, weights):
+            self.assertAlmostEqual(chance, weight/sum(weights))
+
+        self.assertIn(sampler.choose(), sampler.choices)
+
+    @patch('src.file_processing.data.load_json')
+    def test_load_level_invalid_weights(self, mock_load_json: MagicMock):
+        mock_load_json.return_value = dict(self.test_level1, spawn_asteroids={"small_rock": -1})
+        with self.assertRaises(ValueError):
+            data.load_level("test_level")
+
+
+    @patch('src.file_processing.data.load_json')
+    def test_load_level_from_pack(self, mock_load_json: MagicMock):
+        level = data.load_level("level_1")
+        mock_load_json.assert_not_called()
+        self.assertIs(data.load_level("level_1"), level)
+
+        with open(f"{data.LEVELS_DIR}/level_1.json") as fp:
+            self.assertEqual(level, data.parse_level_data("level_1", json.load(fp)))
+
+
+    def test_level_pack_up_to_date(self):
+        "If this fails run build_level_pack.py to rebuild the level pack."
+        import build_level_pack
+        levels = build_level_pack.load_levels()
+        self.assertEqual(build_level_pack.validate_levels(levels), [])
+        self.assertEqual(build_level_pack.compile_level_pack(levels), data.LEVEL_PACK)
+
+
+    @patch.dict(assets.MUSIC_DEFINITIONS, {"test_music": {"main_loop": "music/not_a_file"}})
+    def test_validate_levels(self):
+        import build_level_pack
+        levels = {
+            "test_level": data.parse_level_data("test_level", dict(self.test_level2, next_level="missing_level", music="missing_music")),
+            "level_2": data.parse_level_data("level_2", dict(self.test_level1, next_level=None, music="test_music"))
+        }
+        self.assertEqual(build_level_pack.validate_levels(levels), [
+            "'test_level' has next level 'missing_level' that does not exist",
+            "'test_level' spawns asteroid 'small_rock' that is not in data/asteroids.json",
+            "'test_level' spawns asteroid 'medium_rock' that is not in data/asteroids.json",
+            "'test_level' spawns enemy 'basic_enemy' that does not exist",
+            "'test_level' spawns enemy 'big_chungus' that does not exist",
+            "'test_level' spawns powerup 'health' that does not exist",
+            "'test_level' spawns powerup 'speed_boost' that does not exist",
+            "'test_level' plays music 'missing_music' that is not in assets/music_definitions.json",
+            "'level_2' plays music 'test_music' but 'music/not_a_file.ogg' is missing"
+        ])
+
 
     @patch('src.file_processing.data.load_json')
     def test_load_high_score(self, mock_load_json: MagicMock):
@@ -479,11 +650,76 @@ class DataTest(unittest.TestCase):
 
     def test_save_progress(self):
         save_data = self.get_test_save_data()
-        with patch("builtins.open", mock_open()) as mock_file:
+        with patch("builtins.open", mock_open()) as mock_file, patch("os.fsync"), patch("os.replace") as mock_replace:
             data.save_progress(save_data)
+            data.wait_for_saves()
         
         mock_file: MagicMock
-        mock_file.assert_called_once_with(data.SAVE_DATA_PATH, "wb")
+        # Save file is written to a temporary file first
+        mock_file.assert_called_once_with(f"{data.SAVE_DATA_PATH}.tmp", "wb")
+        mock_replace.assert_called_once_with(f"{data.SAVE_DATA_PATH}.tmp", data.SAVE_DATA_PATH)
+
+
+    def test_save_and_load_progress(self):
+        save_data = self.get_test_entity_save_data()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "progress.bin")
+            data.save_progress(save_data, path)
+            data.wait_for_saves()
+
+            self.assertEqual(os.listdir(temp_dir), ["progress.bin"])
+            self.assertEqual(data.load_progress(path), save_data)
+
+
+    def test_finished_save_threads_removed(self):
+        save_data = self.get_test_entity_save_data()
+        save_threads: list[threading.Thread] = getattr(data, "__save_threads")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for _ in range(5):
+                data.save_progress(save_data, os.path.join(temp_dir, "progress.bin"))
+                save_threads[-1].join()
+
+            self.assertEqual(len(save_threads), 1)
+            data.wait_for_saves()
+
+
+    def test_save_progress_write_error(self):
+        with patch("builtins.open", side_effect=PermissionError):
+            data.save_progress(self.get_test_save_data())
+            with self.assertRaises(game_errors.SaveFileError):
+                data.wait_for_saves()
+
+
+    def test_load_progress_legacy_rejects_other_objects(self):
+        with patch("builtins.open", mock_open(read_data=pickle.dumps(LevelData))):
+            with self.assertRaises(game_errors.SaveFileError):
+                data.load_progress()
+
+
+    def test_load_progress_newer_version(self):
+        raw = bytearray(save_format.encode_progress(self.get_test_save_data()))
+        raw[len(save_format.MAGIC)] = save_format.FORMAT_VERSION+1
+        with patch("builtins.open", mock_open(read_data=bytes(raw))):
+            with self.assertRaises(game_errors.SaveFileError):
+                data.load_progress()
+
+
+    def test_load_progress_truncated(self):
+        raw = save_format.encode_progress(self.get_test_entity_save_data())
+        with patch("builtins.open", mock_open(read_data=raw[:-10])):
+            with self.assertRaises(game_errors.SaveFileError):
+                data.load_progress()
+
+
+    def test_load_progress_migration(self):
+        raw = save_format.encode_progress(self.get_test_save_data())
+        migration = MagicMock(side_effect=lambda progress: progress | {"score": 5})
+        with patch("builtins.open", mock_open(read_data=raw)), patch.dict(save_format.MIGRATIONS, {1: migration}), \
+             patch.object(save_format, "FORMAT_VERSION", 2):
+            save_data = data.load_progress()
+        
+        migration.assert_called_once()
+        self.assertEqual(save_data.score, 5)
 
 
     def test_save_data_invalid_object(self):
@@ -667,4 +903,103 @@ class DataTest(unittest.TestCase):
         mock_delete_progress.assert_called_once()
         mock_save_highscore.assert_called_once_with(0)
         mock_reset_settings.assert_called_once()
-        
\ No newline at end of file
+        
+
+
+
+
+
+
+
+
+class AutosaveTest(unittest.TestCase):
+    """
+    Test the Autosave class in file_processing.
+    """
+
+    test_snapshot = ProgressSnapshot("test", 100, 2.0, 3, (0.0, 0.0), [(("id", "save_key", "position"), (1, "asteroid", (1.0, 2.0)))])
+
+
+    def test_snapshot_to_save_data(self):
+        save_data = self.test_snapshot.to_save_data()
+        self.assertIsInstance(save_data, SaveData)
+        self.assertEqual(save_data.entity_data, [{"id": 1, "save_key": "asteroid", "position": (1.0, 2.0)}])
+
+
+    @patch("src.file_processing.data.save_progress")
+    def test_save_after_interval(self, mock_save: MagicMock):
+        autosave = Autosave(lambda time_limit: self.test_snapshot, 3)
+        for _ in range(2):
+            autosave.update()
+        mock_save.assert_not_called()
+
+        autosave.update()
+        mock_save.assert_called_once_with(self.test_snapshot)
+        self.assertEqual(autosave.stats["saves"], 1)
+
+
+    @patch("src.file_processing.data.save_progress")
+    def test_save_waits_until_allowed(self, mock_save: MagicMock):
+        autosave = Autosave(lambda time_limit: self.test_snapshot, 1)
+        autosave.update(False)
+        autosave.update(False)
+        mock_save.assert_not_called()
+
+        autosave.update(True)
+        mock_save.assert_called_once()
+
+
+    @patch("src.file_processing.data.save_progress")
+    def test_slow_snapshot_retried(self, mock_save: MagicMock):
+        snapshots = [None, self.test_snapshot]
+        take_snapshot = MagicMock(side_effect=lambda time_limit: snapshots.pop(0))
+        autosave = Autosave(take_snapshot, 1)
+
+        autosave.update()
+        mock_save.assert_not_called()
+        self.assertEqual(autosave.stats["skipped"], 1)
+        take_snapshot.assert_called_with(Autosave.SNAPSHOT_TIME_LIMIT)
+
+        autosave.update()
+        mock_save.assert_called_once_with(self.test_snapshot)
+
+
+    @patch("src.file_processing.data.save_progress")
+    def test_slow_snapshot_backs_off(self, mock_save: MagicMock):
+        take_snapshot = MagicMock(return_value=None)
+        autosave = Autosave(take_snapshot, 1)
+
+        for _ in range(31):
+            autosave.update()
+        mock_save.assert_not_called()
+        # Retried after 1, 2, 4 and 8 ticks
+        self.assertEqual(take_snapshot.call_count, 5)
+        take_snapshot.assert_called_with(Autosave.SNAPSHOT_TIME_LIMIT)
+
+        for _ in range(16):
+            autosave.update()
+        self.assertEqual(take_snapshot.call_count, 6)
+        take_snapshot.assert_called_with(None)
+
+
+    @patch("src.file_processing.data.save_progress")
+    def test_backoff_reset_after_save(self, mock_save: MagicMock):
+        snapshots = [None, None, self.test_snapshot, None, self.test_snapshot]
+        take_snapshot = MagicMock(side_effect=lambda time_limit: snapshots.pop(0))
+        autosave = Autosave(take_snapshot, 1)
+
+        for _ in range(4):
+            autosave.update()
+        mock_save.assert_called_once_with(self.test_snapshot)
+
+        autosave.update()
+        autosave.update()
+        self.assertEqual(mock_save.call_count, 2)
+
+
+    @patch("src.file_processing.data.save_progress")
+    def test_disabled(self, mock_save: MagicMock):
+        autosave = Autosave(lambda time_limit: self.test_snapshot, 0)
+        for _ in range(10):
+            autosave.update()
+        mock_save.assert_not_called()
@@ -0,0 +1,670 @@
+import pygame as pg
+import random
+import unittest
+
+from src import time_units
+from src.custom_types import TimerWheel
+from src.input_device import InputInterpreter, KeyboardMouse
+from src.game_objects import ObjectGroup
+from src.game_objects.asteroids import Asteroid
+from src.game_objects.spaceship import PlayerShip
+from src.game_objects.boss import BossShip
+from src.game_objects.projectiles import EnemyBullet, Laser, lines_hit_rects, rect_line_collision
+from src.game_objects.particles import ShipSmoke, DisplayText
+from src.game_objects.enemies import EnemyShip
+
+
+
+class ProjectileManagerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+
+    def setUp(self):
+        self.group = ObjectGroup()
+
+
+    def fire(self, position: pg.typing.Point, direction: pg.typing.Point) -> EnemyBullet:
+        bullet = EnemyBullet(pg.Vector2(position), pg.Vector2(direction), (0, 0))
+        self.group.add(bullet)
+        return bullet
+
+
+    def test_hit(self):
+        asteroid = Asteroid((0, -40), (0, 0), "blue_medium")
+        self.group.add(asteroid)
+        bullet = self.fire((0, 0), (0, -1))
+
+        for _ in range(3):
+            self.group.update((0, 0))
+
+        self.assertFalse(bullet.alive())
+        self.assertEqual(asteroid.health, 1)
+        self.assertLess(asteroid.get_velocity().y, 0)
+
+    def test_miss(self):
+        asteroid = Asteroid((200, -40), (0, 0), "blue_medium")
+        self.group.add(asteroid)
+        bullet = self.fire((0, 0), (0, -1))
+        self.group.update((0, 0))
+
+        self.assertTrue(bullet.alive())
+        self.assertEqual(asteroid.health, 2)
+        self.assertEqual(self.group.projectile_manager.get_stats(), (1, 0, 0))
+
+    def test_hits_every_object_in_path(self):
+        asteroids = [Asteroid((x, -30), (0, 0), "blue_medium") for x in (-18, 18)]
+        self.group.add(*asteroids)
+        self.fire((0, 0), (0, -1))
+        for _ in range(3):
+            self.group.update((0, 0))
+
+        self.assertEqual([asteroid.health for asteroid in asteroids], [1, 1])
+
+    def test_lifetime(self):
+        bullet = self.fire((0, 0), (0, -1))
+        ticks = 0
+        while bullet.alive():
+            self.group.update((0, 0))
+            ticks += 1
+
+        self.assertEqual(ticks, 100)
+
+    def test_same_as_unmanaged(self):
+        "Updating projectiles through the manager should give the same result as each bullet checking the whole group."
+        # Small asteroids don't break into smaller ones which would be updated after the bullets without the manager
+        results = []
+        for managed in (True, False):
+            random.seed(0)
+            self.group = ObjectGroup()
+            asteroids = [Asteroid((random.uniform(-300, 300), random.uniform(-300, 300)), (0, 0), "blue_small")
+                         for _ in range(40)]
+            self.group.add(*asteroids)
+            bullets = [self.fire((0, 0), pg.Vector2(0, -1).rotate(random.uniform(0, 360))) for _ in range(100)]
+
+            for _ in range(20):
+                if managed:
+                    self.group.update((0, 0))
+                else:
+                    for asteroid in self.group.get_type(Asteroid):
+                        asteroid.update()
+                    self.group.collision_solver.update(self.group.get_type(Asteroid))
+                    for bullet in bullets:
+                        if bullet.alive():
+                            bullet.update()
+
+            results.append(([asteroid.health for asteroid in asteroids], [bullet.alive() for bullet in bullets]))
+
+        self.assertEqual(results[0], results[1])
+
+    def test_query_rect(self):
+        asteroids = [Asteroid((x, 0), (0, 0), "blue_small") for x in (300, 0, 10, 1000)]
+        self.group.add(*asteroids)
+        self.fire((0, 0), (0, 1))
+        self.group.update((0, 0))
+
+        self.assertEqual(self.group.projectile_manager.query_rect((-20, -20, 40, 40)), asteroids[1:3])
+
+
+
+
+class LaserTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+
+    def test_lines_hit_rects(self):
+        "The slab test should agree with pygame's line clipping."
+        random.seed(0)
+        rects = [pg.FRect(random.uniform(-400, 400), random.uniform(-400, 400), random.uniform(5, 60), random.uniform(5, 60))
+                 for _ in range(300)]
+
+        for rotation in (0, 90, 37.5, 180, 271):
+            lines = Laser.get_beam_lines((0, 0), rotation, 50)
+            expected = {index for index, rect in enumerate(rects) if rect_line_collision(rect, lines)}
+            self.assertEqual(lines_hit_rects(lines, rects), expected, f"rotation {rotation}")
+
+    def test_find_targets(self):
+        in_path = [Asteroid((0, y), (0, 0), "blue_small") for y in (-250, -50)]
+        out_of_path = [Asteroid((0, 60), (0, 0), "blue_small"), Asteroid((200, -100), (0, 0), "blue_small")]
+        dead = Asteroid((0, -150), (0, 0), "blue_small")
+        dead.set_health(0)
+
+        objects = [out_of_path[0], in_path[0], dead, out_of_path[1], in_path[1]]
+        self.assertEqual(Laser.find_targets(Laser.get_beam_lines((0, 0), 0, 50), objects), in_path)
+
+    def test_laser(self):
+        group = ObjectGroup()
+        asteroids = [Asteroid((0, -100), (0, 0), "blue_medium"), Asteroid((100, 0), (0, 0), "blue_medium")]
+        group.add(*asteroids)
+        laser = Laser((0, 0), 0, 50, 1)
+        group.add(laser)
+        group.update((0, 0))
+
+        self.assertEqual(laser.killed_list, asteroids[:1])
+        self.assertFalse(asteroids[0].has_health())
+        self.assertTrue(asteroids[1].has_health())
+
+
+
+
+class CollisionSolverTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+        cls.inputs = InputInterpreter(KeyboardMouse(), None)
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+
+    def setUp(self):
+        self.group = ObjectGroup()
+
+
+    def test_bounce(self):
+        asteroids = [Asteroid((-10, 0), (2, 0), "blue_medium"), Asteroid((10, 0), (-2, 0), "blue_medium")]
+        self.group.add(*asteroids)
+        self.group.update((0, 0))
+
+        self.assertEqual(self.group.collision_solver.contacts, [tuple(asteroids)])
+        self.assertAlmostEqual(asteroids[0].position.distance_to(asteroids[1].position), 32)
+        self.assertLess(asteroids[0].get_velocity().x, 0)
+        self.assertGreater(asteroids[1].get_velocity().x, 0)
+
+    def test_multiple_contacts(self):
+        asteroids = [Asteroid((0, 0), (0, 0), "blue_medium"),
+                     Asteroid((-24, 0), (0, 0), "blue_medium"),
+                     Asteroid((24, 0), (0, 0), "blue_medium"),
+                     Asteroid((0, 24), (0, 0), "blue_medium")]
+        self.group.add(*asteroids)
+        self.group.update((0, 0))
+
+        self.assertEqual(len(self.group.collision_solver.contacts), 3)
+        for i, asteroid in enumerate(asteroids):
+            for other in asteroids[i+1:]:
+                self.assertGreater(asteroid.position.distance_to(other.position), 32*0.9)
+
+    def test_on_collide(self):
+        ship = PlayerShip((0, 0))
+        asteroids = [Asteroid((0, -9), (0, 0), "blue_small"), Asteroid((0, 9), (0, 0), "blue_small")]
+        self.group.add(ship, *asteroids, Asteroid((300, 0), (0, 0), "blue_small"))
+        self.group.update((0, 0))
+
+        self.assertFalse(ship.health)
+        self.assertEqual(self.group.collision_solver.contacts, [(ship, asteroids[0]), (ship, asteroids[1])])
+
+    def test_ignored_types_collide(self):
+        "Objects that are not updated should still be collided with."
+        ship = PlayerShip((0, 0))
+        asteroid = Asteroid((0, -9), (0, 0), "blue_small")
+        self.group.add(ship, asteroid)
+        self.group.update((0, 0), (Asteroid,))
+
+        self.assertFalse(ship.health)
+        self.assertEqual(self.group.collision_solver.contacts, [(ship, asteroid)])
+
+    def test_broadphase(self):
+        random.seed(0)
+        asteroids = [Asteroid((x*40+random.uniform(-4, 4), y*40+random.uniform(-4, 4)), (0, 0), "blue_medium")
+                     for x in range(20) for y in range(20)]
+        self.group.add(*asteroids)
+        self.group.collision_solver.update(asteroids)
+
+        objects, pair_checks, contacts = self.group.collision_solver.get_stats()
+        self.assertEqual(objects, 400)
+        self.assertLess(pair_checks, objects*10)
+        self.assertEqual(contacts, 0)
+
+    def test_no_tunnelling(self):
+        "Fast objects that would pass through each other between ticks should still collide."
+        for continuous in (True, False):
+            self.group = ObjectGroup()
+            self.group.collision_solver.continuous = continuous
+            asteroids = [Asteroid((0, 0), (0, -20), "blue_small"), Asteroid((0, -22), (0, 20), "blue_small")]
+            self.group.add(*asteroids)
+            self.group.update((0, 0))
+
+            self.assertEqual(self.group.collision_solver.contacts, [tuple(asteroids)], f"continuous={continuous}")
+            self.assertGreater(asteroids[0].position.y, asteroids[1].position.y)
+            self.assertGreater(asteroids[0].get_velocity().y, 0)
+            self.assertLess(asteroids[1].get_velocity().y, 0)
+
+    def test_sweep_from_last_update(self):
+        "Movement from outside an object's update should be swept from where the object was left last tick."
+        asteroid = Asteroid((0, 0), (0, 0), "blue_small")
+        self.group.add(asteroid)
+        self.group.update((0, 0))
+        self.assertEqual(asteroid.get_tick_movement(), (0, 0))
+
+        asteroid.set_velocity((0, -20))
+        asteroid.catch_up(2)
+        self.assertEqual(asteroid.get_tick_movement(), time_units.per_tick(pg.Vector2(0, -40)))
+
+        asteroid.set_position((100, 100))
+        self.assertEqual(asteroid.get_tick_movement(), (0, 0))
+
+    def test_contact_time(self):
+        asteroids = [Asteroid((0, 0), (0, -20), "blue_small"), Asteroid((0, -22), (0, 20), "blue_small")]
+        self.group.add(*asteroids)
+        self.group.update((0, 0))
+
+        # They first touch 16 pixels apart, 0.15 of the way through the tick
+        self.assertAlmostEqual(asteroids[0].position.y, -3)
+        self.assertAlmostEqual(asteroids[1].position.y, -19)
+
+
+
+
+class ObjectTimersTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+
+    def setUp(self):
+        self.group = ObjectGroup()
+        self.wheel = TimerWheel()
+
+
+    def test_restored_smoke_lifetime(self):
+        with self.wheel.activate():
+            smoke = ShipSmoke.init_from_data({"id": 1, "save_key": "ship_thruster_smoke", "position": (0.0, 0.0), "velocity": (0.0, 0.0),
+                                              "angular_vel": 0, "total_time": 40, "time_elapsed": 10})
+            self.group.add(smoke)
+            for _ in range(round(time_units.to_ticks(29))):
+                self.wheel.update()
+            self.assertTrue(smoke.alive())
+
+            self.wheel.update()
+            self.assertFalse(smoke.alive())
+
+    def test_enemy_attack_delay_paused(self):
+        "An enemy's attack delay shouldn't run down while the enemy isn't being updated."
+        with self.wheel.activate():
+            self.group.add(PlayerShip((0, 0)), enemy := EnemyShip((0, -100)))
+            for _ in range(round(time_units.to_ticks(50))):
+                self.wheel.update()
+                self.group.update((0, 0), (EnemyShip,))
+
+            enemy.update()
+        self.assertEqual(list(self.group.get_type(EnemyBullet)), [])
+
+
+
+
+class HitboxTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+
+    def test_cached_rect(self):
+        asteroid = Asteroid((0, 0), (0, 0), "blue_small")
+        rect = asteroid.rect
+        self.assertIs(asteroid.rect, rect)
+        self.assertEqual(rect.center, (0, 0))
+
+        asteroid.move(pg.Vector2(5, -3))
+        self.assertEqual(rect.center, (5, -3))
+        asteroid.set_position((20, 10))
+        self.assertEqual(rect.center, (20, 10))
+        asteroid.position += pg.Vector2(1, 1)
+        self.assertEqual(rect.center, (21, 11))
+
+    def test_precise_lines(self):
+        boss = BossShip((0, 0))
+        # The corners of the hitbox are outside the round texture
+        corner_line = [(pg.Vector2(100, -110), pg.Vector2(114, -110))]
+        center_line = [(pg.Vector2(-5, 0), pg.Vector2(5, 0))]
+
+        self.assertTrue(rect_line_collision(boss.rect, corner_line))
+        self.assertFalse(boss.collides_with_lines(corner_line))
+        self.assertTrue(boss.collides_with_lines(center_line))
+
+    def test_precise_rects(self):
+        boss = BossShip((0, 0))
+        asteroid = Asteroid((0, 0), (0, 0), "blue_small")
+
+        self.assertFalse(boss.colliderect((105, 105, 8, 8)))
+        self.assertTrue(boss.colliderect((0, 0, 8, 8)))
+        self.assertTrue(boss.overlaps(asteroid))
+        asteroid.set_position((110, 110))
+        self.assertTrue(boss.rect.colliderect(asteroid.rect))
+        self.assertFalse(boss.overlaps(asteroid))
+        self.assertFalse(asteroid.overlaps(boss))
+
+    def test_mask_cache(self):
+        boss = BossShip((0, 0))
+        mask, topleft = boss.get_mask()
+        self.assertEqual(topleft, pg.Vector2(-128, -128))
+
+        boss.set_rotation(BossShip.MASK_ROTATION_STEP*0.4)
+        self.assertIs(boss.get_mask()[0], mask)
+        self.assertIsNone(Asteroid((0, 0), (0, 0), "blue_small").get_mask())
+
+
+
+
+
+class SimulationLODTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+
+    def setUp(self):
+        self.group = ObjectGroup()
+        self.lod = self.group.simulation_lod
+
+
+    def test_tiers(self):
+        asteroids = [Asteroid((0, -distance), (0, 0), "blue_small") for distance in (100, 350, 600)]
+        self.group.add(*asteroids)
+        self.group.update((0, 0))
+
+        self.assertEqual([self.lod.get_tier(asteroid) for asteroid in asteroids], [self.lod.FULL, self.lod.REDUCED, self.lod.DORMANT])
+        self.assertEqual(self.lod.get_stats(), (1, 1, 1))
+
+        asteroids[2].kill()
+        self.assertEqual(self.lod.get_tier(asteroids[2]), self.lod.FULL)
+
+    def test_same_motion(self):
+        "Objects should end up in the same place whatever level of detail they are simulated at."
+        for distance in (100, 350, 600):
+            self.group = ObjectGroup()
+            asteroid = Asteroid((0, -distance), (3, -2), "blue_small")
+            self.group.add(asteroid)
+            for _ in range(10):
+                self.group.update((0, 0))
+
+            self.assertLess(asteroid.position.distance_to((30, -distance-20)), 0.001, f"distance {distance}")
+
+    def test_reduced_updates(self):
+        asteroid = Asteroid((0, -350), (0, 0), "blue_small")
+        self.group.add(asteroid)
+        updates = 0
+        for _ in range(10):
+            self.lod.start_tick((0, 0))
+            updates += self.lod.should_update(asteroid)
+
+        self.assertEqual(updates, 10//self.lod.REDUCED_INTERVAL)
+
+    def test_wake(self):
+        asteroid = Asteroid((0, -500), (0, 5), "blue_small")
+        self.group.add(asteroid)
+        self.group.update((0, 0))
+        self.assertEqual(self.lod.get_tier(asteroid), self.lod.DORMANT)
+
+        while self.lod.get_tier(asteroid) == self.lod.DORMANT:
+            self.group.update((0, 0))
+
+        # Dormant objects only wake once they are well inside the far radius
+        self.assertLessEqual(-asteroid.position.y, self.lod.FAR_RADIUS-self.lod.WAKE_MARGIN)
+        self.assertGreater(-asteroid.position.y, self.lod.FAR_RADIUS-self.lod.WAKE_MARGIN-5)
+
+        while self.lod.get_tier(asteroid) != self.lod.FULL:
+            self.group.update((0, 0))
+        self.assertLessEqual(-asteroid.position.y, self.lod.NEAR_RADIUS)
+
+
+
+
+
+class UpdateSchedulerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+
+    def make_group(self, budget: float) -> ObjectGroup:
+        group = ObjectGroup()
+        group.update_scheduler.budget = budget
+        return group
+
+
+    def test_within_budget(self):
+        group = self.make_group(1.0)
+        group.add(*[ShipSmoke((i*10, 0), (0, -1)) for i in range(5)])
+        group.update((0, 0))
+        self.assertEqual(group.update_scheduler.get_stats(), (5, 0, 0))
+
+    def test_critical_objects(self):
+        group = self.make_group(0.0)
+        asteroid = Asteroid((0, 0), (0, 2), "blue_small")
+        smoke = ShipSmoke((100, 0), (0, -1))
+        group.add(asteroid, smoke)
+        group.update((0, 0))
+
+        self.assertEqual(asteroid.position, (0, 2))
+        self.assertEqual(smoke.position, (100, 0))
+        self.assertEqual(group.update_scheduler.get_stats(), (1, 1, 1))
+
+        # Destroyed obstacles are only playing their death animation
+        asteroid.kill(False)
+        self.assertTrue(asteroid.can_defer_update())
+
+    def test_time_slicing(self):
+        group = self.make_group(0.0)
+        scheduler = group.update_scheduler
+        smoke = [ShipSmoke((i*10, 0), (0, -1)) for i in range(8)]
+        group.add(*smoke)
+
+        for _ in range(scheduler.MAX_DEFER_TICKS):
+            group.update((0, 0))
+            _, _, worst_age = scheduler.get_stats()
+            self.assertLess(worst_age, scheduler.MAX_DEFER_TICKS)
+
+        # Objects that have waited too long are updated even when there is no time left
+        self.assertTrue(all(particle.position.y < 0 for particle in smoke))
+
+    def test_catch_up(self):
+        "Deferred objects should end up in the same state as objects updated every tick."
+        results = []
+        for budget in (1.0, 0.0):
+            group = self.make_group(budget)
+            random.seed(0)
+            smoke = ShipSmoke((0, 0), (2, -1))
+            text = DisplayText((0, 0), pg.Surface((8, 8)))
+            group.add(smoke, text)
+            for _ in range(6):
+                group.update((0, 0))
+
+            # Catches up every deferred object
+            group.update_scheduler.budget = 1.0
+            group.update((0, 0))
+            results.append((smoke.position, smoke.get_rotation(), text.position))
+
+        (smoke_pos, rotation, text_pos), (deferred_smoke_pos, deferred_rotation, deferred_text_pos) = results
+        self.assertLess(smoke_pos.distance_to(deferred_smoke_pos), 0.001)
+        self.assertAlmostEqual(rotation, deferred_rotation)
+        self.assertLess(text_pos.distance_to(deferred_text_pos), 0.001)
+
+    def test_deferred_lifetime(self):
+        group = self.make_group(0.0)
+        text = DisplayText((0, 0), pg.Surface((8, 8)))
+        group.add(text)
+        ticks = 0
+        while text.alive():
+            group.update((0, 0))
+            ticks += 1
+
+        # Text lasts 12 ticks and may have to wait for its last update
+        self.assertGreaterEqual(ticks, 12)
+        self.assertLess(ticks, 12+group.update_scheduler.MAX_DEFER_TICKS)
+
+
+
+
+
+class SpatialIndexTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+
+    def setUp(self):
+        random.seed(0)
+        self.group = ObjectGroup()
+        self.asteroids = [Asteroid((random.uniform(-800, 800), random.uniform(-800, 800)), (0, 0), "blue_small") for _ in range(200)]
+        self.group.add(*self.asteroids)
+
+
+    def test_same_as_brute_force(self):
+        for _ in range(50):
+            position = pg.Vector2(random.uniform(-1000, 1000), random.uniform(-1000, 1000))
+            max_distance = random.choice([100, 400, float("inf")])
+            condition = lambda asteroid: asteroid.position.x > 0
+
+            expected = sorted((asteroid for asteroid in self.asteroids
+                               if condition(asteroid) and asteroid.position.distance_to(position) <= max_distance),
+                              key=lambda asteroid: asteroid.position.distance_squared_to(position))[:5]
+            self.assertEqual(self.group.k_nearest(position, 5, Asteroid, max_distance, condition), expected)
+            self.assertEqual(self.group.nearest(position, Asteroid, max_distance, condition), expected[0] if expected else None)
+
+        _, queries, checks = self.group.spatial_index.get_stats()
+        self.assertLess(checks, queries*len(self.asteroids))
+
+    def test_group_changes(self):
+        position = pg.Vector2(2000, 2000)
+        self.group.nearest(position, Asteroid)
+
+        # Objects added after the grid was built are still found
+        close_asteroid = Asteroid((1990, 2000), (0, 0), "blue_small")
+        self.group.add(close_asteroid)
+        self.assertIs(self.group.nearest(position, Asteroid), close_asteroid)
+
+        close_asteroid.force_kill()
+        self.assertIsNot(self.group.nearest(position, Asteroid), close_asteroid)
+        self.assertEqual(self.group.nearest(position, PlayerShip), None)
+
+    def test_rebuilt_every_tick(self):
+        asteroid = Asteroid((3000, 0), (-20, 0), "blue_small")
+        self.group.add(asteroid)
+        self.assertIsNot(self.group.nearest((2900, 0), Asteroid, 50), asteroid)
+
+        for _ in range(5):
+            self.group.update((0, 0))
+        self.assertIs(self.group.nearest((2900, 0), Asteroid, 50), asteroid)
+
+    def test_roles(self):
+        self.assertIsNone(self.group.get_role("player"))
+        ship = PlayerShip((0, 0))
+        self.group.add(ship)
+        self.assertIs(self.group.get_role("player"), ship)
+
+        ship.force_kill()
+        self.assertIsNone(self.group.get_role("player"))
+        new_ship = PlayerShip((0, 0))
+        self.group.add(new_ship)
+        self.assertIs(self.group.get_role("player"), new_ship)
+
+
+
+
+
+class FlowFieldTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+
+    def setUp(self):
+        self.group = ObjectGroup()
+        self.player = PlayerShip((0, 0))
+        self.group.add(self.player)
+        self.field = self.group.flow_field
+
+
+    def test_direct_path(self):
+        self.group.update((0, 0))
+        self.assertEqual(self.field.get_direction((0, -200)), (0, 1))
+        self.assertEqual(self.field.get_direction((200, 200)), pg.Vector2(-1, -1).normalize())
+        # Positions in the player's cell or outside the field have no direction
+        self.assertEqual(self.field.get_direction((5, 5)), (0, 0))
+        self.assertEqual(self.field.get_direction((2000, 0)), (0, 0))
+
+    def test_avoids_asteroids(self):
+        wall = [Asteroid((x, -160), (0, 0), "blue_medium") for x in range(-96, 97, 32)]
+        self.group.add(*wall)
+        self.group.update((0, 0))
+
+        position = pg.Vector2(0, -300)
+        for _ in range(200):
+            direction = self.field.get_direction(position)
+            if not direction:
+                break
+            position += direction*4
+            for asteroid in wall:
+                self.assertGreater(position.distance_to(asteroid.position), asteroid.radius, "walked through an asteroid")
+
+        self.assertLess(position.distance_to(self.player.position), self.field.CELL_SIZE*2)
+
+    def test_shared_between_enemies(self):
+        "The field should only be built once for all the enemies sampling it in a tick."
+        self.group.update((0, 0))
+        for tick in range(self.field.REBUILD_INTERVAL):
+            for i in range(50):
+                self.field.get_direction((i*4, -100))
+            self.group.update((0, 0))
+
+        builds, _, _, _ = self.field.get_stats()
+        self.assertEqual(builds, 1)
+
+        # Moving the player far enough rebuilds the field early
+        self.player.set_position((200, 0))
+        self.field.get_direction((0, -100))
+        self.assertEqual(self.field.get_stats()[0], 2)
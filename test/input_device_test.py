@@ -0,0 +1,129 @@
+import pygame as pg
+import unittest
+
+from src.input_device import KeyboardMouse, InputInterpreter
+from src.custom_types import TimedEvent
+
+
+
+class InputInterpreterTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+    def setUp(self):
+        self.inputs = InputInterpreter(KeyboardMouse(), None)
+
+    def press(self, key: int) -> None:
+        self.inputs.get_userinput([pg.Event(pg.KEYDOWN, key=key)])
+
+    def release(self, key: int) -> None:
+        self.inputs.get_userinput([pg.Event(pg.KEYUP, key=key)])
+
+
+    def test_no_input(self):
+        self.assertFalse(self.inputs.check_input("select"))
+        self.inputs.get_userinput([])
+        self.assertEqual(self.inputs.actions.actions, 0)
+
+    def test_invalid_action(self):
+        with self.assertRaises(ValueError):
+            self.inputs.check_input("not_an_action")
+
+    def test_tap(self):
+        self.press(pg.K_RETURN)
+        self.assertTrue(self.inputs.check_input("select"))
+        self.assertFalse(self.inputs.check_input("back"))
+
+        # Tap actions only last for one tick
+        self.inputs.get_userinput([])
+        self.assertFalse(self.inputs.check_input("select"))
+
+    def test_hold(self):
+        self.press(pg.K_w)
+        self.assertTrue(self.inputs.check_input("ship_forward"))
+        self.inputs.get_userinput([])
+        self.assertTrue(self.inputs.check_input("ship_forward"))
+
+        self.release(pg.K_w)
+        self.assertFalse(self.inputs.check_input("ship_forward"))
+
+    def test_hold_threshold(self):
+        # "left" is active on the first tick and again once "a" has been held for more than 8 ticks
+        self.press(pg.K_a)
+        self.assertTrue(self.inputs.check_input("left"))
+        self.assertTrue(self.inputs.check_input("ship_left"))
+
+        for _ in range(7):
+            self.inputs.get_userinput([])
+            self.assertFalse(self.inputs.check_input("left"))
+            self.assertTrue(self.inputs.check_input("ship_left"))
+
+        self.inputs.get_userinput([])
+        self.assertTrue(self.inputs.check_input("left"))
+
+    def test_snapshot(self):
+        self.press(pg.K_SPACE)
+        actions = self.inputs.actions
+        self.assertTrue(actions.is_active("shoot"))
+        self.assertTrue(actions.any_active("select", "shoot"))
+        self.assertFalse(actions.any_active("select", "back"))
+
+        # Snapshots are not changed by later input
+        self.release(pg.K_SPACE)
+        self.assertTrue(actions.is_active("shoot"))
+        self.assertFalse(self.inputs.actions.is_active("shoot"))
+
+    def test_key_states_read_only(self):
+        self.press(pg.K_w)
+        with self.assertRaises(TypeError):
+            self.inputs.keyboard_mouse.hold_keys[pg.K_w] = 0
+
+    def test_key_states_missing(self):
+        hold_keys = self.inputs.keyboard_mouse.hold_keys
+        self.assertFalse(self.inputs.keyboard_mouse.tap_keys[pg.K_F1])
+        self.assertEqual(hold_keys[pg.K_F1], 0)
+        self.assertNotIn(pg.K_F1, hold_keys)
+        self.assertNotIn(pg.K_F1, list(hold_keys))
+
+
+    def test_sub_tick(self):
+        # Pressed a quarter of a tick and half a tick before a 20 TPS tick at time 10
+        self.inputs.get_timed_userinput([TimedEvent(9.9875, pg.Event(pg.KEYDOWN, key=pg.K_SPACE)),
+                                         TimedEvent(9.975, pg.Event(pg.KEYDOWN, key=pg.K_w))], 10, 20)
+        actions = self.inputs.actions
+        self.assertAlmostEqual(actions.get_sub_tick("shoot"), 0.25)
+        self.assertAlmostEqual(actions.get_sub_tick("ship_forward"), 0.5)
+        self.assertEqual(actions.get_sub_tick("back"), 0)
+        self.assertEqual(self.inputs.press_times, (9.9875, 9.975))
+
+        # Held actions only have a sub tick on the tick they were pressed
+        self.inputs.get_timed_userinput([], 10.05, 20)
+        self.assertTrue(self.inputs.check_input("ship_forward"))
+        self.assertEqual(self.inputs.actions.get_sub_tick("ship_forward"), 0)
+        self.assertEqual(self.inputs.press_times, ())
+
+    def test_sub_tick_clamped(self):
+        # Presses from before the previous tick are treated as if they happened at its start
+        self.inputs.get_timed_userinput([TimedEvent(9.0, pg.Event(pg.KEYDOWN, key=pg.K_SPACE))], 10, 20)
+        self.assertEqual(self.inputs.actions.get_sub_tick("shoot"), 1)
+
+        with self.assertRaises(ValueError):
+            self.inputs.actions.get_sub_tick("not_an_action")
+
+    def test_predict_actions(self):
+        self.inputs.predict_actions([pg.Event(pg.KEYDOWN, key=pg.K_a)])
+        self.assertTrue(self.inputs.predicted_actions.is_active("ship_left"))
+        self.assertFalse(self.inputs.check_input("ship_left"))
+
+        # Predictions are replaced once a tick processes the input
+        self.press(pg.K_a)
+        self.assertTrue(self.inputs.predicted_actions.is_active("ship_left"))
+        self.inputs.predict_actions([pg.Event(pg.KEYUP, key=pg.K_a)])
+        self.assertFalse(self.inputs.predicted_actions.is_active("ship_left"))
+        self.assertTrue(self.inputs.check_input("ship_left"))
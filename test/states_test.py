@@ -1,7 +1,11 @@
 import pygame as pg
+import random
 import unittest
 
 from src.states import State, StateStack
+from src.states.spawning import SpawnDirector
+from src.game_objects import ObjectGroup
+from src.game_objects.asteroids import Asteroid
 from src.game_errors import DuplicateStateError
 
 
@@ -79,4 +83,108 @@ class StateStackTest(unittest.TestCase):
 
     def test_pop_when_empty(self):
         with self.assertRaises(IndexError, msg="Did not raise IndexError when attempting to pop from empty stack"):
-            self.state_stack.pop()
\ No newline at end of file
+            self.state_stack.pop()
+
+
+
+class SpawnDirectorTest(unittest.TestCase):
+    radius = 200
+    max_relative_speed = 30
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+    def setUp(self):
+        random.seed(0)
+        self.group = ObjectGroup()
+        self.director = SpawnDirector(self.group, self.radius, self.max_relative_speed)
+
+    def make_asteroid(self, position: pg.typing.Point, velocity: pg.typing.Point = (0, 0)) -> Asteroid:
+        asteroid = Asteroid(position, velocity, "blue_small")
+        self.group.add(asteroid)
+        return asteroid
+
+    def get_density(self, center: pg.typing.Point) -> int:
+        return sum(obj.size for obj in self.group if obj.within_distance(pg.Vector2(center), self.radius))
+
+
+    def test_density(self):
+        for _ in range(50):
+            self.make_asteroid((random.uniform(-400, 400), random.uniform(-400, 400)),
+                               (random.uniform(-10, 10), random.uniform(-10, 10)))
+
+        center = pg.Vector2(0, 0)
+        for tick in range(200):
+            center += (15, 10)
+            if tick%10 == 0:
+                self.make_asteroid(center + (random.uniform(-300, 300), random.uniform(-300, 300)))
+            if tick%15 == 0:
+                self.group.sprites()[0].force_kill()
+
+            self.director.update(center)
+            self.assertEqual(self.director.density, self.get_density(center))
+            for obj in self.group:
+                obj.move(obj.get_velocity())
+
+    def test_density_center_jump(self):
+        self.make_asteroid((1000, 1000))
+        self.director.update((0, 0))
+        self.assertEqual(self.director.density, 0)
+        self.director.update((1000, 1000))
+        self.assertEqual(self.director.density, self.get_density((1000, 1000)))
+
+    def test_density_only_checks_objects_near_edge(self):
+        self.make_asteroid((0, 0))
+        self.make_asteroid((self.radius, 0))
+        self.director.update((0, 0))
+        self.director.update((0, 0))
+        # Only the asteroid on the edge of the ring could have left the ring
+        self.assertEqual(self.director.get_stats()[3], 1)
+
+
+    def test_find_spawn_pos(self):
+        for _ in range(30):
+            self.make_asteroid(pg.Vector2(0, -300).rotate(random.uniform(0, 360)))
+        self.director.update((0, 0))
+
+        asteroid = Asteroid((0, 0), (0, 0), "blue_small")
+        spawn_pos = self.director.find_spawn_pos(asteroid, (0, 0), 300)
+        self.assertIsNotNone(spawn_pos)
+        self.assertEqual(asteroid.position, spawn_pos)
+        self.assertAlmostEqual(spawn_pos.length(), 300)
+        self.assertFalse(any(asteroid.collides_with(other) for other in self.group))
+
+    def test_find_spawn_pos_no_space(self):
+        for i in range(0, 360, 2):
+            self.make_asteroid(pg.Vector2(0, -300).rotate(i))
+        self.director.update((0, 0))
+
+        asteroid = Asteroid((0, 0), (0, 0), "blue_small")
+        self.assertIsNone(self.director.find_spawn_pos(asteroid, (0, 0), 300))
+        self.assertEqual(self.director.get_stats()[:3], (0, 1, 0))
+
+    def test_find_spawn_pos_budget(self):
+        self.make_asteroid((0, 0))
+        self.director.update((0, 0))
+
+        # Every candidate overlaps the asteroid so each attempt uses up some of the budget
+        asteroid = Asteroid((0, 0), (0, 0), "blue_small")
+        for _ in range(SpawnDirector.WORK_BUDGET):
+            self.assertIsNone(self.director.find_spawn_pos(asteroid, (0, 0), 1))
+        self.assertGreater(self.director.get_stats()[2], 0)
+
+        # Budget is reset in the next tick
+        self.director.update((0, 0))
+        self.assertIsNotNone(self.director.find_spawn_pos(asteroid, (0, 0), 300))
+
+    def test_ring_candidates(self):
+        candidates = SpawnDirector.get_ring_candidates((10, 20), 100, 8)
+        self.assertEqual(len(candidates), 8)
+        for candidate in candidates:
+            self.assertAlmostEqual(candidate.distance_to((10, 20)), 100)
@@ -0,0 +1,168 @@
+import pygame as pg
+import math
+import unittest
+
+import config
+from src import time_units
+from src.custom_types import Timer
+from src.input_device import InputInterpreter, KeyboardMouse
+from src.game_objects import ObjectGroup
+from src.game_objects.spaceship import PlayerShip
+from src.game_objects.asteroids import Asteroid
+from src.game_objects.projectiles import EnemyBullet
+from src.game_objects.camera import RotoZoomCamera
+
+
+
+class TimeUnitsTest(unittest.TestCase):
+
+    def tearDown(self):
+        time_units.set_tickrate(config.TICKRATE)
+
+
+    def test_conversions(self):
+        time_units.set_tickrate(60)
+        self.assertEqual(time_units.get_tickrate(), 60)
+        self.assertAlmostEqual(time_units.tick_scale(), config.BASE_TICKRATE/60)
+        self.assertAlmostEqual(time_units.to_ticks(10), 10*60/config.BASE_TICKRATE)
+        self.assertAlmostEqual(time_units.per_tick(6), 6*config.BASE_TICKRATE/60)
+        self.assertEqual(time_units.per_tick(pg.Vector2(3, 6)), pg.Vector2(3, 6)*config.BASE_TICKRATE/60)
+
+        # Applying the converted values for a base tick's worth of ticks gives the base values
+        ticks = round(time_units.to_ticks(1))
+        self.assertAlmostEqual(time_units.decay(0.9)**ticks, 0.9)
+        self.assertAlmostEqual(1-(1-time_units.chance(0.2))**ticks, 0.2)
+
+    def test_invalid_tickrate(self):
+        with self.assertRaises(ValueError):
+            time_units.set_tickrate(45)
+        self.assertEqual(time_units.get_tickrate(), config.TICKRATE)
+
+    def test_timer(self):
+        for tickrate in time_units.SUPPORTED_TICKRATES:
+            time_units.set_tickrate(tickrate)
+            timer = Timer(15).start()
+            ticks = 0
+            while not timer.complete:
+                timer.update()
+                ticks += 1
+
+            self.assertEqual(ticks, math.ceil(time_units.to_ticks(15)), f"{tickrate} TPS")
+
+
+
+
+class TrajectoryTest(unittest.TestCase):
+    "Checks that the same input gives the same gameplay over the same amount of time at every tick rate."
+
+    duration = 2
+
+    @classmethod
+    def setUpClass(cls):
+        pg.init()
+        pg.Window(hidden=True).get_surface()
+        cls.inputs = InputInterpreter(KeyboardMouse(), None)
+
+    @classmethod
+    def tearDownClass(cls):
+        pg.quit()
+
+    def tearDown(self):
+        time_units.set_tickrate(config.TICKRATE)
+
+
+    def run_ship(self, tickrate: int, keys: list[int], release_time: float) -> PlayerShip:
+        "Holds `keys` for `release_time` seconds then lets the ship drift until the end of the run."
+        time_units.set_tickrate(tickrate)
+        ship = PlayerShip((0, 0))
+        ObjectGroup().add(ship)
+
+        for tick in range(self.duration*tickrate):
+            events = []
+            if tick == 0:
+                events = [pg.Event(pg.KEYDOWN, key=key) for key in keys]
+            elif tick == round(release_time*tickrate):
+                events = [pg.Event(pg.KEYUP, key=key) for key in keys]
+
+            self.inputs.get_userinput(events)
+            ship.userinput(self.inputs)
+            ship.update()
+
+        self.inputs.get_userinput([pg.Event(pg.KEYUP, key=key) for key in keys])
+        return ship
+
+
+    def test_thrust(self):
+        expected = self.run_ship(config.BASE_TICKRATE, [pg.K_w], 1)
+        distance = expected.position.magnitude()
+
+        for tickrate in time_units.SUPPORTED_TICKRATES:
+            ship = self.run_ship(tickrate, [pg.K_w], 1)
+            self.assertLess(ship.position.distance_to(expected.position), distance*0.02, f"{tickrate} TPS")
+            self.assertLess(ship.get_velocity().distance_to(expected.get_velocity()), 0.01, f"{tickrate} TPS")
+
+    def test_turn(self):
+        expected = self.run_ship(config.BASE_TICKRATE, [pg.K_d], 0.5).get_rotation()
+
+        for tickrate in time_units.SUPPORTED_TICKRATES:
+            rotation = self.run_ship(tickrate, [pg.K_d], 0.5).get_rotation()
+            # Speeding up over several ticks is a little slower with shorter ticks
+            self.assertAlmostEqual(rotation, expected, delta=expected*0.06, msg=f"{tickrate} TPS")
+
+    def test_turn_started_mid_tick(self):
+        "Starting to turn part way through a tick should reach the same top speed without going over it."
+        top_speed = math.ceil(PlayerShip._rotation_speed/PlayerShip._turn_acceleration)*PlayerShip._turn_acceleration
+        for tickrate in time_units.SUPPORTED_TICKRATES:
+            time_units.set_tickrate(tickrate)
+            for sub_tick in (0.0, 0.5, 0.75, 0.9, 1.0):
+                ship = PlayerShip((0, 0))
+                ObjectGroup().add(ship)
+                max_speed = 0
+                for tick in range(tickrate):
+                    ship._turn(1, sub_tick if tick == 0 else 0.0)
+                    ship.update()
+                    max_speed = max(max_speed, ship._angular_vel)
+
+                msg = f"sub tick {sub_tick} at {tickrate} TPS"
+                self.assertEqual(ship._angular_vel, top_speed, msg)
+                self.assertLessEqual(max_speed, top_speed, msg)
+
+    def test_drift(self):
+        for tickrate in time_units.SUPPORTED_TICKRATES:
+            time_units.set_tickrate(tickrate)
+            asteroid = Asteroid((0, 0), (3, -2), "blue_small")
+            asteroid.set_angular_vel(5)
+            ObjectGroup().add(asteroid)
+            for _ in range(self.duration*tickrate):
+                asteroid.update()
+
+            base_ticks = self.duration*config.BASE_TICKRATE
+            self.assertLess(asteroid.position.distance_to((3*base_ticks, -2*base_ticks)), 0.01, f"{tickrate} TPS")
+            self.assertAlmostEqual(asteroid.get_rotation(), 5*base_ticks%360, 6, f"{tickrate} TPS")
+
+    def test_camera_rotation(self):
+        def run_camera(tickrate: int) -> RotoZoomCamera:
+            time_units.set_tickrate(tickrate)
+            camera = RotoZoomCamera((0, 0))
+            camera.set_target_rotation(120)
+            for _ in range(tickrate//2):
+                camera.update()
+            return camera
+
+        expected = run_camera(config.BASE_TICKRATE).get_rotation()
+        for tickrate in time_units.SUPPORTED_TICKRATES:
+            rotation = run_camera(tickrate).get_rotation()
+            self.assertAlmostEqual(rotation, expected, delta=expected*0.1, msg=f"{tickrate} TPS")
+
+    def test_projectile_range(self):
+        for tickrate in time_units.SUPPORTED_TICKRATES:
+            time_units.set_tickrate(tickrate)
+            bullet = EnemyBullet(pg.Vector2(0, 0), pg.Vector2(0, -1), (0, 0))
+            group = ObjectGroup()
+            group.add(bullet)
+            start_pos = bullet.position.copy()
+            while bullet.alive():
+                bullet.update()
+
+            # Enemy bullets travel at 16 pixels a base tick for 100 base ticks
+            self.assertAlmostEqual(bullet.position.distance_to(start_pos), 1600, delta=16, msg=f"{tickrate} TPS")